@@ -1,13 +1,16 @@
 import os
 import logging
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 import subprocess
 import json
+import multiprocessing
+import queue
 import re
-import config
 import threading
-import uuid
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import config
+from scripts.jobs import JobManager, QueueFullError, FINISHED_STATUSES
+from scripts.workspace import new_run_id, is_valid_run_id, run_paths, cleanup_runs, touch_run
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -16,8 +19,15 @@ logging.basicConfig(level=logging.DEBUG)
 app = Flask(__name__, template_folder="templates")
 app.secret_key = config.SESSION_SECRET
 
-# In-memory job storage for background tasks
-jobs = {}
+# Bounded worker pool and job store for background tasks
+jobs = JobManager(
+    max_workers=getattr(config, "JOB_WORKERS", 2),
+    queue_depth=getattr(config, "JOB_QUEUE_DEPTH", 16),
+    ttl_seconds=getattr(config, "JOB_TTL_SECONDS", 3600),
+    db_path=getattr(config, "JOB_STORE_PATH", None)
+)
+# Summary precompute stays off the job pool so it cannot delay or reject user jobs
+summary_precompute = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary-precompute")
 
 def extract_product_url(url):
     """Extract and validate product URL from Walmart"""
@@ -35,49 +45,134 @@ def extract_product_url(url):
     
     return None
 
+# Run workspaces untouched for this long are deleted when a new run starts
+RUN_TTL_SECONDS = getattr(config, "RUN_TTL_SECONDS", 24 * 3600)
+# Compute the summary right after prediction so /summarize finds it cached
+# (opt-in; runs on its own single low-priority thread, never on a job worker)
+SUMMARY_PRECOMPUTE = getattr(config, "SUMMARY_PRECOMPUTE", False)
+# Load the model in a background thread at boot so the app starts serving
+# immediately and the first job does not pay for the load
+PREDICTOR_WARM_UP = getattr(config, "PREDICTOR_WARM_UP", True)
+# Comment line sent on idle event streams so proxies keep the connection open
+SSE_KEEPALIVE_SECONDS = 15
+# Longest a ?wait= status request may block
+JOB_LONG_POLL_MAX_SECONDS = 30
+
+def request_run_id():
+    """
+    Run ID sent by the client in the JSON body or query string
+    Returns None (shared data/ workspace) when absent; raises ValueError when malformed
+    """
+    data = request.get_json(silent=True) or {}
+    run_id = data.get("run_id") or request.args.get("run_id")
+    if run_id and not is_valid_run_id(run_id):
+        raise ValueError("Invalid run ID")
+    return run_id or None
+
 @app.route("/", methods=["GET"])
 def index():
     return render_template("index.html")
 
+REVIEWS_PAGE_SIZE = 50
+REVIEWS_MAX_PAGE_SIZE = 500
+
+def parse_reviews_query(args):
+    """Validate /reviews query parameters; raises ValueError on bad input"""
+    from scripts.review_store import FIELDS, SENTIMENTS
+    
+    def int_arg(name, default=None):
+        value = args.get(name)
+        if value in (None, ""):
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"'{name}' must be an integer")
+    
+    offset = int_arg("offset", 0)
+    limit = int_arg("limit", REVIEWS_PAGE_SIZE)
+    if offset < 0 or limit < 0:
+        raise ValueError("'offset' and 'limit' must not be negative")
+    
+    sentiments = [s for s in args.get("sentiment", "").lower().split(",") if s] or None
+    if sentiments and not set(sentiments) <= set(SENTIMENTS):
+        raise ValueError(f"'sentiment' must be one of {', '.join(SENTIMENTS)}")
+    
+    fields = [f for f in args.get("fields", "").split(",") if f] or list(FIELDS)
+    if not set(fields) <= set(FIELDS):
+        raise ValueError(f"'fields' must be a subset of {', '.join(FIELDS)}")
+    
+    return {
+        "offset": offset,
+        "limit": min(limit, REVIEWS_MAX_PAGE_SIZE),
+        "fields": fields,
+        "sentiments": sentiments,
+        "min_rating": int_arg("min_rating"),
+        "max_rating": int_arg("max_rating")
+    }
+
 @app.route("/reviews", methods=["GET"])
 def get_reviews():
-    """Endpoint to fetch analyzed reviews"""
+    """
+    Endpoint to fetch analyzed reviews, one page at a time
+    Query: offset, limit, sentiment (comma-separated), min_rating, max_rating, fields
+    Reviews are returned column-wise: {"text": [...], "rating": [...], ...}
+    """
     try:
-        import pandas as pd
-        reviews_path = "data/real_reviews.csv"
+        from scripts.review_store import get_review_store
+        try:
+            paths = run_paths(request_run_id())
+            query = parse_reviews_query(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        reviews_path = paths['real_csv']
         
         if not os.path.exists(reviews_path):
             return jsonify({"error": "No reviews found. Please analyze some reviews first."}), 404
         
-        # Read the CSV file
-        df = pd.read_csv(reviews_path)
-        
-        # Convert to list of dictionaries
-        reviews_list = []
-        for _, row in df.iterrows():
-            reviews_list.append({
-                "text": row.get("text", ""),
-                "rating": int(row.get("rating", 3)),
-                "sentiment": row.get("sentiment", "neutral"),
-                "confidence": float(row.get("confidence", 0.0))
-            })
+        matched, columns = get_review_store(reviews_path).page(**query)
         
         # Load sentiment stats if available
         sentiment_stats = {}
-        stats_path = "data/sentiment_stats.json"
+        stats_path = paths['sentiment_stats']
         if os.path.exists(stats_path):
             with open(stats_path, 'r') as f:
                 sentiment_stats = json.load(f)
         
         return jsonify({
-            "reviews": reviews_list,
+            "reviews": columns,
             "stats": sentiment_stats,
-            "total": len(reviews_list)
+            "total": matched,
+            "offset": query["offset"],
+            "limit": query["limit"]
         })
     except Exception as e:
         logging.error(f"Error fetching reviews: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/export/pdf", methods=["GET"])
+def export_pdf():
+    """Download the real reviews as a PDF, rendering it on first request"""
+    try:
+        try:
+            run_id = request_run_id()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        if not os.path.exists(run_paths(run_id)['real_csv']):
+            return jsonify({"error": "No reviews found. Please analyze some reviews first."}), 404
+        
+        import scripts.predict as predict_module
+        pdf_path = predict_module.ensure_pdf(run_id)
+        if not pdf_path:
+            return jsonify({"error": "Failed to generate PDF"}), 500
+        
+        return send_file(os.path.abspath(pdf_path), mimetype="application/pdf",
+                         as_attachment=True, download_name="real_reviews.pdf")
+    except Exception as e:
+        logging.error(f"Error exporting PDF: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/analyze", methods=["POST"])
 def analyze():
     try:
@@ -107,167 +202,264 @@ def scrape():
         if not product_url:
             return jsonify({"error": "No product URL provided"}), 400
 
-        command = ["python", "scripts/scraper.py", product_url]
+        # Each analysis works in its own workspace so concurrent runs don't collide
+        cleanup_runs(RUN_TTL_SECONDS, active_run_ids=jobs.active_run_ids())
+        run_id = new_run_id()
+        run_paths(run_id, create=True)
+
+        command = ["python", "scripts/scraper.py", product_url, run_id]
         result = subprocess.run(command, capture_output=True, text=True)
         
         if result.returncode != 0:
             logging.error(f"Scraper error: {result.stderr}")
             return jsonify({"error": "Error during scraping", "details": result.stderr}), 500
         
-        return jsonify({"status": "success", "message": "Reviews scraped successfully"})
+        return jsonify({"status": "success", "message": "Reviews scraped successfully", "run_id": run_id})
     
     except Exception as e:
         logging.error(f"Error in scrape endpoint: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-def run_predict_background(job_id):
+def get_predictor():
+    """Return the in-process review predictor (model package loaded once per worker)"""
+    import scripts.predict as predict_module
+    return predict_module.get_predictor()
+
+def warm_up_predictor():
+    """Load and warm the prediction model at boot so the first job doesn't pay for it"""
+    try:
+        get_predictor().warm_up()
+    except Exception as e:
+        logging.error(f"Predictor warm-up failed: {str(e)}")
+
+def job_status_payload(job):
+    """Client-facing view of a job record"""
+    response = {
+        "status": job["status"],
+        "message": job.get("message", ""),
+        "version": job.get("version", 0)
+    }
+    
+    if "stage" in job:
+        response["stage"] = job["stage"]
+    
+    if "progress" in job:
+        response["progress"] = job["progress"]
+    
+    if job["status"] == "completed":
+        response["result"] = job.get("result", {})
+    elif job["status"] == "failed":
+        response["error"] = job.get("error", "Unknown error")
+    
+    return response
+
+def job_status_response(job_id):
+    """
+    Build the JSON status payload shared by the *_status endpoints
+    With ?since=<version>&wait=<seconds> the request long-polls: it returns as
+    soon as the job changes past that version, or after the wait
+    """
+    since = request.args.get("since", type=int)
+    wait = request.args.get("wait", 0, type=float)
+    if since is not None and wait > 0:
+        job = jobs.wait(job_id, since, min(wait, JOB_LONG_POLL_MAX_SECONDS))
+    else:
+        job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    return jsonify(job_status_payload(job))
+
+def start_job(kind, message, target):
+    """Queue a background job for the request's run, answering 429 when the queue is full"""
+    try:
+        try:
+            run_id = request_run_id()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        touch_run(run_id)
+        job_id = jobs.submit(kind, message, target, run_id, run_id=run_id)
+        return jsonify({"status": "started", "job_id": job_id})
+    except QueueFullError as e:
+        logging.warning(f"Rejecting {kind} job: {str(e)}")
+        return jsonify({"error": "Server is busy. Please try again shortly."}), 429
+    except Exception as e:
+        logging.error(f"Error in {kind} endpoint: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def run_predict_background(job_id, run_id=None):
     """Background task to run prediction"""
     try:
-        jobs[job_id]["status"] = "running"
-        jobs[job_id]["message"] = "Loading ML models and analyzing reviews..."
+        jobs.update(job_id, status="running", stage="loading",
+                    message="Loading ML models and analyzing reviews...")
         logging.info(f"Job {job_id}: Starting prediction")
         
-        result = subprocess.run(["python", "scripts/predict.py"], capture_output=True, text=True, timeout=300)
+        def report_progress(progress):
+            jobs.update(job_id, stage="classifying", progress=progress,
+                        message=f"Analyzed {progress['processed']} reviews ({progress['percent']:.0f}%)...")
         
-        if result.returncode != 0:
-            logging.error(f"Job {job_id}: Prediction error: {result.stderr}")
-            jobs[job_id]["status"] = "failed"
-            jobs[job_id]["error"] = f"Error during prediction: {result.stderr}"
+        success = get_predictor().analyze_run(run_id, progress_callback=report_progress)
+        
+        if not success:
+            logging.error(f"Job {job_id}: Prediction failed")
+            jobs.update(job_id, status="failed",
+                        error="Error during prediction. Check the server logs for details.")
         else:
             logging.info(f"Job {job_id}: Prediction completed successfully")
-            jobs[job_id]["status"] = "completed"
-            jobs[job_id]["message"] = "Fake reviews identified successfully"
-            jobs[job_id]["result"] = {"message": "Fake reviews identified successfully"}
-    except subprocess.TimeoutExpired:
-        logging.error(f"Job {job_id}: Prediction timed out")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = "Prediction timed out after 5 minutes"
+            jobs.update(job_id, status="completed", stage="done",
+                        message="Fake reviews identified successfully",
+                        result={"message": "Fake reviews identified successfully"})
+            if SUMMARY_PRECOMPUTE:
+                # Warm the summary cache while the client is still reading the results
+                import scripts.summary as summary_module
+                summary_precompute.submit(summary_module.precompute_summary, run_id)
     except Exception as e:
         logging.error(f"Job {job_id}: Error in prediction: {str(e)}")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
+        jobs.update(job_id, status="failed", error=str(e))
 
 @app.route("/predict", methods=["POST"])
 def predict():
-    try:
-        job_id = str(uuid.uuid4())
-        jobs[job_id] = {
-            "status": "pending",
-            "message": "Starting analysis...",
-            "created_at": datetime.now().isoformat()
-        }
-        
-        # Start background thread
-        thread = threading.Thread(target=run_predict_background, args=(job_id,))
-        thread.daemon = True
-        thread.start()
-        
-        return jsonify({"status": "started", "job_id": job_id})
-    
-    except Exception as e:
-        logging.error(f"Error in predict endpoint: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    return start_job("predict", "Starting analysis...", run_predict_background)
 
 @app.route("/predict_status/<job_id>", methods=["GET"])
 def predict_status(job_id):
-    if job_id not in jobs:
-        return jsonify({"error": "Job not found"}), 404
-    
-    job = jobs[job_id]
-    response = {
-        "status": job["status"],
-        "message": job.get("message", "")
-    }
-    
-    if job["status"] == "completed":
-        response["result"] = job.get("result", {})
-    elif job["status"] == "failed":
-        response["error"] = job.get("error", "Unknown error")
-    
-    return jsonify(response)
+    return job_status_response(job_id)
 
-def run_summarize_background(job_id):
-    """Background task to run summarization"""
+def run_summarize_background(job_id, run_id=None, emit=None, engine=None):
+    """
+    Background task to run summarization
+    emit(event, data), when given, receives streamed tokens, map-reduce progress
+    and the final result (used by /summarize_stream)
+    """
+    emit = emit or (lambda event, data: None)
     try:
-        jobs[job_id]["status"] = "running"
-        jobs[job_id]["message"] = "Generating intelligent summary with custom ML model..."
+        jobs.update(job_id, status="running", stage="summarizing",
+                    message="Generating intelligent summary with custom ML model...")
         logging.info(f"Job {job_id}: Starting summarization")
         
+        def report_progress(progress):
+            message = f"Summarizing reviews ({progress['stage']} {progress['done']}/{progress['total']})..."
+            jobs.update(job_id, stage=progress["stage"], progress=progress, message=message)
+            emit("progress", {**progress, "message": message})
+        
         import scripts.summary as summary_module
-        summary_text = summary_module.run_summary()
+        result = summary_module.summarize(run_id=run_id, engine=engine,
+                                          on_token=lambda token: emit("token", {"text": token}),
+                                          on_progress=report_progress)
+        summary_text = result["summary"]
         
         if not summary_text:
             logging.error(f"Job {job_id}: Failed to generate summary")
-            jobs[job_id]["status"] = "failed"
-            jobs[job_id]["error"] = "Failed to generate summary"
+            jobs.update(job_id, status="failed", error="Failed to generate summary")
+            emit("error", {"error": "Failed to generate summary"})
             return
         
-        sentiment_stats_path = "data/sentiment_stats.json"
-        sentiment_stats = {
-            "sentiment_counts": {"positive": 0, "neutral": 0, "negative": 0},
-            "total_reviews": 0,
-            "real_reviews_count": 0,
-            "fake_reviews_count": 0
-        }
-
-        if os.path.exists(sentiment_stats_path):
-            try:
-                with open(sentiment_stats_path, 'r') as f:
-                    sentiment_stats = json.load(f)
-                logging.info(f"Job {job_id}: Loaded sentiment statistics")
-            except Exception as e:
-                logging.error(f"Job {job_id}: Error loading sentiment statistics: {str(e)}")
+        sentiment_stats = result["sentiment_stats"]
+        if result["cached"]:
+            logging.info(f"Job {job_id}: Served summary from cache")
         
         logging.info(f"Job {job_id}: Summarization completed successfully")
-        jobs[job_id]["status"] = "completed"
-        jobs[job_id]["message"] = "Summary generated successfully"
-        jobs[job_id]["result"] = {
+        job_result = {
             "summary": summary_text,
             "sentiment_stats": sentiment_stats
         }
+        jobs.update(job_id, status="completed", stage="done",
+                    message="Summary generated successfully",
+                    result=job_result)
+        emit("done", job_result)
     except Exception as e:
         logging.error(f"Job {job_id}: Error in summarization: {str(e)}")
-        jobs[job_id]["status"] = "failed"
-        jobs[job_id]["error"] = str(e)
+        jobs.update(job_id, status="failed", error=str(e))
+        emit("error", {"error": str(e)})
+
+def sse_message(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 @app.route("/summarize", methods=["POST"])
 def summarize():
+    return start_job("summarize", "Starting summarization...", run_summarize_background)
+
+@app.route("/summarize_stream", methods=["GET"])
+def summarize_stream():
+    """
+    Run summarization as a job and stream it as server-sent events:
+    job (job_id), token (summary text as it is generated), progress, done (result) or error
+    """
     try:
-        job_id = str(uuid.uuid4())
-        jobs[job_id] = {
-            "status": "pending",
-            "message": "Starting summarization...",
-            "created_at": datetime.now().isoformat()
-        }
-        
-        # Start background thread
-        thread = threading.Thread(target=run_summarize_background, args=(job_id,))
-        thread.daemon = True
-        thread.start()
-        
-        return jsonify({"status": "started", "job_id": job_id})
+        run_id = request_run_id()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    except Exception as e:
-        logging.error(f"Error in summarize endpoint: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    engine = request.args.get("engine") or None
+    if engine not in (None, "custom", "ollama"):
+        return jsonify({"error": "engine must be 'custom' or 'ollama'"}), 400
+    
+    events = queue.Queue()
+    try:
+        touch_run(run_id)
+        job_id = jobs.submit("summarize", "Starting summarization...", run_summarize_background,
+                             run_id, lambda event, data: events.put((event, data)), engine, run_id=run_id)
+    except QueueFullError as e:
+        logging.warning(f"Rejecting summarize stream: {str(e)}")
+        return jsonify({"error": "Server is busy. Please try again shortly."}), 429
+    
+    def stream():
+        yield sse_message("job", {"job_id": job_id})
+        while True:
+            try:
+                event, data = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield sse_message(event, data)
+            if event in ("done", "error"):
+                return
+    
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route("/summarize_status/<job_id>", methods=["GET"])
 def summarize_status(job_id):
-    if job_id not in jobs:
+    return job_status_response(job_id)
+
+@app.route("/jobs/<job_id>/status", methods=["GET"])
+def job_status(job_id):
+    return job_status_response(job_id)
+
+@app.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """
+    Push a job's status as server-sent "status" events (same payload as the
+    *_status endpoints) whenever it changes, until it completes or fails
+    """
+    job = jobs.get(job_id)
+    if job is None:
         return jsonify({"error": "Job not found"}), 404
     
-    job = jobs[job_id]
-    response = {
-        "status": job["status"],
-        "message": job.get("message", "")
-    }
-    
-    if job["status"] == "completed":
-        response["result"] = job.get("result", {})
-    elif job["status"] == "failed":
-        response["error"] = job.get("error", "Unknown error")
+    def stream():
+        current = job
+        version = None
+        while True:
+            if current is None:
+                yield sse_message("status", {"status": "failed", "error": "Job not found"})
+                return
+            if current.get("version") == version:
+                yield ": keep-alive\n\n"
+            else:
+                version = current.get("version")
+                yield sse_message("status", job_status_payload(current))
+                if current["status"] in FINISHED_STATUSES:
+                    return
+            current = jobs.wait(job_id, version, SSE_KEEPALIVE_SECONDS)
     
-    return jsonify(response)
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Not in worker processes that re-import this module (spawn/forkserver prediction pools)
+if PREDICTOR_WARM_UP and multiprocessing.parent_process() is None:
+    threading.Thread(target=warm_up_predictor, name="predictor-warm-up", daemon=True).start()
 
 if __name__ == "__main__":
     app.run(debug=config.FLASK_DEBUG, host=config.FLASK_HOST, port=config.FLASK_PORT, use_reloader=False)
@@ -10,6 +10,24 @@ DO NOT commit config.py to version control
 # Sign up at https://oxylabs.io/ to get your credentials
 OXYLABS_USERNAME = "your_oxylabs_username_here"
 OXYLABS_PASSWORD = "your_oxylabs_password_here"
+# For local testing, python scripts/fake_oxylabs.py serves a stub at
+# http://localhost:8011/v1/queries
+OXYLABS_API_URL = "https://realtime.oxylabs.io/v1/queries"
+
+# Review pages fetched per product, concurrent requests, retry/backoff and
+# the minimum delay between requests to the same host
+SCRAPE_MAX_PAGES = 5
+SCRAPE_MAX_REVIEWS = 500
+SCRAPE_CONCURRENCY = 4
+SCRAPE_MAX_RETRIES = 3
+SCRAPE_BACKOFF_SECONDS = 1.0
+SCRAPE_MIN_INTERVAL_SECONDS = 0.5
+SCRAPE_TIMEOUT_SECONDS = 60
+# Reuse a product's scraped reviews for this long, then keep serving them for
+# the stale window while they are refreshed in the background (None disables)
+SCRAPE_CACHE_PATH = "data/scrape_cache.sqlite3"
+SCRAPE_CACHE_TTL_SECONDS = 3600
+SCRAPE_CACHE_STALE_SECONDS = 86400
 
 # ============================================================================
 # OLLAMA LLM CONFIGURATION (OPTIONAL)
@@ -20,6 +38,98 @@ OXYLABS_PASSWORD = "your_oxylabs_password_here"
 # If you don't want to use Ollama, the system will use custom summarizer
 OLLAMA_URL = "http://localhost:11434/api/generate"
 OLLAMA_MODEL = "llama3.2:1b"  # or "deepseek-llm:7b", "llama3.2:3b", etc.
+# Every real review is summarized: reviews are packed into prompts of at most
+# OLLAMA_CHUNK_CHARS characters, summarized OLLAMA_WORKERS at a time, and the
+# partial summaries are combined into one
+OLLAMA_CHUNK_CHARS = 4000
+OLLAMA_WORKERS = 4
+OLLAMA_TIMEOUT_SECONDS = 120
+# "custom" uses the custom summarizer and falls back to Ollama; "ollama"
+# asks Ollama first (its tokens are streamed by /summarize_stream)
+SUMMARY_ENGINE = "custom"
+
+# ============================================================================
+# PREDICTION CONFIGURATION
+# ============================================================================
+# "textblob" builds one TextBlob per review (reference, default); "lexicon"
+# scores a whole batch with a precompiled polarity lexicon (fast, opt-in) but
+# does not reproduce TextBlob's negation/intensifier handling exactly - enable
+# SENTIMENT_PARITY_CHECK to see how often its categories differ on your data
+SENTIMENT_BACKEND = "textblob"
+SENTIMENT_LEXICON_PATH = "snlp/saved_models/sentiment_lexicon.json"
+# Log lexicon-vs-TextBlob agreement for every prediction run
+SENTIMENT_PARITY_CHECK = False
+# Processes used to score large review files (1 = single process) and
+# the number of reviews handed to each worker at a time. In the web app the
+# workers are started with forkserver/spawn and each loads the model (export
+# the compact package so they share it); only the predict.py CLI forks
+PREDICT_WORKERS = 1
+PREDICT_CHUNK_SIZE = 20000
+# Persistent prediction cache keyed by raw review text + model package;
+# entries are dropped automatically when the model file changes (None disables)
+PREDICTION_CACHE_PATH = "data/prediction_cache.sqlite3"
+PREDICTION_CACHE_MAX_ENTRIES = 500000
+# Render real_reviews.pdf during every prediction (False = produce it only
+# when downloaded from /export/pdf; summarization never needs it)
+GENERATE_PDF_REPORT = False
+# Read/score/write the input this many rows at a time to bound memory
+# (None = load the whole input file at once)
+PREDICT_STREAM_CHUNK_SIZE = None
+# Re-analyzing a re-scraped product only scores reviews not seen in its
+# previous analysis (kept under data/analysis_state/) and updates the stats
+# by the difference. Opt-in: it reads the whole input at once, so it is
+# skipped when PREDICT_STREAM_CHUNK_SIZE is set
+PREDICT_INCREMENTAL = False
+# Model package format: "auto" uses the memory-mapped compact export next to
+# the .pkl when it matches the pickle (create it with
+# python scripts/compact_model.py export), "compact"/"pickle" force one
+MODEL_FORMAT = "auto"
+# Load the model in the background as the app boots (False = on the first job)
+PREDICTOR_WARM_UP = True
+# "fused" builds model features in whole-batch passes (same output as
+# clean_text + vectorizer.transform, benchmark with
+# python scripts/fused_features.py); "vectorizer" uses the original path
+FEATURE_PIPELINE = "fused"
+
+# ============================================================================
+# SUMMARIZATION CONFIGURATION
+# ============================================================================
+# Key phrase source: "model" reuses the prediction model's fitted TF-IDF
+# vectorizer (matrix cached per run; without a loaded predictor only the
+# vectorizer is read from the compact export), "hashing" counts n-grams in
+# fixed memory, "fit" fits a new vectorizer per summary, "auto" = model below
+# KEY_PHRASE_HASHING_MIN_REVIEWS reviews when a predictor is loaded or a
+# compact export exists, hashing otherwise
+KEY_PHRASE_METHOD = "auto"
+KEY_PHRASE_HASHING_MIN_REVIEWS = 100000
+# "overview" = statistics, aspects, themes and sample reviews; "extractive" =
+# the most central review sentences (LexRank), computed within a time budget
+SUMMARY_MODE = "overview"
+EXTRACTIVE_SENTENCES = 5
+EXTRACTIVE_TIME_BUDGET_SECONDS = 5.0
+# Finished summaries keyed by a fingerprint of the analyzed reviews, summarizer
+# version and format (None disables), and whether to compute the summary as
+# soon as prediction finishes (opt-in; runs on one background thread outside
+# the job pool, so it never takes a job worker)
+SUMMARY_CACHE_PATH = "data/summary_cache.sqlite3"
+SUMMARY_CACHE_MAX_ENTRIES = 256
+SUMMARY_PRECOMPUTE = False
+
+# ============================================================================
+# BACKGROUND JOB CONFIGURATION
+# ============================================================================
+# Jobs running at once, extra jobs allowed to wait (beyond that /predict and
+# /summarize answer 429), and how long finished jobs are kept
+JOB_WORKERS = 2
+JOB_QUEUE_DEPTH = 16
+JOB_TTL_SECONDS = 3600
+# SQLite file for job status so it survives restarts and is shared across
+# gunicorn workers (None keeps jobs in memory only)
+JOB_STORE_PATH = None
+# Each analysis gets its own workspace under data/runs/<run_id>/; workspaces
+# with no file written and no job started for this long (and no unfinished
+# job) are deleted when a new analysis starts
+RUN_TTL_SECONDS = 24 * 3600
 
 # ============================================================================
 # FLASK APPLICATION CONFIGURATION
@@ -0,0 +1,91 @@
+"""
+Import-Time Budget Check
+Imports each startup module in a fresh interpreter under `python -X importtime`
+and fails when its cumulative import time exceeds its budget, or when it pulls
+in a heavy dependency that is meant to load on first use only
+
+Usage: python scripts/check_import_time.py [--module app] [--repeat 3] [--scale 1.5]
+Exits with status 1 when any module is over budget
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages that must not be imported while the app boots
+HEAVY_PACKAGES = ("pandas", "numpy", "scipy", "sklearn", "textblob", "reportlab", "fitz", "requests")
+
+# module -> (cumulative import budget in ms, packages it must not import)
+BUDGETS = {
+    "app": (800, HEAVY_PACKAGES),
+    "scripts.predict": (150, HEAVY_PACKAGES),
+    "scripts.summary": (150, HEAVY_PACKAGES),
+    # Imported when a summary is generated; numpy is expected, the rest is not
+    "scripts.custom_summarizer": (500, tuple(p for p in HEAVY_PACKAGES if p != "numpy")),
+}
+
+
+def measure(module):
+    """
+    Import module in a new interpreter (predictor warm-up disabled)
+    Returns (cumulative microseconds, set of imported top-level packages)
+    """
+    code = f"import config; config.PREDICTOR_WARM_UP = False; import {module}"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+
+    cumulative = None
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue  # header line
+        name = fields[2].strip()
+        packages.add(name.split(".")[0])
+        # The module itself is listed at the top level (no indentation)
+        if name == module and fields[2].startswith(" ") and not fields[2].startswith("  "):
+            cumulative = int(fields[1])
+    if cumulative is None:
+        raise RuntimeError(f"{module} not found in -X importtime output")
+    return cumulative, packages
+
+
+def check(modules, repeat=3, scale=1.0):
+    """Print one line per module; returns True when all are within budget"""
+    ok = True
+    for module in modules:
+        budget_ms, forbidden = BUDGETS[module]
+        budget_ms *= scale
+        try:
+            # Best of several runs, so a cold disk cache or a busy machine is not counted
+            runs = [measure(module) for _ in range(repeat)]
+        except RuntimeError as e:
+            print(f"✗ {module}: {e}")
+            ok = False
+            continue
+
+        elapsed_ms = min(cumulative for cumulative, _ in runs) / 1000
+        heavy = sorted(set(forbidden) & set.union(*(packages for _, packages in runs)))
+        passed = elapsed_ms <= budget_ms and not heavy
+        ok &= passed
+        detail = f" (imports {', '.join(heavy)})" if heavy else ""
+        print(f"{'✓' if passed else '✗'} {module}: {elapsed_ms:.1f} ms / {budget_ms:.0f} ms budget{detail}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail when startup imports regress")
+    parser.add_argument("--module", action="append", choices=sorted(BUDGETS),
+                        help="module to check (repeatable; default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per module (the fastest counts)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget, e.g. for slow CI machines")
+    args = parser.parse_args()
+
+    sys.exit(0 if check(args.module or list(BUDGETS), repeat=max(1, args.repeat), scale=args.scale) else 1)
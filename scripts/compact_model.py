@@ -0,0 +1,385 @@
+"""
+Compact Model Format
+Exports only what prediction needs from the complete model package (the best
+model's weights and the vectorizer's vocabulary/idf) as plain .npy arrays that
+are loaded with mmap, so load time is milliseconds and worker processes share
+the pages instead of each unpickling every trained model
+
+Layout of <package>.compact/:
+    meta.json          format version, source package id, model and vectorizer settings
+    terms.npy          vocabulary as sorted utf-8 byte strings (binary-searched)
+    term_columns.npy   feature column of each sorted term
+    idf.npy            idf weights (absent for plain count vectorizers)
+    coef.npy           (classes or 1, features) weights
+    intercept.npy      per-row bias
+
+Usage:
+    python scripts/compact_model.py export [--reviews data/input_reviews.csv]
+    python scripts/compact_model.py check [--reviews data/input_reviews.csv]
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit, softmax
+
+FORMAT_VERSION = 1
+
+# Reviews the parity check falls back to when no review file is available
+SAMPLE_REVIEWS = [
+    "This product is amazing!!! Best purchase ever, totally recommend it to everyone.",
+    "Stopped working after two weeks. The battery life is terrible and support never replied.",
+    "Decent value for the price. Build quality is okay but the cable feels cheap.",
+    "I was skeptical at first but it does exactly what it says. Would buy again?",
+    "Worst. Product. Ever. Do not buy!!!",
+    "Arrived on time, well packaged, works as described.",
+    "",
+]
+
+
+def compact_path_for(model_path):
+    """Compact export directory that mirrors a *.pkl package (e.g. model.compact/)"""
+    return os.path.splitext(model_path)[0] + ".compact"
+
+
+def _preprocessor_name(vectorizer, preprocessors):
+    preprocessor = vectorizer.preprocessor
+    if preprocessor is None:
+        return None
+    name = getattr(preprocessor, '__name__', None)
+    if preprocessors.get(name) is not preprocessor:
+        raise ValueError(f"Vectorizer preprocessor {name!r} is not a known function")
+    return name
+
+
+def _vectorizer_settings(vectorizer, preprocessors):
+    """Settings needed to rebuild the vectorizer's analyzer (no vocabulary)"""
+    if callable(vectorizer.analyzer) or vectorizer.tokenizer is not None:
+        raise ValueError("Vectorizers with a custom analyzer or tokenizer cannot be exported")
+    stop_words = vectorizer.get_stop_words()
+    tfidf = getattr(vectorizer, '_tfidf', None)
+    return {
+        "analyzer": vectorizer.analyzer,
+        "preprocessor": _preprocessor_name(vectorizer, preprocessors),
+        "lowercase": vectorizer.lowercase,
+        "strip_accents": vectorizer.strip_accents,
+        "token_pattern": vectorizer.token_pattern,
+        "stop_words": sorted(stop_words) if stop_words is not None else None,
+        "ngram_range": list(vectorizer.ngram_range),
+        "binary": vectorizer.binary,
+        "dtype": np.dtype(vectorizer.dtype).name,
+        "sublinear_tf": bool(getattr(vectorizer, 'sublinear_tf', False)),
+        "norm": getattr(vectorizer, 'norm', None),
+        "use_idf": tfidf is not None and bool(getattr(vectorizer, 'use_idf', False)),
+    }
+
+
+def _model_weights(model):
+    """(kind, link, coef, intercept) for the linear models the compact format can evaluate"""
+    name = type(model).__name__
+    if name in ("LogisticRegression", "SGDClassifier") and hasattr(model, 'predict_proba'):
+        coef = np.asarray(model.coef_, dtype=np.float64)
+        if coef.shape[0] == 1:
+            link = "sigmoid"
+        elif getattr(model, 'multi_class', 'auto') == "ovr" or getattr(model, 'solver', None) == "liblinear":
+            link = "ovr"
+        else:
+            link = "softmax"
+        return "linear", link, coef, np.asarray(model.intercept_, dtype=np.float64)
+    if name == "MultinomialNB":
+        # Joint log-likelihood is X @ feature_log_prob_.T + class_log_prior_
+        return ("naive_bayes", "softmax", np.asarray(model.feature_log_prob_, dtype=np.float64),
+                np.asarray(model.class_log_prior_, dtype=np.float64))
+    raise ValueError(f"{name} models cannot be exported to the compact format")
+
+
+def export_compact_package(components, output_dir, source_id=None, preprocessors=None):
+    """
+    Write the best model and vectorizer of a complete package to output_dir
+    Raises ValueError for models/vectorizers the compact format cannot reproduce
+    """
+    preprocessors = preprocessors or {}
+    best_model_name = components['best_model_name']
+    model = components['models'][best_model_name]
+    vectorizer = components['vectorizer']
+
+    kind, link, coef, intercept = _model_weights(model)
+    settings = _vectorizer_settings(vectorizer, preprocessors)
+
+    vocabulary = vectorizer.vocabulary_
+    terms = np.array([term.encode('utf-8') for term in vocabulary])
+    columns = np.fromiter(vocabulary.values(), dtype=np.int32, count=len(vocabulary))
+    order = np.argsort(terms, kind='stable')
+
+    partial_dir = output_dir + ".partial"
+    shutil.rmtree(partial_dir, ignore_errors=True)
+    os.makedirs(partial_dir)
+    np.save(os.path.join(partial_dir, "terms.npy"), terms[order])
+    np.save(os.path.join(partial_dir, "term_columns.npy"), columns[order])
+    if settings["use_idf"]:
+        np.save(os.path.join(partial_dir, "idf.npy"), np.asarray(vectorizer.idf_, dtype=np.float64))
+    np.save(os.path.join(partial_dir, "coef.npy"), np.ascontiguousarray(coef))
+    np.save(os.path.join(partial_dir, "intercept.npy"), intercept)
+
+    with open(os.path.join(partial_dir, "meta.json"), 'w') as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            "source_id": source_id,
+            "best_model_name": best_model_name,
+            "model": {"kind": kind, "link": link, "classes": np.asarray(model.classes_).tolist()},
+            "vectorizer": settings,
+            "n_features": len(vocabulary),
+        }, f, indent=2)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(partial_dir, output_dir)
+    return output_dir
+
+
+def counts_matrix(rows, columns, n_documents, n_features, dtype):
+    """csr term counts from (document, feature column) pairs; columns < 0 are skipped"""
+    known = columns >= 0
+    matrix = sp.csr_matrix((np.ones(known.sum(), dtype=dtype), (rows[known], columns[known])),
+                           shape=(n_documents, n_features))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def apply_tfidf(matrix, settings, idf):
+    """The vectorizer's steps after counting (binary, sublinear tf, idf, norm), in place where possible"""
+    if settings["binary"]:
+        matrix.data[:] = 1
+    if settings["sublinear_tf"]:
+        np.log(matrix.data, matrix.data)
+        matrix.data += 1
+    if idf is not None:
+        matrix.data *= idf[matrix.indices]
+    if settings["norm"]:
+        from sklearn.preprocessing import normalize
+        matrix = normalize(matrix, norm=settings["norm"], copy=False)
+    return matrix
+
+
+class CompactVectorizer:
+    """TF-IDF/count transform over a memory-mapped sorted vocabulary"""
+
+    def __init__(self, settings, terms, term_columns, idf, preprocessor=None):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        self.settings = settings
+        self.terms = terms
+        self.term_columns = term_columns
+        self.idf = idf
+        self.n_features = len(terms)
+        self.dtype = np.dtype(settings["dtype"])
+        self.token_pattern = settings["token_pattern"]
+        self._vocabulary = None
+        # Only the analyzer is used; it has no vocabulary, so building it is cheap
+        self._analyze = CountVectorizer(
+            analyzer=settings["analyzer"],
+            preprocessor=preprocessor,
+            lowercase=settings["lowercase"],
+            strip_accents=settings["strip_accents"],
+            token_pattern=settings["token_pattern"],
+            stop_words=settings["stop_words"],
+            ngram_range=tuple(settings["ngram_range"]),
+        ).build_analyzer()
+
+    def lookup(self, tokens):
+        """Feature column of every token (-1 when it is not in the vocabulary)"""
+        if not tokens:
+            return np.zeros(0, dtype=np.int64)
+        keys = np.array([token.encode('utf-8') for token in tokens])
+        positions = np.minimum(np.searchsorted(self.terms, keys), self.n_features - 1)
+        found = self.terms[positions] == keys
+        return np.where(found, self.term_columns[positions], -1)
+
+    def transform(self, raw_documents):
+        """Same matrix as the original vectorizer's transform()"""
+        tokens = []
+        lengths = np.zeros(len(raw_documents), dtype=np.int64)
+        for i, document in enumerate(raw_documents):
+            features = self._analyze(document)
+            tokens.extend(features)
+            lengths[i] = len(features)
+
+        rows = np.repeat(np.arange(len(raw_documents)), lengths)
+        matrix = counts_matrix(rows, self.lookup(tokens), len(raw_documents), self.n_features, self.dtype)
+        return apply_tfidf(matrix, self.settings, self.idf)
+
+    @property
+    def vocabulary_(self):
+        """term -> column dict, like the fitted vectorizer's (built on first use)"""
+        if self._vocabulary is None:
+            self._vocabulary = dict(zip((term.decode('utf-8') for term in self.terms),
+                                        self.term_columns.tolist()))
+        return self._vocabulary
+
+    def get_feature_names_out(self):
+        names = np.empty(self.n_features, dtype=object)
+        names[self.term_columns] = [term.decode('utf-8') for term in self.terms]
+        return names
+
+
+class CompactClassifier:
+    """predict_proba of an exported linear / naive Bayes model"""
+
+    def __init__(self, model_meta, coef, intercept):
+        self.kind = model_meta["kind"]
+        self.link = model_meta["link"]
+        self.classes_ = np.asarray(model_meta["classes"])
+        self.coef = coef
+        self.intercept = intercept
+
+    def decision_function(self, X):
+        return np.asarray(X @ self.coef.T) + self.intercept
+
+    def predict_proba(self, X):
+        scores = self.decision_function(X)
+        if self.link == "sigmoid":
+            positive = expit(scores[:, 0])
+            return np.column_stack([1 - positive, positive])
+        if self.link == "ovr":
+            probabilities = expit(scores)
+            return probabilities / probabilities.sum(axis=1, keepdims=True)
+        return softmax(scores, axis=1)
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def _load_meta(package_dir, source_id=None):
+    with open(os.path.join(package_dir, "meta.json"), 'r') as f:
+        meta = json.load(f)
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact model version in {package_dir}")
+    if source_id is not None and meta.get("source_id") != source_id:
+        raise ValueError(f"Compact model in {package_dir} was exported from a different package")
+    return meta
+
+
+def _load_array(package_dir, name):
+    return np.load(os.path.join(package_dir, name), mmap_mode='r')
+
+
+def _vectorizer_from_meta(package_dir, meta, preprocessors):
+    settings = meta["vectorizer"]
+    preprocessor = None
+    if settings["preprocessor"] is not None:
+        preprocessor = (preprocessors or {}).get(settings["preprocessor"])
+        if preprocessor is None:
+            raise ValueError(f"Unknown vectorizer preprocessor {settings['preprocessor']!r}")
+
+    idf_path = os.path.join(package_dir, "idf.npy")
+    return CompactVectorizer(settings, _load_array(package_dir, "terms.npy"),
+                             _load_array(package_dir, "term_columns.npy"),
+                             _load_array(package_dir, "idf.npy") if os.path.exists(idf_path) else None,
+                             preprocessor)
+
+
+def load_compact_vectorizer(package_dir, preprocessors=None, source_id=None):
+    """Load only the vectorizer of an export (no classifier), e.g. for summarization"""
+    return _vectorizer_from_meta(package_dir, _load_meta(package_dir, source_id), preprocessors)
+
+
+def load_compact_package(package_dir, preprocessors=None, source_id=None):
+    """
+    Load an export as a components dict shaped like the pickled package
+    (best_model_name, models, vectorizer); arrays are memory-mapped
+    When source_id is given the export must have been made from that package
+    """
+    meta = _load_meta(package_dir, source_id)
+    vectorizer = _vectorizer_from_meta(package_dir, meta, preprocessors)
+    model = CompactClassifier(meta["model"], _load_array(package_dir, "coef.npy"),
+                              _load_array(package_dir, "intercept.npy"))
+    return {
+        "best_model_name": meta["best_model_name"],
+        "models": {meta["best_model_name"]: model},
+        "vectorizer": vectorizer,
+        "format": "compact",
+    }
+
+
+def check_parity(components, compact, texts, tolerance=1e-9):
+    """
+    Compare the pickled package and its compact export on texts (already cleaned)
+    Returns a report dict; report["ok"] is False when they disagree
+    """
+    name = components['best_model_name']
+    expected_matrix = components['vectorizer'].transform(texts)
+    actual_matrix = compact['vectorizer'].transform(texts)
+    matrix_diff = abs(expected_matrix - actual_matrix).max() if len(texts) else 0.0
+
+    expected = components['models'][name].predict_proba(expected_matrix)
+    actual = compact['models'][name].predict_proba(actual_matrix)
+    probability_diff = float(np.abs(expected - actual).max()) if len(texts) else 0.0
+    mismatches = int((expected.argmax(axis=1) != actual.argmax(axis=1)).sum())
+
+    return {
+        "reviews": len(texts),
+        "max_matrix_diff": float(matrix_diff),
+        "max_probability_diff": probability_diff,
+        "label_mismatches": mismatches,
+        "ok": matrix_diff <= tolerance and probability_diff <= tolerance and mismatches == 0,
+    }
+
+
+def _sample_texts(reviews_path, sample):
+    if reviews_path and os.path.exists(reviews_path):
+        import pandas as pd
+        return pd.read_csv(reviews_path, nrows=sample)['text'].fillna("").astype(str).tolist()
+    return list(SAMPLE_REVIEWS)
+
+
+def main(argv=None):
+    import argparse
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from scripts.predict import MODEL_PATH, clean_text, load_model_package, PREPROCESSORS
+    from scripts.prediction_cache import model_identifier
+
+    parser = argparse.ArgumentParser(description="Export the model package to the compact format and verify it")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("--model", default=MODEL_PATH, help="complete *_package.pkl to read")
+    parser.add_argument("--output", default=None, help="compact directory (default: next to the package)")
+    parser.add_argument("--reviews", default="data/input_reviews.csv",
+                        help="CSV whose 'text' column is used for the parity check")
+    parser.add_argument("--sample", type=int, default=5000, help="reviews to compare")
+    args = parser.parse_args(argv)
+    output = args.output or compact_path_for(args.model)
+
+    started = time.perf_counter()
+    components = load_model_package(args.model)
+    pickle_seconds = time.perf_counter() - started
+
+    if args.command == "export":
+        export_compact_package(components, output, source_id=model_identifier(args.model),
+                               preprocessors=PREPROCESSORS)
+        print(f"Exported {components['best_model_name']} to {output}")
+
+    started = time.perf_counter()
+    compact = load_compact_package(output, preprocessors=PREPROCESSORS)
+    compact_seconds = time.perf_counter() - started
+    print(f"Load time: pickle {pickle_seconds * 1000:.1f} ms, compact {compact_seconds * 1000:.1f} ms")
+
+    texts = [clean_text(t) for t in _sample_texts(args.reviews, args.sample)]
+    report = check_parity(components, compact, texts)
+    print(f"Parity on {report['reviews']} reviews: max matrix diff {report['max_matrix_diff']:.3g}, "
+          f"max probability diff {report['max_probability_diff']:.3g}, "
+          f"{report['label_mismatches']} label mismatches")
+    if not report["ok"]:
+        if args.command == "export":
+            shutil.rmtree(output, ignore_errors=True)
+            print("✗ Compact model does not match the pickle; export removed")
+        return 1
+    print("✓ Compact model matches the pickle")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,8 @@ Custom Summarization Model for Review Analysis
 Uses extractive and abstractive techniques to generate meaningful summaries
 """
 
-import fitz  # PyMuPDF
-import pandas as pd
+import html
+import importlib.util
 import numpy as np
 from collections import Counter
 import re
@@ -13,24 +13,44 @@ import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from scripts.keyword_matcher import KeywordMatcher
+from scripts.review_store import SENTIMENTS
 
-# Try importing advanced NLP libraries
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.metrics.pairwise import cosine_similarity
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
+# Check for the advanced NLP libraries without importing them; sklearn and the
+# modules built on it are imported by the methods that use them
+SKLEARN_AVAILABLE = importlib.util.find_spec("sklearn") is not None
+if not SKLEARN_AVAILABLE:
     print("⚠️  scikit-learn not available. Using basic summarization.")
 
-try:
-    from textblob import TextBlob
-    TEXTBLOB_AVAILABLE = True
-except ImportError:
-    TEXTBLOB_AVAILABLE = False
+TEXTBLOB_AVAILABLE = importlib.util.find_spec("textblob") is not None
+if not TEXTBLOB_AVAILABLE:
     print("⚠️  TextBlob not available. Using basic sentiment analysis.")
 
 
+# "overview" or "extractive" (see generate_summary), and the extractive mode's
+# sentence count and time limit
+SUMMARY_MODE = getattr(config, "SUMMARY_MODE", "overview")
+EXTRACTIVE_SENTENCES = getattr(config, "EXTRACTIVE_SENTENCES", 5)
+EXTRACTIVE_TIME_BUDGET_SECONDS = getattr(config, "EXTRACTIVE_TIME_BUDGET_SECONDS", 5.0)
+
+# Where key phrases come from: "auto", "model", "hashing" or "fit" (see extract_key_phrases)
+KEY_PHRASE_METHOD = getattr(config, "KEY_PHRASE_METHOD", "auto")
+KEY_PHRASE_HASHING_MIN_REVIEWS = getattr(config, "KEY_PHRASE_HASHING_MIN_REVIEWS", 100000)
+
+# Aspect -> keywords, matched as whole words in a single pass over the reviews
+ASPECTS = {
+    'quality': ['quality', 'durable', 'build', 'material', 'construction', 'sturdy', 'solid', 'well-made'],
+    'price': ['price', 'cost', 'expensive', 'cheap', 'affordable', 'value', 'money', 'worth'],
+    'delivery': ['delivery', 'shipping', 'arrived', 'package', 'delivered', 'received', 'packaging'],
+    'performance': ['performance', 'works', 'working', 'efficient', 'fast', 'slow', 'speed'],
+    'features': ['feature', 'features', 'functionality', 'option', 'options', 'capability'],
+    'design': ['design', 'look', 'looks', 'appearance', 'aesthetic', 'style', 'color'],
+    'customer_service': ['service', 'support', 'customer', 'help', 'helpline', 'response']
+}
+ASPECT_MATCHER = KeywordMatcher(ASPECTS)
+
+
 class CustomSummarizer:
     """
     Custom Review Summarizer using multiple techniques:
@@ -43,21 +63,42 @@ class CustomSummarizer:
     def __init__(self):
         self.reviews_data = None
         self.sentiment_stats = None
+        self.aspect_review_counts = {}
+        self.source_path = None
+        self._review_matrix = None
         
     def load_reviews_from_csv(self, csv_path="data/real_reviews.csv"):
         """Load reviews from CSV file"""
+        import pandas as pd
+        
         try:
             df = pd.read_csv(csv_path)
             self.reviews_data = df
+            self.source_path = csv_path
+            self._review_matrix = None
             print(f"✅ Loaded {len(df)} reviews from {csv_path}")
             return True
         except Exception as e:
             print(f"❌ Error loading reviews: {e}")
             return False
     
+    def load_reviews_from_dataframe(self, df, source_path=None):
+        """
+        Use an in-memory real-review DataFrame (text, rating, sentiment, confidence)
+        source_path is the CSV it mirrors, used to cache derived matrices
+        """
+        if df is None or 'text' not in df.columns:
+            return False
+        self.reviews_data = df
+        self.source_path = source_path
+        self._review_matrix = None
+        print(f"✅ Using {len(df)} reviews handed over from prediction")
+        return True
+    
     def load_reviews_from_pdf(self, pdf_path="data/real_reviews.pdf"):
         """Extract reviews from PDF"""
         try:
+            import fitz  # PyMuPDF
             doc = fitz.open(pdf_path)
             text = "\n".join(page.get_text("text") for page in doc)
             doc.close()
@@ -84,11 +125,48 @@ class CustomSummarizer:
             print(f"❌ Error loading PDF: {e}")
             return []
     
+    def review_matrix(self, reviews):
+        """
+        TF-IDF matrix of the reviews in the prediction model's feature space
+        (built once per summarizer, cached on disk next to the source CSV)
+        """
+        from scripts.review_matrix import get_review_matrix
+        
+        if self._review_matrix is None or self._review_matrix[0].shape[0] != len(reviews):
+            self._review_matrix = get_review_matrix(reviews, self.source_path)
+        return self._review_matrix
+    
     def extract_key_phrases(self, reviews, top_n=10):
-        """Extract key phrases using TF-IDF"""
+        """
+        Extract key phrases using TF-IDF
+        KEY_PHRASE_METHOD picks the matrix: "model" reuses the prediction
+        vectorizer, "hashing" streams n-grams in fixed memory, "fit" fits a
+        vectorizer on the reviews, "auto" uses the model vectorizer below
+        KEY_PHRASE_HASHING_MIN_REVIEWS reviews when it is available without
+        loading the prediction model, hashing otherwise
+        """
         if not SKLEARN_AVAILABLE:
             return self._extract_key_phrases_basic(reviews)
         
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from scripts.review_matrix import top_phrases, hashed_key_phrases, model_vectorizer_available
+        
+        method = KEY_PHRASE_METHOD
+        if method == "auto":
+            use_model = len(reviews) < KEY_PHRASE_HASHING_MIN_REVIEWS and model_vectorizer_available()
+            method = "model" if use_model else "hashing"
+        
+        try:
+            if method == "hashing":
+                return hashed_key_phrases(reviews, top_n=top_n)
+            if method == "model":
+                matrix, feature_names = self.review_matrix(reviews)
+                key_phrases = top_phrases(matrix, feature_names, top_n=top_n)
+                if key_phrases:
+                    return key_phrases
+        except Exception as e:
+            print(f"⚠️  {method} key phrase extraction failed: {e}")
+        
         try:
             # Use TF-IDF to find important words/phrases
             vectorizer = TfidfVectorizer(
@@ -133,24 +211,15 @@ class CustomSummarizer:
         return [word for word, _ in word_freq.most_common(top_n)]
     
     def extract_aspects(self, reviews):
-        """Extract key aspects mentioned in reviews"""
-        aspects = {
-            'quality': ['quality', 'durable', 'build', 'material', 'construction', 'sturdy', 'solid', 'well-made'],
-            'price': ['price', 'cost', 'expensive', 'cheap', 'affordable', 'value', 'money', 'worth'],
-            'delivery': ['delivery', 'shipping', 'arrived', 'package', 'delivered', 'received', 'packaging'],
-            'performance': ['performance', 'works', 'working', 'efficient', 'fast', 'slow', 'speed'],
-            'features': ['feature', 'features', 'functionality', 'option', 'options', 'capability'],
-            'design': ['design', 'look', 'looks', 'appearance', 'aesthetic', 'style', 'color'],
-            'customer_service': ['service', 'support', 'customer', 'help', 'helpline', 'response']
-        }
-        
-        text = " ".join(reviews).lower()
+        """
+        Extract key aspects mentioned in reviews
+        Returns [(aspect, mentions)] sorted by mentions; per-aspect review counts
+        are kept in self.aspect_review_counts
+        """
+        mentions, review_counts = ASPECT_MATCHER.totals(reviews)
+        self.aspect_review_counts = review_counts
         
-        aspect_mentions = {}
-        for aspect_name, keywords in aspects.items():
-            count = sum(text.count(keyword) for keyword in keywords)
-            if count > 0:
-                aspect_mentions[aspect_name] = count
+        aspect_mentions = {aspect: count for aspect, count in mentions.items() if count > 0}
         
         # Sort by frequency
         sorted_aspects = sorted(aspect_mentions.items(), key=lambda x: x[1], reverse=True)
@@ -181,69 +250,113 @@ class CustomSummarizer:
         
         return sentiment_counts, sentiment_percentages
     
+    def _representative_entries(self, rows):
+        """Summary entries for the given row positions, built column-wise"""
+        df = self.reviews_data
+        texts = df['text'].to_numpy()[rows]
+        ratings = df['rating'].to_numpy()[rows] if 'rating' in df.columns else [3] * len(rows)
+        confidences = df['confidence'].to_numpy()[rows] if 'confidence' in df.columns else [0] * len(rows)
+        return [{
+            'text': text[:200] + '...' if len(text) > 200 else text,
+            'rating': int(rating),
+            'confidence': float(confidence)
+        } for text, rating, confidence in zip(map(str, texts), ratings, confidences)]
+    
+    def _sentiment_codes(self):
+        """Index into SENTIMENTS for every review (-1 for anything else)"""
+        import pandas as pd
+        
+        return pd.Categorical(self.reviews_data['sentiment'].astype(str).str.lower(),
+                              categories=SENTIMENTS).codes.astype(np.int64)
+    
     def extract_representative_reviews(self, n=3):
-        """Extract most representative reviews for each sentiment"""
-        if self.reviews_data is None or not SKLEARN_AVAILABLE:
+        """
+        Extract most representative reviews for each sentiment: those closest to
+        the sentiment's TF-IDF centroid, kept diverse with MMR
+        """
+        if self.reviews_data is None or not SKLEARN_AVAILABLE or 'sentiment' not in self.reviews_data.columns:
             return self._extract_representative_basic(n)
         
         try:
-            results = {'positive': [], 'neutral': [], 'negative': []}
-            
-            for sentiment in ['positive', 'neutral', 'negative']:
-                sentiment_reviews = self.reviews_data[
-                    self.reviews_data['sentiment'] == sentiment
-                ]
-                
-                if len(sentiment_reviews) == 0:
-                    continue
-                
-                # Get reviews with highest confidence
-                top_reviews = sentiment_reviews.nlargest(n, 'confidence')
-                
-                for _, row in top_reviews.iterrows():
-                    results[sentiment].append({
-                        'text': row['text'][:200] + '...' if len(row['text']) > 200 else row['text'],
-                        'rating': int(row.get('rating', 3)),
-                        'confidence': float(row.get('confidence', 0))
-                    })
-            
-            return results
+            from scripts.representatives import select_representatives
+            matrix, _ = self.review_matrix(self.reviews_data['text'].tolist())
+            selected = select_representatives(matrix, self._sentiment_codes(), len(SENTIMENTS), n=n)
+            return {sentiment: self._representative_entries(rows)
+                    for sentiment, rows in zip(SENTIMENTS, selected)}
         except Exception as e:
             print(f"⚠️  Representative extraction failed: {e}")
             return self._extract_representative_basic(n)
     
     def _extract_representative_basic(self, n=3):
-        """Basic representative review extraction"""
-        if self.reviews_data is None:
-            return {'positive': [], 'neutral': [], 'negative': []}
+        """Basic representative review extraction: highest-confidence reviews per sentiment"""
+        results = {sentiment: [] for sentiment in SENTIMENTS}
+        if self.reviews_data is None or 'sentiment' not in self.reviews_data.columns:
+            return results
         
-        results = {'positive': [], 'neutral': [], 'negative': []}
+        codes = self._sentiment_codes()
+        if 'confidence' in self.reviews_data.columns:
+            confidence = self.reviews_data['confidence'].fillna(0).to_numpy(dtype=np.float64)
+        else:
+            confidence = np.zeros(len(codes))
         
-        for sentiment in ['positive', 'neutral', 'negative']:
-            sentiment_reviews = self.reviews_data[
-                self.reviews_data['sentiment'] == sentiment
-            ]
-            
-            for _, row in sentiment_reviews.head(n).iterrows():
-                text = row['text']
-                results[sentiment].append({
-                    'text': text[:200] + '...' if len(text) > 200 else text,
-                    'rating': int(row.get('rating', 3)),
-                    'confidence': float(row.get('confidence', 0))
-                })
+        for index, sentiment in enumerate(SENTIMENTS):
+            members = np.flatnonzero(codes == index)
+            if len(members) > n:
+                members = members[np.argpartition(-confidence[members], n)[:n]]
+            members = members[np.argsort(-confidence[members], kind='stable')]
+            results[sentiment] = self._representative_entries(members)
         
         return results
     
-    def generate_summary(self, format='html'):
+    def generate_extractive_summary(self, format='html', n_sentences=EXTRACTIVE_SENTENCES,
+                                    time_budget=EXTRACTIVE_TIME_BUDGET_SECONDS):
+        """
+        Summary made of the review sentences that best represent the whole set
+        (LexRank over an LSH similarity graph, see scripts/extractive.py);
+        returns None when no usable sentences are found
+        """
+        try:
+            from scripts.extractive import extract_key_sentences
+            key_sentences = extract_key_sentences(self.reviews_data['text'].tolist(),
+                                                  n_sentences=n_sentences, time_budget=time_budget)
+        except Exception as e:
+            print(f"⚠️  Extractive summarization failed: {e}")
+            return None
+        if not key_sentences:
+            return None
+        
+        if format == 'html':
+            line_break, bold_start, bold_end, bullet = '<br>', '<strong>', '</strong>', '•'
+            quote = html.escape
+        else:
+            line_break, bold_start, bold_end, bullet = '\n', '**', '**', '-'
+            quote = str
+        
+        summary_parts = [f"{bold_start}What {len(self.reviews_data)} Customers Are Saying{bold_end}{line_break}"]
+        for sentence, _, support in key_sentences:
+            echoed = f" ({support} similar)" if support > 1 else ""
+            summary_parts.append(f"{bullet} {quote(sentence)}{echoed}{line_break}")
+        return "".join(summary_parts).rstrip()
+    
+    def generate_summary(self, format='html', mode=None):
         """
         Generate comprehensive summary
         
         Args:
             format: 'html' for web display (default) or 'text' for console/file
+            mode: 'overview' (statistics, aspects, themes and samples) or
+                  'extractive' (the most central review sentences);
+                  defaults to SUMMARY_MODE
         """
         if self.reviews_data is None:
             return "No reviews data loaded."
         
+        mode = mode or SUMMARY_MODE
+        if mode == 'extractive' and SKLEARN_AVAILABLE:
+            summary = self.generate_extractive_summary(format=format)
+            if summary:
+                return summary
+        
         summary_parts = []
         
         # Choose separator and formatting based on format
@@ -285,7 +398,9 @@ class CustomSummarizer:
         if aspects:
             summary_parts.append(f"{bold_start}Most Discussed Aspects:{bold_end}{line_break}")
             for aspect, count in aspects[:5]:
-                summary_parts.append(f"{bullet} {aspect.replace('_', ' ').title()}: mentioned {count} times{line_break}")
+                in_reviews = self.aspect_review_counts.get(aspect, 0)
+                summary_parts.append(f"{bullet} {aspect.replace('_', ' ').title()}: mentioned {count} times "
+                                     f"in {in_reviews} reviews{line_break}")
             summary_parts.append(double_break.replace(line_break + line_break, '') if format == 'html' else double_break)
         
         # 4. Key phrases
@@ -337,7 +452,8 @@ def main():
     if os.path.exists(csv_path):
         if summarizer.load_reviews_from_csv(csv_path):
             # Generate text format for console display
-            summary = summarizer.generate_summary(format='text')
+            mode = 'extractive' if '--extractive' in sys.argv[1:] else None
+            summary = summarizer.generate_summary(format='text', mode=mode)
             print("\n" + "=" * 70)
             print(summary)
             print("=" * 70)
@@ -356,6 +472,7 @@ def main():
         reviews = summarizer.load_reviews_from_pdf(pdf_path)
         if reviews:
             print("⚠️  Loaded from PDF, using basic summarization")
+            import pandas as pd
             # Create a simple DataFrame
             summarizer.reviews_data = pd.DataFrame({
                 'text': reviews,
@@ -0,0 +1,172 @@
+"""
+Extractive Review Summarization
+Splits reviews into sentences, folds near-identical sentences together and
+ranks the rest with a LexRank-style graph. Similar sentence pairs are found
+with random-hyperplane LSH, so only sentences sharing a bucket are compared
+and no N x N similarity matrix is ever built. A time budget bounds how many
+LSH tables are probed and how long the ranking iterates
+"""
+
+import re
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+|\n+')
+_NORMALIZE_RE = re.compile(r'[^a-z0-9]+')
+
+N_FEATURES = 2 ** 18
+LSH_BITS = 12
+LSH_TABLES = 8
+MAX_BUCKET = 200
+EDGE_THRESHOLD = 0.1      # LexRank similarity threshold for a graph edge
+DUPLICATE_THRESHOLD = 0.9  # sentences this similar are treated as the same sentence
+REDUNDANCY_THRESHOLD = 0.5
+DAMPING = 0.85
+
+
+def split_sentences(texts, min_chars=25, max_chars=300):
+    """Sentences of reviews that are long enough to stand alone in a summary"""
+    sentences = []
+    for text in texts:
+        for sentence in _SENTENCE_SPLIT_RE.split(str(text)):
+            sentence = sentence.strip()
+            if min_chars <= len(sentence) <= max_chars:
+                sentences.append(sentence)
+    return sentences
+
+
+def dedupe_exact(sentences):
+    """Collapse sentences that only differ in case/punctuation; returns (unique sentences, counts)"""
+    index = {}
+    unique = []
+    counts = []
+    for sentence in sentences:
+        key = _NORMALIZE_RE.sub(' ', sentence.lower()).strip()
+        position = index.get(key)
+        if position is None:
+            index[key] = len(unique)
+            unique.append(sentence)
+            counts.append(1)
+        else:
+            counts[position] += 1
+    return unique, np.asarray(counts, dtype=np.float64)
+
+
+def vectorize(sentences):
+    """L2-normalized TF-IDF rows in a fixed hashed feature space (no vocabulary to build)"""
+    hasher = HashingVectorizer(n_features=N_FEATURES, stop_words='english', alternate_sign=False, norm=None)
+    counts = hasher.transform(sentences)
+    return TfidfTransformer().fit_transform(counts).tocsr()
+
+
+def similar_pairs(matrix, threshold, deadline, seed=0):
+    """
+    Pairs (i, j, cosine) with i < j and cosine >= threshold, found by LSH
+    Each table hashes rows by the signs of LSH_BITS random projections; rows
+    sharing a bucket are compared exactly. Stops adding tables at the deadline
+    """
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    found_i, found_j, found_sim = [], [], []
+    powers = 1 << np.arange(LSH_BITS)
+
+    for table in range(LSH_TABLES):
+        if table and time.monotonic() > deadline:
+            break
+        planes = rng.standard_normal((matrix.shape[1], LSH_BITS)).astype(np.float32)
+        signatures = (np.asarray(matrix @ planes) > 0) @ powers
+
+        order = np.argsort(signatures, kind='stable')
+        boundaries = np.flatnonzero(np.diff(signatures[order])) + 1
+        for bucket in np.split(order, boundaries):
+            for start in range(0, len(bucket), MAX_BUCKET):
+                members = bucket[start:start + MAX_BUCKET]
+                if len(members) < 2:
+                    continue
+                block = matrix[members]
+                similarity = (block @ block.T).toarray()
+                rows, cols = np.nonzero(np.triu(similarity >= threshold, k=1))
+                found_i.append(members[rows])
+                found_j.append(members[cols])
+                found_sim.append(similarity[rows, cols])
+
+    if not found_i:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+
+    i = np.concatenate(found_i)
+    j = np.concatenate(found_j)
+    sim = np.concatenate(found_sim)
+    lo, hi = np.minimum(i, j), np.maximum(i, j)
+    _, keep = np.unique(lo * n + hi, return_index=True)
+    return lo[keep], hi[keep], sim[keep]
+
+
+def lexrank(n, i, j, sim, prior, deadline, tol=1e-6, max_iter=100):
+    """
+    Stationary scores of the similarity graph (power iteration)
+    prior is the teleport distribution, so sentences many reviewers repeat rank higher
+    """
+    weights = sp.coo_matrix((np.concatenate([sim, sim]), (np.concatenate([i, j]), np.concatenate([j, i]))),
+                            shape=(n, n)).tocsr()
+    out_degree = np.asarray(weights.sum(axis=1)).ravel()
+    dangling = out_degree == 0
+    transition = sp.diags(np.divide(1.0, out_degree, out=np.zeros(n), where=~dangling)) @ weights
+    transition_t = transition.T.tocsr()
+
+    prior = prior / prior.sum()
+    scores = prior.copy()
+    for _ in range(max_iter):
+        updated = DAMPING * (transition_t @ scores + scores[dangling].sum() * prior) + (1 - DAMPING) * prior
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged or time.monotonic() > deadline:
+            break
+    return scores
+
+
+def extract_key_sentences(texts, n_sentences=5, time_budget=5.0):
+    """
+    Top-ranked, mutually non-redundant review sentences
+    Returns [(sentence, score, number of review sentences it stands for)]
+    """
+    deadline = time.monotonic() + time_budget
+    sentences, counts = dedupe_exact(split_sentences(texts))
+    if not sentences:
+        return []
+
+    matrix = vectorize(sentences)
+    i, j, sim = similar_pairs(matrix, EDGE_THRESHOLD, deadline)
+
+    # Fold near-duplicates into their first occurrence and merge their counts
+    duplicate = sim >= DUPLICATE_THRESHOLD
+    n = len(sentences)
+    _, labels = connected_components(sp.coo_matrix((np.ones(duplicate.sum()), (i[duplicate], j[duplicate])),
+                                                   shape=(n, n)), directed=False)
+    representatives = np.full(labels.max() + 1, n, dtype=np.int64)
+    np.minimum.at(representatives, labels, np.arange(n))
+    support = np.bincount(labels, weights=counts)
+
+    # Graph over representatives only
+    keep = ~duplicate
+    ri, rj = labels[i[keep]], labels[j[keep]]
+    distinct = ri != rj
+    scores = lexrank(len(representatives), ri[distinct], rj[distinct], sim[keep][distinct], support, deadline)
+
+    selected = []
+    chosen_rows = []
+    for label in np.argsort(scores)[::-1]:
+        if len(selected) >= n_sentences:
+            break
+        row = representatives[label]
+        if chosen_rows:
+            overlap = (matrix[chosen_rows] @ matrix[row].T).toarray().max()
+            if overlap >= REDUNDANCY_THRESHOLD:
+                continue
+        chosen_rows.append(row)
+        selected.append((sentences[row], float(scores[label]), int(support[label])))
+    return selected
@@ -0,0 +1,83 @@
+"""
+Fake Ollama Server
+Minimal stand-in for Ollama's /api/generate for exercising the map-reduce
+summarizer and /summarize_stream without a model: every prompt is answered
+with a short deterministic summary streamed word by word as NDJSON
+
+Usage: python scripts/fake_ollama.py [--port 11435] [--delay 0.02]
+then set OLLAMA_URL = "http://localhost:11435/api/generate" in config.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.0
+    requests_served = 0
+    _counter_lock = threading.Lock()
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_error(400, "invalid JSON")
+            return
+
+        with self._counter_lock:
+            FakeOllamaHandler.requests_served += 1
+            number = FakeOllamaHandler.requests_served
+
+        prompt = body.get("prompt", "")
+        reviews = prompt.count("Text:")
+        words = (f"Summary {number} of {reviews} reviews ({len(prompt)} prompt chars): "
+                 f"customers mention both pros and cons.").split(" ")
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        for i, word in enumerate(words):
+            token = word if i == 0 else " " + word
+            self._write_chunk({"model": body.get("model"), "response": token, "done": False})
+            if self.token_delay:
+                time.sleep(self.token_delay)
+        self._write_chunk({"model": body.get("model"), "response": "", "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, message):
+        data = (json.dumps(message) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=11435, delay=0.0):
+    """Start the fake server in a background thread; returns the server (call shutdown() to stop)"""
+    FakeOllamaHandler.token_delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake Ollama /api/generate endpoint")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--delay", type=float, default=0.02, help="seconds between streamed tokens")
+    args = parser.parse_args()
+
+    FakeOllamaHandler.token_delay = args.delay
+    print(f"Fake Ollama listening on http://127.0.0.1:{args.port}/api/generate")
+    ThreadingHTTPServer(("127.0.0.1", args.port), FakeOllamaHandler).serve_forever()
@@ -0,0 +1,219 @@
+"""
+Fake Oxylabs Server
+Minimal stand-in for the Oxylabs realtime API (POST /v1/queries) for exercising
+ScrapeClient and fetch_review_pages without credentials or network access:
+every review page is answered with deterministic reviews (JSON-LD HTML for the
+universal source, parsed reviews for amazon_reviews), after a configurable
+latency and a configurable number of 429/5xx failures per page
+
+Usage: python scripts/fake_oxylabs.py [--port 8011] [--latency 0.2] [--fail-first 1]
+then set OXYLABS_API_URL = "http://localhost:8011/v1/queries" in config.py,
+or run the self-check against ScrapeClient: python scripts/fake_oxylabs.py --check
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+
+class FakeOxylabsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = 5
+    reviews_per_page = 4
+    latency = 0.0
+    # Each distinct page fails this many times before it is served, cycling
+    # through failure_statuses, so clients have to retry with backoff
+    fail_first = 0
+    failure_statuses = (429, 503)
+
+    _lock = threading.Lock()
+    attempts = {}
+    arrivals = []
+    in_flight = 0
+    max_in_flight = 0
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls.attempts = {}
+            cls.arrivals = []
+            cls.in_flight = 0
+            cls.max_in_flight = 0
+
+    def do_POST(self):
+        if self.path != "/v1/queries":
+            self.send_error(404)
+            return
+        if not self.headers.get("Authorization"):
+            self._send_json(401, {"message": "Unauthorized"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"message": "invalid JSON"})
+            return
+
+        source = payload.get("source")
+        target = payload.get("url") or payload.get("query") or ""
+        if source == "amazon_reviews":
+            page = int(payload.get("start_page", 1))
+        else:
+            page = int(dict(parse_qsl(urlparse(target).query)).get("page", 1))
+
+        cls = FakeOxylabsHandler
+        with cls._lock:
+            key = (source, urlparse(target).path, page)
+            attempt = cls.attempts.get(key, 0)
+            cls.attempts[key] = attempt + 1
+            cls.arrivals.append((time.monotonic(), urlparse(target).netloc.lower() or target))
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if attempt < self.fail_first:
+                status = self.failure_statuses[attempt % len(self.failure_statuses)]
+                self._send_json(status, {"message": f"Simulated failure {attempt + 1} for page {page}"})
+                return
+
+            reviews = page_reviews(page, self.pages, self.reviews_per_page)
+            if source == "amazon_reviews":
+                content = {"reviews": [{"title": f"Review {page}-{i}", "content": text, "rating": rating}
+                                       for i, (text, rating) in enumerate(reviews)]}
+            else:
+                content = page_html(reviews)
+            self._send_json(200, {"results": [{"content": content, "status_code": 200, "page": page}]})
+        finally:
+            with cls._lock:
+                cls.in_flight -= 1
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def page_reviews(page, pages, per_page):
+    """Deterministic (text, rating) reviews of a page (none past the last page)"""
+    if page > pages:
+        return []
+    return [(f"Review {i + 1} on page {page}: sturdy build, fast delivery, would buy again.", 1 + (page + i) % 5)
+            for i in range(per_page)]
+
+
+def page_html(reviews):
+    """Product page carrying its reviews as JSON-LD"""
+    data = {
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "name": "Stub product",
+        "review": [{"@type": "Review", "reviewBody": text, "reviewRating": {"ratingValue": rating}}
+                   for text, rating in reviews],
+    }
+    return (f'<html><head><script type="application/ld+json">{json.dumps(data)}</script></head>'
+            f'<body><h1>Stub product</h1></body></html>')
+
+
+def serve(port=8011, pages=5, reviews_per_page=4, latency=0.0, fail_first=0):
+    """Start the fake server in a background thread; returns the server (call shutdown() to stop)"""
+    FakeOxylabsHandler.pages = pages
+    FakeOxylabsHandler.reviews_per_page = reviews_per_page
+    FakeOxylabsHandler.latency = latency
+    FakeOxylabsHandler.fail_first = fail_first
+    FakeOxylabsHandler.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOxylabsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check(port=8011):
+    """
+    Point ScrapeClient at the fake server and verify pagination, retries with
+    backoff, giving up after max_retries, per-host rate limiting and concurrency
+    Prints one line per check; returns True when all pass
+    """
+    from scripts.scraper import ScrapeClient, fetch_review_pages
+
+    pages, per_page, max_retries, min_interval = 5, 4, 2, 0.1
+    product_url = "https://www.example.com/product/123"
+    api_url = f"http://127.0.0.1:{port}/v1/queries"
+    server = serve(port, pages=pages, reviews_per_page=per_page, latency=0.3, fail_first=1)
+    results = []
+    try:
+        client = ScrapeClient(api_url=api_url, auth=("stub", "stub"), concurrency=4, max_retries=max_retries,
+                              backoff_seconds=0.05, min_interval=min_interval, timeout=10)
+        with contextlib.redirect_stdout(io.StringIO()):
+            reviews, _ = fetch_review_pages(product_url, max_pages=pages, client=client)
+        client.close()
+
+        handler = FakeOxylabsHandler
+        results.append(("every page parsed", len(reviews) == pages * per_page,
+                        f"{len(reviews)} reviews, expected {pages * per_page}"))
+        results.append(("429/5xx retried", sorted(handler.attempts.values()) == [2] * pages,
+                        f"attempts per page {sorted(handler.attempts.values())}"))
+        times = sorted(t for t, _ in handler.arrivals)
+        gap = min((b - a for a, b in zip(times, times[1:])), default=min_interval)
+        results.append(("rate limit respected", gap >= min_interval * 0.9,
+                        f"closest requests {gap * 1000:.0f} ms apart, limit {min_interval * 1000:.0f} ms"))
+        results.append(("pages fetched concurrently", handler.max_in_flight > 1,
+                        f"{handler.max_in_flight} requests in flight at most"))
+
+        # Failing more often than max_retries allows: every page is given up on
+        FakeOxylabsHandler.fail_first = max_retries + 1
+        FakeOxylabsHandler.latency = 0.0
+        FakeOxylabsHandler.reset()
+        client = ScrapeClient(api_url=api_url, auth=("stub", "stub"), concurrency=4, max_retries=max_retries,
+                              backoff_seconds=0.05, min_interval=0.0, timeout=10)
+        with contextlib.redirect_stdout(io.StringIO()):
+            reviews, _ = fetch_review_pages(product_url, max_pages=pages, client=client)
+        client.close()
+        attempts = sorted(handler.attempts.values())
+        results.append(("gives up after max_retries", not reviews and attempts == [max_retries + 1] * pages,
+                        f"{len(reviews)} reviews, attempts per page {attempts}"))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    for name, passed, detail in results:
+        print(f"{'✓' if passed else '✗'} {name}: {detail}")
+    return all(passed for _, passed, _ in results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake Oxylabs /v1/queries endpoint")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--pages", type=int, default=5, help="review pages per product")
+    parser.add_argument("--reviews-per-page", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each response")
+    parser.add_argument("--fail-first", type=int, default=1,
+                        help="429/503 responses to send for each page before serving it")
+    parser.add_argument("--check", action="store_true",
+                        help="run ScrapeClient against the fake server and exit with its result")
+    args = parser.parse_args()
+
+    if args.check:
+        # Add parent directory to path to import scripts.scraper
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        sys.exit(0 if check(args.port) else 1)
+
+    FakeOxylabsHandler.pages = args.pages
+    FakeOxylabsHandler.reviews_per_page = args.reviews_per_page
+    FakeOxylabsHandler.latency = args.latency
+    FakeOxylabsHandler.fail_first = args.fail_first
+    print(f"Fake Oxylabs listening on http://127.0.0.1:{args.port}/v1/queries")
+    ThreadingHTTPServer(("127.0.0.1", args.port), FakeOxylabsHandler).serve_forever()
@@ -0,0 +1,237 @@
+"""
+Fused Text Features
+Builds the trained model's feature matrix for a batch of reviews in a few
+whole-batch passes instead of per-review regex work: one str.translate does
+clean_text's lowercasing and character filtering for the entire batch,
+str.split tokenizes it, and every token (and n-gram) is mapped to its model
+column by a single C-level dict lookup, the exact-match counterpart of a
+HashingVectorizer's hash-to-column step (compact model packages are searched
+in their memory-mapped sorted vocabulary instead, so it stays shared)
+
+Benchmark and parity check against clean_text + vectorizer.transform:
+    python scripts/fused_features.py [--reviews data/input_reviews.csv] [--n 100000]
+"""
+
+import itertools
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path to import scripts.* when run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scripts.compact_model import CompactVectorizer, _vectorizer_settings, apply_tfidf, counts_matrix
+
+# Token patterns that, on clean_text output (only a-z, whitespace and !?.),
+# match exactly the runs of two or more letters
+WORD_TOKEN_PATTERNS = (r"(?u)\b\w\w+\b", r"\b\w\w+\b")
+
+# Joins a batch into one string; clean_text removes it, so it never occurs in cleaned text
+_SEPARATOR = "\x00"
+_SEPARATOR_ID = -2
+_EXCLAMATIONS_RE = re.compile(r'!+')
+# !?. survive clean_text but only separate tokens
+_PUNCTUATION_TO_SPACE = str.maketrans("!?.", "   ")
+
+
+class _CleanTable(dict):
+    """
+    str.translate table doing clean_text's lower() and [^a-zA-Z\\s!?.] removal
+    in one pass; each code point's entry is computed the first time it is seen
+    """
+
+    def __init__(self):
+        super().__init__()
+        self[ord(_SEPARATOR)] = _SEPARATOR
+
+    def __missing__(self, code):
+        kept = "".join(char for char in chr(code).lower()
+                       if 'a' <= char <= 'z' or char.isspace() or char in "!?.")
+        value = kept or None
+        self[code] = value
+        return value
+
+
+_CLEAN_TABLE = _CleanTable()
+
+
+def clean_texts(texts):
+    """clean_text() for a batch: identical output, one translate over the whole batch"""
+    texts = [str(text) for text in texts]
+    if not texts:
+        return []
+    joined = _SEPARATOR.join(texts)
+    if joined.count(_SEPARATOR) != len(texts) - 1:
+        joined = _SEPARATOR.join(text.replace(_SEPARATOR, "") for text in texts)
+
+    cleaned = []
+    for document in joined.translate(_CLEAN_TABLE).split(_SEPARATOR):
+        # str.split() splits on exactly the characters \s matches, and strips
+        document = " ".join(document.split())
+        if "!!" in document:
+            document = _EXCLAMATIONS_RE.sub("!", document)
+        cleaned.append(document)
+    return cleaned
+
+
+class FusedFeaturizer:
+    """
+    Drop-in for vectorizer.transform() on clean_text output, for word
+    vectorizers using the default token pattern
+    vocabulary is a term -> column dict, or a CompactVectorizer whose
+    memory-mapped terms are searched in place
+    """
+
+    def __init__(self, vocabulary, settings, idf=None):
+        if settings["analyzer"] != "word" or settings["token_pattern"] not in WORD_TOKEN_PATTERNS:
+            raise ValueError("Only word analyzers with the default token pattern can be fused")
+        if settings["preprocessor"] not in (None, "clean_text"):
+            raise ValueError(f"Unsupported vectorizer preprocessor {settings['preprocessor']!r}")
+
+        self.settings = settings
+        self.idf = idf
+        self.dtype = np.dtype(settings["dtype"])
+        self.min_n, self.max_n = settings["ngram_range"]
+        self.stop_words = frozenset(settings["stop_words"] or ())
+        if isinstance(vocabulary, CompactVectorizer):
+            # A dict copy of the vocabulary in every process would undo the mmap sharing
+            self.n_features = vocabulary.n_features
+            self.lookup = None
+            self._search = vocabulary.lookup
+        else:
+            self.n_features = len(vocabulary)
+            self.lookup = dict(vocabulary)
+            self.lookup[_SEPARATOR] = _SEPARATOR_ID
+            self._search = None
+
+    def _columns(self, features, count):
+        if self._search is None:
+            return np.fromiter(map(self.lookup.get, features, itertools.repeat(-1)), dtype=np.int64, count=count)
+        features = list(features)
+        columns = np.asarray(self._search(features), dtype=np.int64)
+        columns[[i for i, feature in enumerate(features) if feature == _SEPARATOR]] = _SEPARATOR_ID
+        return columns
+
+    def transform(self, cleaned):
+        """TF-IDF matrix of texts already passed through clean_text/clean_texts"""
+        n_documents = len(cleaned)
+        if not n_documents:
+            return counts_matrix(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64),
+                                 0, self.n_features, self.dtype)
+
+        tokens = f" {_SEPARATOR} ".join(cleaned).translate(_PUNCTUATION_TO_SPACE).split()
+        if self.max_n > 1:
+            # n-grams are formed after single letters and stop words are dropped
+            tokens = [token for token in tokens
+                      if (len(token) > 1 and token not in self.stop_words) or token == _SEPARATOR]
+
+        unigrams = self._columns(tokens, len(tokens))
+        documents = np.cumsum(unigrams == _SEPARATOR_ID)
+
+        rows, columns = [], []
+        if self.min_n <= 1:
+            rows.append(documents)
+            columns.append(unigrams)
+        for n in range(max(self.min_n, 2), self.max_n + 1):
+            count = max(0, len(tokens) - n + 1)
+            # n-grams spanning two documents contain the separator, so they never match
+            grams = map(" ".join, zip(*(tokens[k:] for k in range(n))))
+            rows.append(documents[:count])
+            columns.append(self._columns(grams, count))
+
+        matrix = counts_matrix(np.concatenate(rows), np.concatenate(columns),
+                               n_documents, self.n_features, self.dtype)
+        return apply_tfidf(matrix, self.settings, self.idf)
+
+
+def featurizer_for(vectorizer, preprocessors):
+    """FusedFeaturizer equivalent to a fitted or compact vectorizer (ValueError if it cannot be fused)"""
+    if isinstance(vectorizer, CompactVectorizer):
+        return FusedFeaturizer(vectorizer, vectorizer.settings, vectorizer.idf)
+    settings = _vectorizer_settings(vectorizer, preprocessors)
+    idf = np.asarray(vectorizer.idf_) if settings["use_idf"] else None
+    return FusedFeaturizer(vectorizer.vocabulary_, settings, idf)
+
+
+def _synthetic_reviews(n, seed=0):
+    """Reviews with mixed case, punctuation runs, digits and non-ASCII characters"""
+    rng = np.random.default_rng(seed)
+    words = ("great quality product love it works perfectly battery life terrible broke after "
+             "two weeks price value shipping fast slow packaging customer service helpful amazing "
+             "worst purchase ever recommend would buy again cheap material sturdy design").split()
+    extras = ["!!!", "?", ".", ",", " 5/5", " :)", " café", " naïve", " İstanbul", "\n", "  ", " 10x"]
+    reviews = []
+    for _ in range(n):
+        length = int(rng.integers(5, 80))
+        tokens = [str(words[i]).upper() if rng.random() < 0.05 else str(words[i])
+                  for i in rng.integers(0, len(words), length)]
+        for position in rng.integers(0, length, max(1, length // 8)):
+            tokens[position] += extras[int(rng.integers(0, len(extras)))]
+        reviews.append(" ".join(tokens))
+    return reviews
+
+
+def benchmark(texts, vectorizer, featurizer, clean_text):
+    """Time clean_text + vectorizer.transform against the fused path and compare their output"""
+    clean_texts(texts[:1000])  # fill the translate table before timing
+
+    started = time.perf_counter()
+    cleaned = [clean_text(text) for text in texts]
+    cleaned_at = time.perf_counter()
+    expected = vectorizer.transform(cleaned)
+    baseline = (cleaned_at - started, time.perf_counter() - cleaned_at)
+
+    started = time.perf_counter()
+    fused_cleaned = clean_texts(texts)
+    cleaned_at = time.perf_counter()
+    actual = featurizer.transform(fused_cleaned)
+    fused = (cleaned_at - started, time.perf_counter() - cleaned_at)
+
+    return {
+        "reviews": len(texts),
+        "baseline_seconds": baseline,
+        "fused_seconds": fused,
+        "cleaned_mismatches": sum(a != b for a, b in zip(cleaned, fused_cleaned)),
+        "max_matrix_diff": float(abs(expected - actual).max()) if len(texts) else 0.0,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    from scripts.predict import PREPROCESSORS, clean_text, get_model_components
+
+    parser = argparse.ArgumentParser(description="Benchmark the fused feature pipeline against clean_text + vectorizer")
+    parser.add_argument("--reviews", default="data/input_reviews.csv",
+                        help="CSV whose 'text' column is cycled up to --n reviews (synthetic reviews if missing)")
+    parser.add_argument("--n", type=int, default=100000, help="number of reviews")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.reviews):
+        import pandas as pd
+        base = pd.read_csv(args.reviews)['text'].fillna("").astype(str).tolist()
+        texts = list(itertools.islice(itertools.cycle(base), args.n)) if base else _synthetic_reviews(args.n)
+    else:
+        texts = _synthetic_reviews(args.n)
+
+    vectorizer = get_model_components()['vectorizer']
+    started = time.perf_counter()
+    featurizer = featurizer_for(vectorizer, PREPROCESSORS)
+    print(f"Fused featurizer built in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    report = benchmark(texts, vectorizer, featurizer, clean_text)
+    for label, (clean_seconds, transform_seconds) in (("clean_text + transform", report["baseline_seconds"]),
+                                                      ("fused", report["fused_seconds"])):
+        print(f"{label:>24}: clean {clean_seconds:.2f}s + features {transform_seconds:.2f}s "
+              f"= {clean_seconds + transform_seconds:.2f}s")
+    speedup = sum(report["baseline_seconds"]) / max(sum(report["fused_seconds"]), 1e-9)
+    print(f"{report['reviews']} reviews: {speedup:.1f}x faster, "
+          f"{report['cleaned_mismatches']} cleaned-text mismatches, "
+          f"max matrix diff {report['max_matrix_diff']:.3g}")
+    return 0 if report["cleaned_mismatches"] == 0 and report["max_matrix_diff"] <= 1e-9 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
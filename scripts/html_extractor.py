@@ -0,0 +1,238 @@
+"""
+Single-Pass HTML Review Extractor
+lxml-based replacement for the BeautifulSoup element-pattern fallback in scraper.py:
+candidate review containers for every site profile are classified in one
+traversal with precompiled matchers, then each container is scanned once for
+its rating and review text
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+
+from lxml import html as lxml_html
+
+# Site profiles: (tags, attribute, pattern) - pattern None means "attribute present".
+# A rule can also require a second (attribute, pattern) condition.
+SITE_PROFILES = {
+    'google': [
+        (('div', 'span'), 'class', re.compile(r'review.*text|MyEned|wiI7pd', re.I), None),
+        (('span',), 'data-review-id', None, None),
+        (('div',), 'jsname', None, ('class', re.compile(r'review', re.I))),
+    ],
+    'amazon': [
+        (('div',), 'data-hook', re.compile(r'^review$'), None),
+        (('div',), 'class', re.compile(r'review.*card|customer.*review', re.I), None),
+    ],
+    'flipkart': [
+        (('div',), 'class', re.compile(r'review.*container|ReviewText', re.I), None),
+    ],
+    'generic': [
+        (('div', 'article'), 'class', re.compile(r'review|comment', re.I), None),
+    ],
+}
+
+# Index rules by tag so the traversal only checks rules that can apply
+_RULES_BY_TAG = {}
+for _profile, _rules in SITE_PROFILES.items():
+    for _tags, _attr, _pattern, _extra in _rules:
+        for _tag in _tags:
+            _RULES_BY_TAG.setdefault(_tag, []).append((_profile, _attr, _pattern, _extra))
+
+_HOOK_RATING_RE = re.compile(r'star.*rating', re.I)
+_TEXT_RATING_RE = re.compile(r'([1-5])\s*out of|([1-5])\.0\s*out|([1-5])\s*★|([1-5])\s*star', re.I)
+_ATTR_RATING_RE = re.compile(r'star[_-]?([1-5])|([1-5])\s*out\s*of\s*5|rating[_-]?([1-5])', re.I)
+_DIGIT_RE = re.compile(r'([1-5])')
+_HOOK_TEXT_RE = re.compile(r'review.*body|review.*text', re.I)
+_CLASS_TEXT_RE = re.compile(r'text|body|content|comment', re.I)
+_WHITESPACE_RE = re.compile(r'\s+')
+_BOILERPLATE_RE = re.compile(r'(Helpful|Report|Verified Purchase|Read more|See more).*$', re.I)
+_SKIP_TEXT_TAGS = {'button', 'a', 'nav', 'script', 'style'}
+
+
+def _matches(element, attr, pattern, extra):
+    value = element.get(attr)
+    if value is None or (pattern is not None and not pattern.search(value)):
+        return False
+    if extra is not None:
+        extra_value = element.get(extra[0])
+        return extra_value is not None and bool(extra[1].search(extra_value))
+    return True
+
+
+def find_review_containers(root):
+    """One traversal of the tree; returns (containers in document order, matches per profile)"""
+    containers = []
+    counts = {profile: 0 for profile in SITE_PROFILES}
+
+    for element in root.iter(*_RULES_BY_TAG.keys()):
+        matched = False
+        for profile, attr, pattern, extra in _RULES_BY_TAG[element.tag]:
+            if _matches(element, attr, pattern, extra):
+                counts[profile] += 1
+                matched = True
+        if matched:
+            containers.append(element)
+    return containers, counts
+
+
+def _visible_text(element):
+    """Text of an element, skipping navigation/button/link subtrees"""
+    parts = [element.text or ""]
+    for child in element:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            parts.append(_visible_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _scan_container(container):
+    """Single pass over a container's descendants collecting rating and text candidates"""
+    hook_rating = text_rating = attr_rating = None
+    hook_text = class_text = None
+
+    match = _TEXT_RATING_RE.search(container.text or "")
+    if match:
+        text_rating = match.group(0)
+
+    for element in container.iterdescendants():
+        tag = element.tag
+        if not isinstance(tag, str):
+            continue
+
+        hook = element.get('data-hook')
+        css = element.get('class')
+
+        if hook_rating is None and hook and tag in ('span', 'i') and _HOOK_RATING_RE.search(hook):
+            hook_rating = element.text_content() or (css.split()[0] if css else '')
+        if text_rating is None:
+            for chunk in (element.text, element.tail):
+                if chunk:
+                    match = _TEXT_RATING_RE.search(chunk)
+                    if match:
+                        text_rating = match.group(0)
+                        break
+        if attr_rating is None and css and tag in ('div', 'span', 'i'):
+            match = _ATTR_RATING_RE.search(css + ' ' + element.get('title', ''))
+            if match:
+                attr_rating = next((g for g in match.groups() if g), None)
+        if hook_text is None and hook and tag in ('span', 'div') and _HOOK_TEXT_RE.search(hook):
+            hook_text = element
+        if class_text is None and css and tag in ('p', 'div', 'span') and _CLASS_TEXT_RE.search(css):
+            class_text = element
+
+    rating = 3  # Default
+    for candidate in (hook_rating, text_rating, attr_rating):
+        match = _DIGIT_RE.search(str(candidate)) if candidate else None
+        if match:
+            rating = int(match.group(1))
+            break
+
+    text_element = hook_text if hook_text is not None else class_text
+    raw_text = text_element.text_content() if text_element is not None else _visible_text(container)
+    return rating, raw_text
+
+
+def extract_reviews_lxml(html_content, limit=30):
+    """Reviews from rendered HTML using the precompiled site profiles"""
+    review_list = []
+    if not html_content or not html_content.strip():
+        return review_list
+
+    root = lxml_html.fromstring(html_content)
+    containers, counts = find_review_containers(root)
+
+    for profile, count in counts.items():
+        print(f"🔎 Found {count} {profile.title()}-style reviews")
+    print(f"🔎 Total unique containers: {len(containers)}")
+
+    for container in containers:
+        if len(review_list) >= limit:
+            break
+        rating, review_text = _scan_container(container)
+
+        # Clean up the text and drop common non-review text patterns
+        review_text = _WHITESPACE_RE.sub(' ', review_text.strip())
+        review_text = _BOILERPLATE_RE.sub('', review_text)
+        review_text = review_text[:500]  # Limit length
+
+        if len(review_text) > 20:  # Only substantial reviews
+            review_list.append({"text": review_text, "rating": rating})
+            print(f"  ✓ Extracted review (rating: {rating}, length: {len(review_text)})")
+
+    return review_list
+
+
+def benchmark(html_paths, repeat=5, limit=30):
+    """Time the BeautifulSoup element-pattern path against the lxml extractor"""
+    import contextlib
+    import io
+    from bs4 import BeautifulSoup
+    from scripts.scraper import extract_reviews_from_soup
+
+    results = []
+    for path in html_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+
+        timings = {}
+        counts = {}
+        for name, extract in (
+            ('beautifulsoup', lambda: extract_reviews_from_soup(BeautifulSoup(html_content, 'html.parser'), limit)),
+            ('lxml', lambda: extract_reviews_lxml(html_content, limit)),
+        ):
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    reviews = extract()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+            counts[name] = len(reviews)
+
+        results.append((path, len(html_content), timings, counts))
+        speedup = timings['beautifulsoup'] / timings['lxml'] if timings['lxml'] else float('inf')
+        print(f"{path} ({len(html_content)} chars)")
+        print(f"  beautifulsoup: {timings['beautifulsoup'] * 1000:8.1f} ms  ({counts['beautifulsoup']} reviews)")
+        print(f"  lxml:          {timings['lxml'] * 1000:8.1f} ms  ({counts['lxml']} reviews)")
+        print(f"  speedup:       {speedup:8.1f}x")
+    return results
+
+
+def scraped_pages(run_ids=None):
+    """Saved scraped pages of the given runs, or of every run workspace (and data/) when None"""
+    from scripts.workspace import ARTIFACTS, RUNS_DIR, run_paths
+
+    if run_ids:
+        return [run_paths(run_id)['scraped_html'] for run_id in run_ids]
+    pattern = os.path.join(RUNS_DIR, "*", ARTIFACTS['scraped_html'])
+    return sorted(glob.glob(pattern), key=os.path.getmtime, reverse=True) + \
+        [p for p in [run_paths()['scraped_html']] if os.path.exists(p)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    # Add parent directory to path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    parser = argparse.ArgumentParser(description="Benchmark BeautifulSoup vs lxml review extraction")
+    parser.add_argument("paths", nargs="*", help="HTML files (default: the scraped page of every run)")
+    parser.add_argument("--run-id", action="append", help="benchmark this run's scraped page (repeatable)")
+    args = parser.parse_args()
+
+    try:
+        paths = args.paths or scraped_pages(args.run_id)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    if not paths:
+        print("❌ No scraped pages found under data/runs/; scrape a product first or pass HTML files")
+        sys.exit(1)
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"❌ HTML fixture(s) not found: {', '.join(missing)}")
+        sys.exit(1)
+    benchmark(paths)
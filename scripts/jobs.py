@@ -0,0 +1,264 @@
+"""
+Background Job Subsystem
+Bounded worker pool + job store with TTL eviction and optional SQLite
+persistence (so job status survives restarts and is shared across workers;
+jobs whose process died are failed once their heartbeat stops).
+Every change bumps the job's version and wakes waiters, so status can be
+pushed to clients instead of polled
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+FINISHED_STATUSES = ("completed", "failed")
+
+# With SQLite persistence another process may update a job without notifying
+# this one, so waiters re-read the database at least this often
+SHARED_WAIT_INTERVAL = 1.0
+
+# With SQLite persistence each process refreshes the jobs it owns this often;
+# an unfinished job not refreshed for ORPHANED_AFTER seconds lost its process
+# (e.g. to a restart) and is reported as failed instead of waiting forever
+HEARTBEAT_INTERVAL = 10.0
+ORPHANED_AFTER = 3 * HEARTBEAT_INTERVAL
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity (maps to HTTP 429)"""
+
+
+class JobStore:
+    """
+    Job records keyed by job_id
+    In-memory by default; when db_path is set every change is written to SQLite
+    and reads go to the database so all processes see the same state
+    """
+
+    def __init__(self, ttl_seconds=3600, db_path=None):
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._conn = None
+
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, data TEXT, status TEXT, updated_at REAL)"
+            )
+            self._conn.commit()
+
+    def create(self, kind, message, run_id=None):
+        job_id = str(uuid.uuid4())
+        job = {
+            "kind": kind,
+            "status": "pending",
+            "message": message,
+            "version": 1,
+            "created_at": datetime.now().isoformat()
+        }
+        if run_id is not None:
+            job["run_id"] = run_id
+        with self._lock:
+            self._jobs[job_id] = job
+            self._save(job_id, job)
+            self._changed.notify_all()
+        self.evict_expired()
+        return job_id
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._load(job_id)
+                if job is None:
+                    return
+                self._jobs[job_id] = job
+            job.update(fields)
+            job["version"] = job.get("version", 0) + 1
+            if fields.get("status") in FINISHED_STATUSES:
+                job["finished_at"] = time.time()
+            self._save(job_id, job)
+            self._changed.notify_all()
+
+    def get(self, job_id):
+        """Return a copy of the job record, or None if unknown/expired"""
+        with self._lock:
+            return self._get_locked(job_id)
+
+    def wait(self, job_id, since=None, timeout=30.0):
+        """
+        Block until the job's version is newer than since (or it has finished)
+        and return a copy of it; after timeout the current record is returned
+        unchanged. None if the job is unknown/expired
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                job = self._get_locked(job_id)
+                if (job is None or since is None or job.get("version", 0) > since
+                        or job["status"] in FINISHED_STATUSES):
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                if self._conn is not None:
+                    remaining = min(remaining, SHARED_WAIT_INTERVAL)
+                self._changed.wait(remaining)
+
+    def _get_locked(self, job_id):
+        if self._conn is not None:
+            job = self._load(job_id)
+            if job is not None and job["status"] not in FINISHED_STATUSES:
+                job = self._fail_if_orphaned_locked(job_id, job)
+        else:
+            job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    def _fail_if_orphaned_locked(self, job_id, job):
+        """Mark an unfinished job failed when no process has refreshed it recently"""
+        row = self._conn.execute("SELECT updated_at FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None or row[0] >= time.time() - ORPHANED_AFTER:
+            return job
+        logging.warning(f"Job {job_id}: No heartbeat for {ORPHANED_AFTER:.0f}s; marking it failed")
+        job.update(status="failed", error="Interrupted by restart")
+        job["version"] = job.get("version", 0) + 1
+        job["finished_at"] = time.time()
+        self._jobs[job_id] = job
+        self._save(job_id, job)
+        self._changed.notify_all()
+        return job
+
+    def heartbeat(self, job_ids):
+        """Record that this process is still working on job_ids (SQLite persistence only)"""
+        if self._conn is None or not job_ids:
+            return
+        job_ids = list(job_ids)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET updated_at = ? WHERE job_id IN ({', '.join('?' * len(job_ids))}) "
+                f"AND status NOT IN (?, ?)",
+                (time.time(), *job_ids, *FINISHED_STATUSES)
+            )
+            self._conn.commit()
+
+    def count_active(self):
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job["status"] not in FINISHED_STATUSES)
+
+    def active_run_ids(self):
+        """Run IDs with unfinished jobs (in any process sharing the database, unless orphaned)"""
+        with self._lock:
+            if self._conn is not None:
+                rows = self._conn.execute(
+                    "SELECT data FROM jobs WHERE status NOT IN (?, ?) AND updated_at >= ?",
+                    (*FINISHED_STATUSES, time.time() - ORPHANED_AFTER)
+                ).fetchall()
+                active = [json.loads(row[0]) for row in rows]
+            else:
+                active = [job for job in self._jobs.values() if job["status"] not in FINISHED_STATUSES]
+        return {job["run_id"] for job in active if job.get("run_id")}
+
+    def evict_expired(self):
+        """Forget finished jobs older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.get("finished_at", cutoff + 1) < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+            if self._conn is not None:
+                self._conn.execute(
+                    "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                    (*FINISHED_STATUSES, cutoff)
+                )
+                self._conn.commit()
+        if expired:
+            logging.debug(f"Evicted {len(expired)} finished jobs")
+
+    def _save(self, job_id, job):
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, data, status, updated_at) VALUES (?, ?, ?, ?)",
+            (job_id, json.dumps(job, default=str), job["status"], time.time())
+        )
+        self._conn.commit()
+
+    def _load(self, job_id):
+        if self._conn is None:
+            return None
+        row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+class JobManager:
+    """
+    Runs jobs on a fixed-size thread pool with a bounded queue
+    submit() raises QueueFullError instead of queueing without limit
+    With SQLite persistence, a daemon thread heartbeats this process's jobs
+    """
+
+    def __init__(self, max_workers=2, queue_depth=16, ttl_seconds=3600, db_path=None):
+        self.store = JobStore(ttl_seconds=ttl_seconds, db_path=db_path)
+        self.capacity = max_workers + queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._submit_lock = threading.Lock()
+        self._owned = set()
+
+        if db_path:
+            threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            try:
+                with self._submit_lock:
+                    owned = list(self._owned)
+                self.store.heartbeat(owned)
+            except Exception as e:
+                logging.error(f"Job heartbeat failed: {str(e)}")
+
+    def submit(self, kind, message, target, *args, run_id=None):
+        """
+        Create a job record and queue target(job_id, *args) for execution
+        run_id records which run workspace the job uses (see active_run_ids)
+        """
+        with self._submit_lock:
+            if self.store.count_active() >= self.capacity:
+                raise QueueFullError(f"Too many jobs in progress (limit {self.capacity})")
+            job_id = self.store.create(kind, message, run_id=run_id)
+            self._owned.add(job_id)
+            self._executor.submit(self._run, target, job_id, *args)
+        return job_id
+
+    def _run(self, target, job_id, *args):
+        try:
+            target(job_id, *args)
+        except Exception as e:
+            logging.error(f"Job {job_id}: Unhandled error: {str(e)}")
+            self.store.update(job_id, status="failed", error=str(e))
+        finally:
+            with self._submit_lock:
+                self._owned.discard(job_id)
+
+    def update(self, job_id, **fields):
+        self.store.update(job_id, **fields)
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def active_run_ids(self):
+        return self.store.active_run_ids()
+
+    def wait(self, job_id, since=None, timeout=30.0):
+        return self.store.wait(job_id, since, timeout)
@@ -0,0 +1,143 @@
+"""
+Streaming JSON-LD Review Extractor
+Scans raw HTML for <script type="application/ld+json"> blocks without building
+a DOM, parses only those blocks and collects the product's reviews from them,
+whether nested under the Product or listed on their own (e.g. in @graph, linked
+to it by itemReviewed)
+"""
+
+import json
+import re
+
+_SCRIPT_OPEN_RE = re.compile(
+    r'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json["\']?[^>]*>', re.I
+)
+_SCRIPT_CLOSE_RE = re.compile(r'</script\s*>', re.I)
+
+
+def iter_json_ld_blocks(html_content):
+    """Yield the raw text of each ld+json script block, scanning left to right once"""
+    position = 0
+    while True:
+        opening = _SCRIPT_OPEN_RE.search(html_content, position)
+        if not opening:
+            return
+        closing = _SCRIPT_CLOSE_RE.search(html_content, opening.end())
+        if not closing:
+            return
+        yield html_content[opening.end():closing.start()]
+        position = closing.end()
+
+
+def _has_type(node, type_name):
+    node_type = node.get('@type')
+    if isinstance(node_type, list):
+        return type_name in node_type
+    return node_type == type_name
+
+
+def iter_products(data):
+    """Yield every Product node, descending into lists, @graph arrays and nested objects"""
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_products(item)
+    elif isinstance(data, dict):
+        if _has_type(data, 'Product'):
+            yield data
+        for key, value in data.items():
+            if key != 'review' and isinstance(value, (dict, list)):
+                yield from iter_products(value)
+
+
+def iter_reviews(data):
+    """
+    Yield every Review node at any depth (Product.review, @graph, nested objects)
+    except reviews whose itemReviewed is explicitly something other than a Product
+    """
+    if isinstance(data, list):
+        for item in data:
+            yield from iter_reviews(item)
+    elif isinstance(data, dict):
+        if _has_type(data, 'Review'):
+            item = data.get('itemReviewed')
+            if not (isinstance(item, dict) and '@type' in item and not _has_type(item, 'Product')):
+                yield data
+        for value in data.values():
+            if isinstance(value, (dict, list)):
+                yield from iter_reviews(value)
+
+
+def _parse_rating(value, default=3):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_review(review_obj):
+    """Convert one schema.org Review into the scraper's {"text", "rating"} dict (or None)"""
+    if not isinstance(review_obj, dict) or not _has_type(review_obj, 'Review'):
+        return None
+
+    review_text = review_obj.get('reviewBody', '') or ''
+    review_name = review_obj.get('name', '') or ''
+
+    # Combine name and body
+    if review_name and review_text:
+        review_text = f"{review_name}. {review_text}"
+    elif review_name:
+        review_text = review_name
+
+    rating = 3  # Default
+    rating_obj = review_obj.get('reviewRating')
+    if isinstance(rating_obj, dict):
+        rating = _parse_rating(rating_obj.get('ratingValue', 3))
+
+    if review_text and len(review_text) > 10:
+        return {"text": review_text[:500], "rating": rating}
+    return None
+
+
+def extract_json_ld_reviews(html_content, limit=30):
+    """
+    Reviews from the page's JSON-LD structured data
+    Returns (review_list, aggregate_rating) where aggregate_rating is the first
+    Product aggregateRating found (or None)
+    """
+    review_list = []
+    seen = set()
+    aggregate_rating = None
+    blocks = 0
+
+    for raw in iter_json_ld_blocks(html_content):
+        blocks += 1
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            continue
+
+        if aggregate_rating is None:
+            for product in iter_products(data):
+                if isinstance(product.get('aggregateRating'), dict):
+                    aggregate_rating = product['aggregateRating']
+                    break
+
+        # The same review may appear under Product.review and again in @graph
+        for review_obj in iter_reviews(data):
+            if len(review_list) >= limit:
+                break
+            review = parse_review(review_obj)
+            if not review:
+                continue
+            key = review_obj.get('@id') or (review['text'], review['rating'])
+            if key in seen:
+                continue
+            seen.add(key)
+            review_list.append(review)
+            print(f"  ✓ Extracted JSON-LD review (rating: {review['rating']})")
+
+        if len(review_list) >= limit:
+            break
+
+    print(f"🔍 Scanned {blocks} JSON-LD script blocks")
+    return review_list, aggregate_rating
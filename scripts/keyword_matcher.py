@@ -0,0 +1,71 @@
+"""
+Keyword Matcher
+Single-pass, whole-token keyword counting shared by the summarizers: every
+review is tokenized once and each token is looked up in a precompiled
+keyword -> group table, so cost no longer grows with the number of keywords
+and "cost" no longer matches inside "costume"
+"""
+
+import re
+
+import numpy as np
+
+# Words with internal hyphens/apostrophes stay one token ("well-made", "don't")
+TOKEN_PATTERN = r"[a-z0-9]+(?:['\-][a-z0-9]+)*"
+
+
+class KeywordMatcher:
+    """
+    Count keyword hits per group for a batch of texts
+    groups: {group name: [keyword or multi-word phrase, ...]}
+    """
+
+    def __init__(self, groups, token_pattern=TOKEN_PATTERN):
+        self.groups = list(groups)
+        self._token_re = re.compile(token_pattern)
+
+        # first token -> [(remaining tokens, group index), ...], longest phrases first
+        self._table = {}
+        for index, group in enumerate(self.groups):
+            for keyword in groups[group]:
+                tokens = tuple(self._token_re.findall(keyword.lower()))
+                if tokens:
+                    self._table.setdefault(tokens[0], []).append((tokens[1:], index))
+        for entries in self._table.values():
+            entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    def count(self, texts):
+        """
+        Scan every text once
+        Returns a (len(texts), len(groups)) int32 matrix of hits per review and group
+        """
+        texts = list(texts)
+        counts = np.zeros((len(texts), len(self.groups)), dtype=np.int32)
+        table = self._table
+
+        for row, text in enumerate(texts):
+            tokens = self._token_re.findall(str(text).lower())
+            position = 0
+            while position < len(tokens):
+                entries = table.get(tokens[position])
+                step = 1
+                if entries is not None:
+                    for rest, group in entries:
+                        end = position + 1 + len(rest)
+                        if not rest or tuple(tokens[position + 1:end]) == rest:
+                            counts[row, group] += 1
+                            step = max(step, 1 + len(rest))
+                position += step
+        return counts
+
+    def totals(self, texts):
+        """
+        Returns ({group: total hits}, {group: number of texts with at least one hit})
+        """
+        counts = self.count(texts)
+        hits = counts.sum(axis=0)
+        reviews = (counts > 0).sum(axis=0)
+        return (
+            {group: int(hits[i]) for i, group in enumerate(self.groups)},
+            {group: int(reviews[i]) for i, group in enumerate(self.groups)},
+        )
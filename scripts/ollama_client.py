@@ -0,0 +1,161 @@
+"""
+Ollama Map-Reduce Summarization
+Summarizes every real review instead of a truncated prefix: reviews are packed
+into prompt-sized batches, batches are summarized concurrently over one pooled
+HTTP session, and the partial summaries are reduced (recursively when they do
+not fit one prompt) into the final summary, whose tokens are streamed to a
+callback as Ollama produces them
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAP_PROMPT = (
+    "Summarize the following customer reviews in a few sentences, "
+    "listing the main pros and cons they mention:\n\n"
+)
+REDUCE_PROMPT = (
+    "The following are summaries of different groups of reviews of the same product. "
+    "Combine them into a single paragraph highlighting the pros and cons of the product:\n\n"
+)
+SINGLE_PROMPT = (
+    "Summarize these reviews into a single paragraph, "
+    "highlighting the pros and cons of the product:\n\n"
+)
+
+
+class OllamaError(Exception):
+    """Ollama could not be reached or answered with an error"""
+
+
+def chunk_entries(entries, max_chars):
+    """Pack text entries in order into batches of at most max_chars (longer entries are cut)"""
+    batches = []
+    current = []
+    size = 0
+    for entry in entries:
+        entry = entry[:max_chars]
+        if current and size + len(entry) + 1 > max_chars:
+            batches.append("\n".join(current))
+            current, size = [], 0
+        current.append(entry)
+        size += len(entry) + 1
+    if current:
+        batches.append("\n".join(current))
+    return batches
+
+
+class OllamaClient:
+    """Streaming /api/generate client sharing one connection pool across threads"""
+
+    def __init__(self, url, model, max_workers=4, timeout=120, session=None):
+        # requests is only imported once a client is actually needed
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        self.url = url
+        self.model = model
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def generate(self, prompt, on_token=None):
+        """Run one prompt, passing each streamed token to on_token; returns the full text"""
+        import requests
+        
+        try:
+            response = self.session.post(
+                self.url,
+                json={"model": self.model, "prompt": prompt, "stream": True},
+                stream=True,
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise OllamaError(f"Request failed: {e}") from e
+
+        with response:
+            if response.status_code != 200:
+                raise OllamaError(f"Ollama API error: {response.status_code} - {response.text}")
+
+            parts = []
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    try:
+                        message = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if message.get("error"):
+                        raise OllamaError(message["error"])
+                    token = message.get("response", "")
+                    if token:
+                        parts.append(token)
+                        if on_token:
+                            on_token(token)
+                    if message.get("done", False):
+                        break
+            except requests.RequestException as e:
+                raise OllamaError(f"Stream interrupted: {e}") from e
+        return "".join(parts).strip()
+
+    def summarize(self, entries, max_chars=4000, on_token=None, on_progress=None):
+        """
+        Summarize all entries (one review each) with map-reduce
+        on_token receives the final summary's tokens; on_progress receives
+        {"stage": "map" | "reduce", "done": n, "total": n}
+        """
+        batches = chunk_entries(entries, max_chars)
+        if not batches:
+            raise OllamaError("Nothing to summarize")
+        if len(batches) == 1:
+            return self.generate(SINGLE_PROMPT + batches[0], on_token)
+
+        partials = self._map(batches, MAP_PROMPT, "map", on_progress)
+
+        # Reduce until the partial summaries fit one prompt
+        groups = chunk_entries(partials, max_chars)
+        while len(groups) > 1:
+            if len(groups) >= len(partials):
+                # Partials too long to share a prompt: give each at most half of one,
+                # so every reduce round at least halves their number
+                half = (max_chars - 2) // 2
+                if half < 1:
+                    raise OllamaError(f"max_chars={max_chars} is too small to reduce partial summaries")
+                groups = chunk_entries([partial[:half] for partial in partials], max_chars)
+            partials = self._map(groups, REDUCE_PROMPT, "reduce", on_progress)
+            groups = chunk_entries(partials, max_chars)
+        if not groups:
+            raise OllamaError("Ollama returned no partial summaries")
+
+        # Final pass, streamed
+        if on_progress:
+            on_progress({"stage": "reduce", "done": 0, "total": 1})
+        summary = self.generate(REDUCE_PROMPT + groups[0], on_token)
+        if on_progress:
+            on_progress({"stage": "reduce", "done": 1, "total": 1})
+        return summary
+
+    def _map(self, batches, prompt, stage, on_progress):
+        """Summarize batches concurrently (at most max_workers requests in flight)"""
+        done = 0
+        lock = threading.Lock()
+
+        def run(batch):
+            nonlocal done
+            result = self.generate(prompt + batch)
+            with lock:
+                done += 1
+                if on_progress:
+                    on_progress({"stage": stage, "done": done, "total": len(batches)})
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ollama") as pool:
+            return [summary for summary in pool.map(run, batches) if summary]
+
+    def close(self):
+        self.session.close()
@@ -1,17 +1,58 @@
-import pandas as pd
-import numpy as np
 import pickle
 import re
-from textblob import TextBlob
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 import logging
 import os
 import sys
 import json
+import threading
+import multiprocessing
+
+# Add parent directory to path to import config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from scripts.prediction_cache import PredictionCache, model_identifier
+from scripts.text_identity import text_identity
+from scripts.workspace import run_paths, put_real_reviews, read_product_url, analysis_state_dir
+
+# pandas/numpy, the sentiment engine, reportlab and the model package itself are
+# loaded on first use so importing this module (e.g. for clean_text) stays cheap
 
 logging.basicConfig(level=logging.INFO)
 
+# "textblob" uses one TextBlob per review (reference); "lexicon" scores the whole batch
+# at once but only approximates TextBlob's negation and intensifier handling
+SENTIMENT_BACKEND = getattr(config, "SENTIMENT_BACKEND", "textblob")
+SENTIMENT_LEXICON_PATH = getattr(config, "SENTIMENT_LEXICON_PATH", "snlp/saved_models/sentiment_lexicon.json")
+SENTIMENT_PARITY_CHECK = getattr(config, "SENTIMENT_PARITY_CHECK", False)
+
+# Process-pool sharding for very large inputs (1 = score in-process)
+PREDICT_WORKERS = getattr(config, "PREDICT_WORKERS", 1)
+PREDICT_CHUNK_SIZE = getattr(config, "PREDICT_CHUNK_SIZE", 20000)
+
+# On-disk prediction cache keyed by raw review text + model (None disables it)
+PREDICTION_CACHE_PATH = getattr(config, "PREDICTION_CACHE_PATH", "data/prediction_cache.sqlite3")
+PREDICTION_CACHE_MAX_ENTRIES = getattr(config, "PREDICTION_CACHE_MAX_ENTRIES", 500000)
+
+# Render real_reviews.pdf during prediction; when False the PDF is produced
+# lazily by export_pdf() and summarization uses the in-memory DataFrame instead
+GENERATE_PDF_REPORT = getattr(config, "GENERATE_PDF_REPORT", False)
+
+# Stream the input in chunks of this many rows (None = load the whole file at once)
+PREDICT_STREAM_CHUNK_SIZE = getattr(config, "PREDICT_STREAM_CHUNK_SIZE", None)
+
+# Re-analysis of a re-scraped product scores only reviews it has not seen before
+# (opt-in; it loads the whole input, so streamed runs always analyze in full)
+PREDICT_INCREMENTAL = getattr(config, "PREDICT_INCREMENTAL", False)
+
+# "auto" loads the compact export of the model package when one exists and was
+# made from the current package (see scripts/compact_model.py); "compact" and
+# "pickle" force a format
+MODEL_FORMAT = getattr(config, "MODEL_FORMAT", "auto")
+
+# "fused" cleans, tokenizes and maps reviews to model columns in whole-batch
+# passes (scripts/fused_features.py); "vectorizer" uses clean_text + vectorizer.transform
+FEATURE_PIPELINE = getattr(config, "FEATURE_PIPELINE", "fused")
+
 # Define functions exactly as in the training script (must match for pickle to work)
 def clean_text(text):
     text = str(text).lower()
@@ -38,19 +79,63 @@ def extract_features(text):
 model_components = None
 MODEL_PATH = "snlp/saved_models/fake_review_detector_20251031_224832_complete_package.pkl"
 
-try:
-    logging.info(f"Loading trained model from {MODEL_PATH}...")
-    with open(MODEL_PATH, 'rb') as f:
-        model_components = pickle.load(f)
-    logging.info(f"✓ Model loaded successfully! Using {model_components['best_model_name']} model")
+class _PackageUnpickler(pickle.Unpickler):
+    """Resolve training-script helpers pickled under __main__ to this module"""
+    def find_class(self, module, name):
+        if module == "__main__" and name in ("clean_text", "extract_features"):
+            return globals()[name]
+        return super().find_class(module, name)
+
+def load_model_package(model_path=MODEL_PATH):
+    """Unpickle the complete model package from disk"""
+    with open(model_path, 'rb') as f:
+        return _PackageUnpickler(f).load()
+
+# Functions a compact export may name as its vectorizer preprocessor
+PREPROCESSORS = {"clean_text": clean_text}
+
+def load_model_components(model_path=MODEL_PATH, model_format=MODEL_FORMAT):
+    """
+    Load the model package, preferring its memory-mapped compact export
+    (falls back to the pickle in "auto" mode when the export is missing or stale)
+    """
+    from scripts.compact_model import compact_path_for, load_compact_package
+    
+    compact_path = compact_path_for(model_path)
+    if model_format != "pickle" and os.path.isdir(compact_path):
+        # An export of an older package is stale once the pickle changes
+        source_id = model_identifier(model_path) if os.path.exists(model_path) else None
+        try:
+            components = load_compact_package(compact_path, preprocessors=PREPROCESSORS, source_id=source_id)
+            logging.info(f"Loaded compact model from {compact_path}")
+            return components
+        except (OSError, ValueError) as e:
+            if model_format == "compact":
+                raise
+            logging.warning(f"Compact model unusable, loading the pickle instead: {e}")
+    elif model_format == "compact":
+        raise FileNotFoundError(f"No compact model at {compact_path}; "
+                                f"run: python scripts/compact_model.py export")
+    return load_model_package(model_path)
+
+_model_lock = threading.Lock()
+
+def get_model_components():
+    """Return the process-wide model package, loading it on first use"""
+    global model_components
     
-except Exception as e:
-    logging.error(f"Could not load model at startup: {e}")
-    import traceback
-    traceback.print_exc()
-    model_components = None
+    if model_components is None:
+        with _model_lock:
+            if model_components is None:
+                logging.info(f"Loading trained model from {MODEL_PATH}...")
+                model_components = load_model_components(MODEL_PATH)
+                logging.info(f"✓ Model loaded successfully! Using {model_components['best_model_name']} model")
+    return model_components
 
 def generate_pdf(real_reviews, output_pdf_path):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    
     try:
         c = canvas.Canvas(output_pdf_path, pagesize=letter)
         width, height = letter
@@ -70,157 +155,712 @@ def generate_pdf(real_reviews, output_pdf_path):
         logging.error(f"Error generating PDF: {str(e)}")
         return False
 
-def predict_fake_review(text, rating=5):
+def build_sentiment_stats(sentiment_counts, total_reviews, real_reviews_count, fake_reviews_count):
+    """Assemble the sentiment_stats.json payload"""
+    return {
+        "sentiment_counts": sentiment_counts,
+        "total_reviews": total_reviews,
+        "real_reviews_count": real_reviews_count,
+        "fake_reviews_count": fake_reviews_count,
+        "fake_percentage": (fake_reviews_count / total_reviews * 100) if total_reviews > 0 else 0
+    }
+
+# Per-row record of a product's last analysis, stored next to its stats
+ANALYSIS_STATE_COLUMNS = ('review_id', 'is_fake', 'sentiment', 'confidence')
+# Names the current version under <state_dir>/versions/
+ANALYSIS_STATE_POINTER = "CURRENT"
+ANALYSIS_STATE_GRACE_SECONDS = 600
+
+def load_analysis_state(state_dir, model_id):
     """
-    Predict if a review is fake or real
-    Returns dict with prediction, probabilities, and sentiment
+    Return (state DataFrame, sentiment stats) of a product's last analysis,
+    or (None, None) when there is none or it was made with another model
     """
-    global model_components
+    import pandas as pd
     
-    if model_components is None:
-        raise ValueError("Model not loaded! Check model path.")
+    try:
+        version_dir = analysis_state_version(state_dir)
+    except OSError:
+        return None, None
+    reviews_path = os.path.join(version_dir, "reviews.csv")
+    meta_path = os.path.join(version_dir, "state.json")
+    if not (os.path.exists(reviews_path) and os.path.exists(meta_path)):
+        return None, None
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        if meta.get('model_id') != model_id:
+            logging.info("Previous analysis used a different model; re-scoring everything")
+            return None, None
+        state = pd.read_csv(reviews_path, dtype={'review_id': str, 'sentiment': str})
+        if len(state) != meta['stats']['total_reviews']:
+            logging.warning(f"Analysis state in {state_dir} is inconsistent; re-scoring everything")
+            return None, None
+        return state, meta['stats']
+    except (OSError, ValueError, KeyError) as e:
+        logging.warning(f"Could not read analysis state in {state_dir}: {e}")
+        return None, None
+
+def analysis_state_version(state_dir):
+    """
+    Directory of a product's current analysis version, named by the CURRENT pointer
+    (state_dir itself for analyses saved before versioning; OSError when there is none)
+    """
+    try:
+        with open(os.path.join(state_dir, ANALYSIS_STATE_POINTER), 'r') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return state_dir
+    if not version or os.sep in version or version.startswith('.'):
+        raise OSError(f"Bad analysis state pointer in {state_dir}")
+    return os.path.join(state_dir, "versions", version)
+
+def save_analysis_state(state_dir, state, sentiment_stats, model_id):
+    """
+    Persist a product's analysis
+    Reviews and stats are written into a new version directory and published by
+    atomically replacing the CURRENT pointer, so concurrent runs of the same product
+    always read a matching pair. Versions older than the one replaced are removed
+    once they are ANALYSIS_STATE_GRACE_SECONDS old (another save may still be writing one)
+    """
+    import shutil
+    import time
+    import uuid
+    
+    versions_dir = os.path.join(state_dir, "versions")
+    version = uuid.uuid4().hex
+    version_dir = os.path.join(versions_dir, version)
+    os.makedirs(version_dir)
+    state[list(ANALYSIS_STATE_COLUMNS)].to_csv(os.path.join(version_dir, "reviews.csv"), index=False)
+    with open(os.path.join(version_dir, "state.json"), 'w') as f:
+        json.dump({"model_id": model_id, "stats": sentiment_stats}, f, indent=2)
     
+    pointer = os.path.join(state_dir, ANALYSIS_STATE_POINTER)
     try:
-        # Clean the text
-        cleaned = clean_text(text)
+        previous = os.path.basename(analysis_state_version(state_dir))
+    except OSError:
+        previous = None
+    with open(f"{pointer}.{version}.partial", 'w') as f:
+        f.write(version)
+    os.replace(f"{pointer}.{version}.partial", pointer)
+    
+    # Keep the version just replaced for readers that resolved the pointer before the swap
+    cutoff = time.time() - ANALYSIS_STATE_GRACE_SECONDS
+    for name in os.listdir(versions_dir):
+        path = os.path.join(versions_dir, name)
+        try:
+            if name not in (version, previous) and os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            continue
+
+def iter_review_records(csv_path, chunk_size=PREDICT_CHUNK_SIZE):
+    """Yield review dicts from a CSV one chunk at a time"""
+    import pandas as pd
+    
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        yield from chunk.to_dict('records')
+
+def export_pdf(real_csv_path, output_pdf_path, chunk_size=PREDICT_CHUNK_SIZE):
+    """Render real_reviews.csv to the PDF report (streamed one chunk at a time)"""
+    if not os.path.exists(real_csv_path):
+        logging.error(f"Cannot export PDF: {real_csv_path} not found")
+        return False
+    success = generate_pdf(iter_review_records(real_csv_path, chunk_size), output_pdf_path)
+    if success:
+        logging.info(f"✓ PDF report saved to {output_pdf_path}")
+    else:
+        logging.error("Failed to generate PDF")
+    return success
+
+def ensure_pdf(run_id=None):
+    """
+    Return the run's PDF path, rendering it first if it hasn't been exported yet
+    None when the run has no analyzed reviews or rendering fails
+    """
+    paths = run_paths(run_id)
+    if not os.path.exists(paths['real_csv']):
+        return None
+    if not os.path.exists(paths['real_pdf']) or \
+            os.path.getmtime(paths['real_pdf']) < os.path.getmtime(paths['real_csv']):
+        if not export_pdf(paths['real_csv'], paths['real_pdf']):
+            return None
+    return paths['real_pdf']
+
+class ReviewPredictor:
+    """
+    Long-lived predictor that keeps a loaded model package in memory
+    so the web app can score many jobs without re-importing or re-unpickling
+    """
+    
+    def __init__(self, components=None, model_path=MODEL_PATH, sentiment_backend=SENTIMENT_BACKEND,
+                 use_cache=True):
+        from scripts.sentiment import SentimentEngine
         
-        # Vectorize using the saved vectorizer
-        vectorized = model_components['vectorizer'].transform([cleaned])
+        self.model_path = model_path
+        self.components = components if components is not None else load_model_components(model_path)
+        self.best_model_name = self.components['best_model_name']
+        self.best_model = self.components['models'][self.best_model_name]
+        self.vectorizer = self.components['vectorizer']
+        self.sentiment_backend = sentiment_backend
+        self.model_id = model_identifier(model_path, self.best_model_name, sentiment_backend)
+        self.cache = None
+        if use_cache and PREDICTION_CACHE_PATH:
+            try:
+                self.cache = PredictionCache(
+                    PREDICTION_CACHE_PATH,
+                    self.model_id,
+                    max_entries=PREDICTION_CACHE_MAX_ENTRIES
+                )
+            except Exception as e:
+                logging.warning(f"Prediction cache disabled: {e}")
+        # Same features as the vectorizer, computed by the fused pipeline when it supports the vectorizer
+        self.featurizer = None
+        if FEATURE_PIPELINE == "fused":
+            from scripts.fused_features import featurizer_for
+            try:
+                self.featurizer = featurizer_for(self.vectorizer, PREPROCESSORS)
+            except ValueError as e:
+                logging.info(f"Fused feature pipeline unavailable, using the vectorizer: {e}")
+        # Share the vectorizer's tokenization so both passes see the same tokens
+        self.sentiment_engine = SentimentEngine(
+            lexicon_path=SENTIMENT_LEXICON_PATH,
+            token_pattern=getattr(self.vectorizer, 'token_pattern', None)
+        )
+    
+    def score_sentiment(self, texts):
+        """Return polarity scores for a batch of texts using the configured backend"""
+        import numpy as np
         
-        # Get the best model
-        best_model = model_components['models'][model_components['best_model_name']]
+        if self.sentiment_backend == "textblob":
+            from textblob import TextBlob
+            return np.array([TextBlob(t).sentiment.polarity for t in texts])
+        return self.sentiment_engine.score(texts)
+    
+    def _clean(self, texts):
+        """clean_text() for a batch (one pass over the batch with the fused pipeline)"""
+        if self.featurizer is not None:
+            from scripts.fused_features import clean_texts
+            return clean_texts(texts)
+        return [clean_text(t) for t in texts]
+    
+    def _score(self, texts, cleaned):
+        """
+        Run the classifier and sentiment scorer on a batch with no caching
+        Returns a dict of per-review arrays
+        """
+        # Vectorize the whole batch into one sparse matrix
+        if self.featurizer is not None:
+            vectorized = self.featurizer.transform(cleaned)
+        else:
+            vectorized = self.vectorizer.transform(cleaned)
         
-        # Make prediction
-        prediction = best_model.predict(vectorized)[0]
-        probabilities = best_model.predict_proba(vectorized)[0]
+        # A single predict_proba call; the label is the most probable class
+        probabilities = self.best_model.predict_proba(vectorized)
+        classes = list(self.best_model.classes_)
+        predictions = self.best_model.classes_[probabilities.argmax(axis=1)]
+        
+        return {
+            'is_fake': predictions == 1,
+            'fake_probability': probabilities[:, classes.index(1)],
+            'real_probability': probabilities[:, classes.index(0)],
+            'sentiment_score': self.score_sentiment(texts)
+        }
+    
+    def predict(self, texts, ratings=None, scorer=None):
+        """
+        Predict fake/real for a batch of reviews in a single vectorized pass
+        Returns a DataFrame (one row per input review, same order) with prediction,
+        probabilities and sentiment columns
+        """
+        import numpy as np
+        import pandas as pd
+        from scripts.sentiment import SentimentEngine
+        
+        texts = ["" if pd.isna(t) else str(t) for t in texts]
+        if ratings is None:
+            ratings = [5] * len(texts)
+        scorer = scorer or self._score
+        
+        if not texts:
+            return pd.DataFrame(columns=['text', 'rating', 'is_fake', 'fake_probability',
+                                         'real_probability', 'confidence', 'sentiment',
+                                         'sentiment_score', 'model_used'])
+        
+        try:
+            if self.cache is None:
+                scores = scorer(texts, self._clean(texts))
+            else:
+                # Only reviews never seen with this model are cleaned and reach the vectorizer;
+                # keys hash the raw text, which both the features and the sentiment come from
+                keys = [PredictionCache.key_for(t) for t in texts]
+                cached = self.cache.get_many(keys)
+                misses = [i for i, key in enumerate(keys) if key not in cached]
+                
+                if misses:
+                    missed_texts = [texts[i] for i in misses]
+                    fresh = scorer(missed_texts, self._clean(missed_texts))
+                else:
+                    fresh = None
+                new_entries = {}
+                if fresh is not None:
+                    for j, i in enumerate(misses):
+                        cached[keys[i]] = new_entries[keys[i]] = {col: fresh[col][j] for col in PredictionCache.COLUMNS}
+                    self.cache.put_many(new_entries)
+                
+                scores = {col: np.array([cached[key][col] for key in keys]) for col in PredictionCache.COLUMNS}
+            
+            fake_probability = np.asarray(scores['fake_probability'], dtype=np.float64)
+            real_probability = np.asarray(scores['real_probability'], dtype=np.float64)
+            sentiment_scores = np.asarray(scores['sentiment_score'], dtype=np.float64)
+            
+            return pd.DataFrame({
+                'text': texts,
+                'rating': list(ratings),
+                'is_fake': np.asarray(scores['is_fake'], dtype=bool),
+                'fake_probability': fake_probability,
+                'real_probability': real_probability,
+                'confidence': np.maximum(fake_probability, real_probability),
+                'sentiment': SentimentEngine.categorize(sentiment_scores),
+                'sentiment_score': sentiment_scores,
+                'model_used': self.best_model_name
+            })
+            
+        except Exception as e:
+            logging.error(f"Error in batch prediction: {str(e)}")
+            raise
+    
+    def predict_parallel(self, texts, ratings=None, workers=PREDICT_WORKERS, chunk_size=PREDICT_CHUNK_SIZE):
+        """
+        Score a large batch across a pool of worker processes
+        From the predict.py command line workers are forked and inherit this predictor
+        copy-on-write. Anywhere else (e.g. inside the web app, whose threads may hold
+        locks or SQLite handles at fork time) they are started fresh with forkserver/spawn
+        and load the package themselves, sharing the memory-mapped compact export when
+        there is one. Chunks are merged back in original order so results match predict()
+        """
+        import numpy as np
         
-        # Calculate sentiment using TextBlob
-        blob = TextBlob(text)
-        sentiment_score = blob.sentiment.polarity
+        texts = list(texts)
+        workers = min(workers or os.cpu_count() or 1, max(1, -(-len(texts) // chunk_size)))
         
-        # Categorize sentiment
-        if sentiment_score > 0.1:
-            sentiment_category = "positive"
-        elif sentiment_score < -0.1:
-            sentiment_category = "negative"
+        if workers <= 1:
+            return self.predict(texts, ratings)
+        start_methods = multiprocessing.get_all_start_methods()
+        if _FORK_WORKERS and "fork" in start_methods:
+            context = multiprocessing.get_context("fork")
+            initializer, initargs = None, ()
         else:
-            sentiment_category = "neutral"
+            context = multiprocessing.get_context("forkserver" if "forkserver" in start_methods else "spawn")
+            initializer, initargs = _init_pool_worker, (self.model_path, MODEL_FORMAT, self.sentiment_backend)
         
-        return {
-            'is_fake': prediction == 1,
-            'fake_probability': probabilities[1],
-            'real_probability': probabilities[0],
-            'confidence': max(probabilities),
-            'sentiment': sentiment_category,
-            'sentiment_score': sentiment_score,
-            'model_used': model_components['best_model_name']
-        }
+        def pooled_scorer(batch_texts, batch_cleaned):
+            global _pool_predictor
+            
+            chunks = [(batch_texts[i:i + chunk_size], batch_cleaned[i:i + chunk_size])
+                      for i in range(0, len(batch_texts), chunk_size)]
+            if len(chunks) <= 1:
+                return self._score(batch_texts, batch_cleaned)
+            
+            # Build lazily-initialised state before forking so every worker shares it
+            if initializer is None and self.sentiment_backend != "textblob":
+                self.sentiment_engine.score([])
+            
+            logging.info(f"Scoring {len(batch_texts)} reviews in {len(chunks)} chunks on {workers} "
+                         f"{context.get_start_method()} processes")
+            if initializer is None:
+                _pool_predictor = self
+            try:
+                with context.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+                    parts = pool.map(_score_chunk, chunks)
+            finally:
+                if initializer is None:
+                    _pool_predictor = None
+            
+            return {col: np.concatenate([part[col] for part in parts]) for col in parts[0]}
         
-    except Exception as e:
-        logging.error(f"Error in prediction: {str(e)}")
-        raise
+        return self.predict(texts, ratings, scorer=pooled_scorer)
+    
+    def warm_up(self):
+        """Run a throwaway prediction so first-request lazy initialisation happens at boot"""
+        self.predict(["Warm up review to initialise the model and sentiment lexicon."], [5])
+        logging.info(f"✓ Predictor warmed up ({self.best_model_name})")
+    
+    def analyze_file(self, input_csv_path="data/input_reviews.csv",
+                     output_csv_path="data/real_reviews.csv",
+                     output_pdf_path="data/real_reviews.pdf",
+                     sentiment_stats_path="data/sentiment_stats.json",
+                     workers=PREDICT_WORKERS, stream_chunk_size=PREDICT_STREAM_CHUNK_SIZE,
+                     progress_callback=None):
+        """
+        Score an input CSV and write real_reviews.csv, sentiment_stats.json
+        (and the PDF when GENERATE_PDF_REPORT is set)
+        Returns True on success, False otherwise
+        """
+        import pandas as pd
+        
+        if stream_chunk_size:
+            return self.analyze_file_streaming(input_csv_path, output_csv_path, output_pdf_path,
+                                               sentiment_stats_path, chunk_size=stream_chunk_size,
+                                               workers=workers, progress_callback=progress_callback)
+        
+        try:
+            logging.info(f"Reading {input_csv_path}...")
+            if not os.path.exists(input_csv_path):
+                logging.error(f"Input file {input_csv_path} not found!")
+                return False
 
-def main():
-    """Main prediction function"""
-    try:
-        input_csv_path = "data/input_reviews.csv" 
-        output_csv_path = "data/real_reviews.csv" 
-        output_pdf_path = "data/real_reviews.pdf" 
-        sentiment_stats_path = "data/sentiment_stats.json" 
-
-        logging.info(f"Reading {input_csv_path}...")
-        if not os.path.exists(input_csv_path):
-            logging.error(f"Input file {input_csv_path} not found!")
-            return False
+            df = pd.read_csv(input_csv_path)
+            logging.info(f"Loaded {len(df)} reviews for analysis")
 
-        df = pd.read_csv(input_csv_path)
-        logging.info(f"Loaded {len(df)} reviews for analysis")
+            # Score every review in one batch (sharded across processes when workers > 1)
+            logging.info("Starting review analysis...")
+            ratings = df['rating'].fillna(5) if 'rating' in df.columns else [5] * len(df)  # Default to 5 if no rating
+            if workers and workers > 1:
+                results = self.predict_parallel(df['text'].tolist(), list(ratings), workers=workers)
+            else:
+                results = self.predict(df['text'].tolist(), list(ratings))
+            
+            if SENTIMENT_PARITY_CHECK:
+                report = self.sentiment_engine.parity_check(results['text'].tolist())
+                logging.info(f"Sentiment parity vs TextBlob: {report}")
+            
+            if self.cache is not None:
+                logging.info(f"Prediction cache: {self.cache.stats()}")
+            
+            real = results[~results['is_fake']]
+            total_reviews = len(results)
+            real_reviews_count = len(real)
+            fake_reviews_count = total_reviews - real_reviews_count
+            
+            counts = real['sentiment'].value_counts()
+            sentiment_counts = {
+                "positive": int(counts.get("positive", 0)),
+                "neutral": int(counts.get("neutral", 0)),
+                "negative": int(counts.get("negative", 0))
+            }
+            
+            real_reviews_df = real[['text', 'rating', 'sentiment', 'confidence']].reset_index(drop=True)
 
-        # Initialize counters
-        real_reviews = []
-        real_reviews_df = []
-        sentiment_counts = {
-            "positive": 0,
-            "neutral": 0,
-            "negative": 0
-        }
-        total_reviews = 0
-        real_reviews_count = 0
-        fake_reviews_count = 0
+            sentiment_stats = build_sentiment_stats(sentiment_counts, total_reviews,
+                                                    real_reviews_count, fake_reviews_count)
+            return self._write_outputs(real_reviews_df, sentiment_stats, output_csv_path,
+                                       output_pdf_path, sentiment_stats_path)
 
-        # Process each review
-        logging.info("Starting review analysis...")
-        for idx, row in df.iterrows():
-            text = row['text']
-            rating = row.get('rating', 5)  # Default to 5 if no rating
-            total_reviews += 1
+        except Exception as e:
+            logging.error(f"Error analyzing {input_csv_path}: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
 
-            try:
-                # Predict using the trained model
-                result = predict_fake_review(text, rating)
-                
-                logging.debug(f"Review {idx}: Fake={result['is_fake']}, "
-                            f"Confidence={result['confidence']:.2%}, "
-                            f"Sentiment={result['sentiment']}")
-                
-                # Only keep real reviews
-                if not result['is_fake']:
-                    real_reviews_count += 1
-                    sentiment_counts[result['sentiment']] += 1
-                    
-                    real_reviews.append({
-                        'text': text,
-                        'rating': rating,
-                        'sentiment': result['sentiment']
-                    })
-                    real_reviews_df.append({
-                        'text': text,
-                        'rating': rating,
-                        'sentiment': result['sentiment'],
-                        'confidence': result['confidence']
-                    })
-                else:
-                    fake_reviews_count += 1
-                    
-            except Exception as e:
-                logging.error(f"Error processing review {idx}: {str(e)}")
-                continue
-
-        # Save statistics
-        sentiment_stats = {
-            "sentiment_counts": sentiment_counts,
-            "total_reviews": total_reviews,
-            "real_reviews_count": real_reviews_count,
-            "fake_reviews_count": fake_reviews_count,
-            "fake_percentage": (fake_reviews_count / total_reviews * 100) if total_reviews > 0 else 0
-        }
+    def _write_outputs(self, real_reviews_df, sentiment_stats, output_csv_path,
+                       output_pdf_path, sentiment_stats_path):
+        """Write sentiment_stats.json, real_reviews.csv and (optionally) the PDF"""
+        from scripts.review_store import write_review_store, store_dir_for
         
         with open(sentiment_stats_path, 'w') as f:
             json.dump(sentiment_stats, f, indent=2)
         logging.info(f"✓ Sentiment statistics saved to {sentiment_stats_path}")
-        logging.info(f"  Total: {total_reviews}, Real: {real_reviews_count}, Fake: {fake_reviews_count}")
+        logging.info(f"  Total: {sentiment_stats['total_reviews']}, "
+                     f"Real: {sentiment_stats['real_reviews_count']}, "
+                     f"Fake: {sentiment_stats['fake_reviews_count']}")
 
         # Save real reviews to CSV
-        if real_reviews_df:
-            pd.DataFrame(real_reviews_df).to_csv(output_csv_path, index=False)
+        if not real_reviews_df.empty:
+            real_reviews_df.to_csv(output_csv_path, index=False)
+            # Hand the frame straight to the summarizer in this process
+            put_real_reviews(output_csv_path, real_reviews_df)
+            # Columnar copy that /reviews pages through
+            write_review_store(real_reviews_df, store_dir_for(output_csv_path))
             logging.info(f"✓ Real reviews saved to {output_csv_path}")
         else:
             logging.warning("No real reviews found!")
             return False
 
-        # Generate PDF
-        if real_reviews:
-            success = generate_pdf(real_reviews, output_pdf_path)
-            if success:
-                logging.info(f"✓ PDF report saved to {output_pdf_path}")
-                return True
-            else:
-                logging.error("Failed to generate PDF")
+        # Generate PDF (optional export artifact)
+        if GENERATE_PDF_REPORT:
+            return export_pdf(output_csv_path, output_pdf_path)
+        if os.path.exists(output_pdf_path):
+            os.remove(output_pdf_path)  # stale export from a previous run
+        return True
+
+    def analyze_file_incremental(self, state_dir, input_csv_path="data/input_reviews.csv",
+                                 output_csv_path="data/real_reviews.csv",
+                                 output_pdf_path="data/real_reviews.pdf",
+                                 sentiment_stats_path="data/sentiment_stats.json",
+                                 workers=PREDICT_WORKERS, progress_callback=None):
+        """
+        Re-analyze a product against its previous analysis in state_dir
+        Reviews are matched by stable text hash: only reviews not seen last time
+        are scored, and sentiment_stats.json is updated by the per-review
+        count deltas. The first analysis of a product scores everything.
+        Returns True on success, False otherwise
+        """
+        import pandas as pd
+        
+        try:
+            if not os.path.exists(input_csv_path):
+                logging.error(f"Input file {input_csv_path} not found!")
                 return False
-        else:
-            logging.warning("No real reviews to generate PDF!")
+
+            df = pd.read_csv(input_csv_path)
+            df['text'] = ["" if pd.isna(t) else str(t) for t in df['text']]
+            df['rating'] = df['rating'].fillna(5) if 'rating' in df.columns else 5
+            df['review_id'] = [text_identity(t) for t in df['text']]
+
+            previous, stats = load_analysis_state(state_dir, self.model_id)
+            if previous is None:
+                logging.info(f"No reusable analysis for this product; scoring all {len(df)} reviews")
+                previous = pd.DataFrame(columns=ANALYSIS_STATE_COLUMNS)
+                stats = build_sentiment_stats({"positive": 0, "neutral": 0, "negative": 0}, 0, 0, 0)
+
+            # Occurrences of each review before and after (inputs may repeat a review)
+            delta = df['review_id'].value_counts().sub(previous['review_id'].value_counts(), fill_value=0)
+            delta = delta[delta != 0].astype(int)
+
+            known = previous.drop_duplicates('review_id').set_index('review_id')[list(ANALYSIS_STATE_COLUMNS[1:])]
+            added = df[~df['review_id'].isin(known.index)].drop_duplicates('review_id')
+            logging.info(f"Incremental analysis: {len(df)} reviews, {len(added)} new, "
+                         f"{int(-delta[delta < 0].sum())} dropped")
+
+            if len(added):
+                if workers and workers > 1:
+                    results = self.predict_parallel(added['text'].tolist(), added['rating'].tolist(), workers=workers)
+                else:
+                    results = self.predict(added['text'].tolist(), added['rating'].tolist())
+                results.index = added['review_id'].values
+                known = pd.concat([known, results[list(ANALYSIS_STATE_COLUMNS[1:])]])
+            if progress_callback:
+                progress_callback({"chunks": 1, "processed": len(df), "new": len(added), "percent": 99.0})
+
+            # Apply the count deltas instead of recounting every review
+            changed = known.loc[delta.index]
+            is_real = ~changed['is_fake'].astype(bool)
+            sentiment_counts = dict(stats['sentiment_counts'])
+            for sentiment, count in delta[is_real.values].groupby(changed['sentiment'][is_real].values).sum().items():
+                sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + int(count)
+            total_reviews = stats['total_reviews'] + int(delta.sum())
+            real_reviews_count = stats['real_reviews_count'] + int(delta[is_real.values].sum())
+            sentiment_stats = build_sentiment_stats(sentiment_counts, total_reviews, real_reviews_count,
+                                                    total_reviews - real_reviews_count)
+
+            scored = known.loc[df['review_id']].reset_index(drop=True)
+            state = pd.concat([df['review_id'].reset_index(drop=True), scored], axis=1)
+            save_analysis_state(state_dir, state, sentiment_stats, self.model_id)
+
+            real = ~state['is_fake'].astype(bool).values
+            real_reviews_df = pd.concat([df[['text', 'rating']].reset_index(drop=True),
+                                         scored[['sentiment', 'confidence']]], axis=1)[real].reset_index(drop=True)
+            success = self._write_outputs(real_reviews_df, sentiment_stats, output_csv_path,
+                                          output_pdf_path, sentiment_stats_path)
+            if progress_callback:
+                progress_callback({"chunks": 1, "processed": len(df), "new": len(added), "percent": 100.0})
+            return success
+
+        except Exception as e:
+            logging.error(f"Error in incremental analysis of {input_csv_path}: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    def analyze_run(self, run_id=None, incremental=PREDICT_INCREMENTAL, **kwargs):
+        """
+        Run analyze_file on a run's workspace (the shared data/ directory when run_id is None)
+        With incremental set, runs scraped from a known product reuse that product's last analysis;
+        a stream_chunk_size takes precedence, since incremental analysis loads the whole input
+        """
+        paths = run_paths(run_id)
+        product_url = read_product_url(run_id) if incremental else None
+        if product_url and kwargs.get('stream_chunk_size'):
+            logging.info("Streaming the input in chunks; skipping incremental analysis for this run")
+            product_url = None
+        if product_url:
+            kwargs.pop('stream_chunk_size', None)
+            return self.analyze_file_incremental(analysis_state_dir(product_url, create=True),
+                                                 input_csv_path=paths['input_csv'],
+                                                 output_csv_path=paths['real_csv'],
+                                                 output_pdf_path=paths['real_pdf'],
+                                                 sentiment_stats_path=paths['sentiment_stats'],
+                                                 **kwargs)
+        return self.analyze_file(input_csv_path=paths['input_csv'],
+                                 output_csv_path=paths['real_csv'],
+                                 output_pdf_path=paths['real_pdf'],
+                                 sentiment_stats_path=paths['sentiment_stats'],
+                                 **kwargs)
+    
+    def analyze_file_streaming(self, input_csv_path="data/input_reviews.csv",
+                               output_csv_path="data/real_reviews.csv",
+                               output_pdf_path="data/real_reviews.pdf",
+                               sentiment_stats_path="data/sentiment_stats.json",
+                               chunk_size=PREDICT_CHUNK_SIZE, workers=PREDICT_WORKERS,
+                               progress_callback=None):
+        """
+        Same outputs as analyze_file, but reads, scores and writes the input
+        chunk by chunk so peak memory stays O(chunk_size) for any input size.
+        progress_callback (if given) receives a dict after every chunk
+        """
+        import pandas as pd
+        from scripts.review_store import ReviewStoreWriter, store_dir_for
+        
+        try:
+            logging.info(f"Streaming {input_csv_path} in chunks of {chunk_size}...")
+            if not os.path.exists(input_csv_path):
+                logging.error(f"Input file {input_csv_path} not found!")
+                return False
+            
+            file_size = os.path.getsize(input_csv_path) or 1
+            sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
+            total_reviews = 0
+            real_reviews_count = 0
+            
+            # Write to a temp file so readers never see a half-written CSV
+            partial_csv_path = output_csv_path + ".partial"
+            header_written = False
+            store_writer = ReviewStoreWriter(store_dir_for(output_csv_path))
+            
+            with open(input_csv_path, 'r', encoding='utf-8') as f:
+                for chunk_number, df in enumerate(pd.read_csv(f, chunksize=chunk_size), start=1):
+                    ratings = df['rating'].fillna(5) if 'rating' in df.columns else [5] * len(df)
+                    if workers and workers > 1:
+                        results = self.predict_parallel(df['text'].tolist(), list(ratings), workers=workers)
+                    else:
+                        results = self.predict(df['text'].tolist(), list(ratings))
+                    
+                    real = results[~results['is_fake']]
+                    total_reviews += len(results)
+                    real_reviews_count += len(real)
+                    for sentiment, count in real['sentiment'].value_counts().items():
+                        sentiment_counts[sentiment] += int(count)
+                    
+                    real_chunk = real[['text', 'rating', 'sentiment', 'confidence']]
+                    real_chunk.to_csv(
+                        partial_csv_path, mode='w' if not header_written else 'a',
+                        header=not header_written, index=False
+                    )
+                    store_writer.append(real_chunk)
+                    header_written = True
+                    
+                    progress = {
+                        "chunks": chunk_number,
+                        "processed": total_reviews,
+                        "real": real_reviews_count,
+                        "percent": min(99.0, f.tell() / file_size * 100)
+                    }
+                    logging.info(f"  Chunk {chunk_number}: {total_reviews} reviews processed "
+                                 f"({progress['percent']:.0f}%)")
+                    if progress_callback:
+                        progress_callback(progress)
+            
+            if self.cache is not None:
+                logging.info(f"Prediction cache: {self.cache.stats()}")
+            
+            fake_reviews_count = total_reviews - real_reviews_count
+            sentiment_stats = build_sentiment_stats(sentiment_counts, total_reviews,
+                                                    real_reviews_count, fake_reviews_count)
+            
+            with open(sentiment_stats_path, 'w') as f:
+                json.dump(sentiment_stats, f, indent=2)
+            logging.info(f"✓ Sentiment statistics saved to {sentiment_stats_path}")
+            logging.info(f"  Total: {total_reviews}, Real: {real_reviews_count}, Fake: {fake_reviews_count}")
+            
+            if real_reviews_count == 0:
+                if os.path.exists(partial_csv_path):
+                    os.remove(partial_csv_path)
+                store_writer.abort()
+                logging.warning("No real reviews found!")
+                return False
+            
+            os.replace(partial_csv_path, output_csv_path)
+            store_writer.close()
+            logging.info(f"✓ Real reviews saved to {output_csv_path}")
+            
+            if progress_callback:
+                progress_callback({"chunks": chunk_number, "processed": total_reviews,
+                                   "real": real_reviews_count, "percent": 100.0})
+            
+            # Render the PDF from the written CSV, again one chunk at a time
+            if GENERATE_PDF_REPORT:
+                return export_pdf(output_csv_path, output_pdf_path, chunk_size)
+            if os.path.exists(output_pdf_path):
+                os.remove(output_pdf_path)  # stale export from a previous run
+            return True
+        
+        except Exception as e:
+            logging.error(f"Error streaming {input_csv_path}: {str(e)}")
+            import traceback
+            traceback.print_exc()
             return False
 
+_predictor = None
+_predictor_lock = threading.Lock()
+
+# Forking is only safe from the predict.py command line, which runs no other threads;
+# set in the __main__ block below
+_FORK_WORKERS = False
+
+# Predictor used by pool workers: inherited from the parent when forked (set only while
+# a pool is running), otherwise loaded by _init_pool_worker
+_pool_predictor = None
+
+def _init_pool_worker(model_path, model_format, sentiment_backend):
+    """Pool initializer for forkserver/spawn workers: load this worker's own predictor"""
+    global _pool_predictor
+    components = load_model_components(model_path, model_format)
+    _pool_predictor = ReviewPredictor(components, model_path, sentiment_backend, use_cache=False)
+
+def _score_chunk(chunk):
+    """Pool worker: score one chunk with the worker's predictor"""
+    texts, cleaned = chunk
+    return _pool_predictor._score(texts, cleaned)
+
+def get_predictor():
+    """Return the process-wide ReviewPredictor, creating it on first use"""
+    global _predictor
+    
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                try:
+                    components = get_model_components()
+                except Exception as e:
+                    logging.error(f"Could not load model: {e}")
+                    raise ValueError("Model not loaded! Check model path.") from e
+                _predictor = ReviewPredictor(components)
+    return _predictor
+
+def loaded_predictor():
+    """The process-wide ReviewPredictor if it has been created already, else None (never loads it)"""
+    return _predictor
+
+def predict_fake_reviews(texts, ratings=None):
+    """
+    Predict fake/real for a batch of reviews in a single vectorized pass
+    Returns a DataFrame (one row per input review, same order)
+    """
+    return get_predictor().predict(texts, ratings)
+
+def predict_fake_review(text, rating=5):
+    """
+    Predict if a review is fake or real
+    Returns dict with prediction, probabilities, and sentiment
+    """
+    row = predict_fake_reviews([text], [rating]).iloc[0]
+    return {
+        'is_fake': bool(row['is_fake']),
+        'fake_probability': row['fake_probability'],
+        'real_probability': row['real_probability'],
+        'confidence': row['confidence'],
+        'sentiment': row['sentiment'],
+        'sentiment_score': row['sentiment_score'],
+        'model_used': row['model_used']
+    }
+
+def main(workers=PREDICT_WORKERS, stream_chunk_size=PREDICT_STREAM_CHUNK_SIZE, run_id=None,
+         incremental=PREDICT_INCREMENTAL):
+    """Main prediction function"""
+    try:
+        return get_predictor().analyze_run(run_id, incremental=incremental, workers=workers,
+                                           stream_chunk_size=stream_chunk_size)
     except Exception as e:
         logging.error(f"Error in main function: {str(e)}")
         import traceback
@@ -228,7 +868,23 @@ def main():
         return False
 
 if __name__ == "__main__":
-    success = main()
+    import argparse
+    
+    _FORK_WORKERS = True
+    parser = argparse.ArgumentParser(description="Detect fake reviews in input_reviews.csv")
+    parser.add_argument("--workers", type=int, default=PREDICT_WORKERS,
+                        help="number of processes to shard scoring across (0 = all cores)")
+    parser.add_argument("--stream-chunk-size", type=int, default=PREDICT_STREAM_CHUNK_SIZE,
+                        help="stream the input this many rows at a time to bound memory")
+    parser.add_argument("--run-id", default=None,
+                        help="analyze the workspace of this run instead of data/")
+    parser.add_argument("--full", action="store_true",
+                        help="re-score every review instead of only those new since the last analysis")
+    args = parser.parse_args()
+    
+    success = main(workers=args.workers if args.workers > 0 else os.cpu_count(),
+                   stream_chunk_size=args.stream_chunk_size, run_id=args.run_id,
+                   incremental=PREDICT_INCREMENTAL and not args.full)
     if success:
         sys.exit(0)
     else:
@@ -0,0 +1,168 @@
+"""
+Persistent Prediction Cache
+Content-addressed SQLite store of per-review predictions, keyed by the hash of
+the raw review text (features and sentiment are both derived from it) plus the
+model package identity
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Bumped whenever what a key hashes changes, so older entries are dropped
+KEY_SCHEME = "raw-text"
+
+
+def model_identifier(model_path, *extra):
+    """
+    Identify a model package by path, size and modification time
+    (plus any extra settings that change the cached values, e.g. sentiment backend)
+    """
+    try:
+        stat = os.stat(model_path)
+        parts = [os.path.abspath(model_path), str(stat.st_size), str(int(stat.st_mtime))]
+    except OSError:
+        parts = [os.path.abspath(model_path)]
+    parts.extend(str(e) for e in extra)
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
+
+
+class PredictionCache:
+    """
+    Size-bounded LRU cache of predictions on disk
+    Entries are invalidated automatically when the model identifier changes;
+    the size limit is enforced at open and then every EVICT_INTERVAL inserts,
+    so it may be exceeded by up to that many entries in between
+    """
+
+    COLUMNS = ('is_fake', 'fake_probability', 'real_probability', 'sentiment_score')
+    EVICT_INTERVAL = 1000
+
+    def __init__(self, path, model_id, max_entries=500000):
+        self.path = path
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._inserted_since_evict = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, is_fake INTEGER, fake_probability REAL, "
+            "real_probability REAL, sentiment_score REAL, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_last_used ON predictions (last_used)")
+        self._check_model()
+        self._evict()
+        self._conn.commit()
+
+    def _check_model(self):
+        """Drop every cached prediction if they were produced by a different model or key scheme"""
+        identity = f"{self.model_id}|{KEY_SCHEME}"
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'model_id'").fetchone()
+        if row is not None and row[0] == identity:
+            return
+        if row is not None:
+            logging.info("Model package or cache key scheme changed; clearing prediction cache")
+        self._conn.execute("DELETE FROM predictions")
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model_id', ?)", (identity,))
+
+    @staticmethod
+    def key_for(text):
+        """Content address of a raw review text"""
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: prediction dict} for every key present in the cache"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, is_fake, fake_probability, real_probability, sentiment_score "
+                    f"FROM predictions WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, is_fake, fake_p, real_p, sentiment_score in rows:
+                    found[key] = {
+                        'is_fake': bool(is_fake),
+                        'fake_probability': fake_p,
+                        'real_probability': real_p,
+                        'sentiment_score': sentiment_score
+                    }
+
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE predictions SET last_used = ? WHERE key = ?",
+                                       [(now, key) for key in found])
+                self._conn.commit()
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, entries):
+        """Store {key: prediction dict}; least recently used entries over the limit are evicted periodically"""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions "
+                "(key, is_fake, fake_probability, real_probability, sentiment_score, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, int(bool(p['is_fake'])), float(p['fake_probability']),
+                  float(p['real_probability']), float(p['sentiment_score']), now)
+                 for key, p in entries.items()]
+            )
+            # Counting the table on every insert is a full scan; check the size periodically instead
+            self._inserted_since_evict += len(entries)
+            if self._inserted_since_evict >= self.EVICT_INTERVAL:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._inserted_since_evict = 0
+        count = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM predictions WHERE key IN "
+                "(SELECT key FROM predictions ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / total) if total else 0.0,
+            'entries': size,
+            'max_entries': self.max_entries
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM predictions")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
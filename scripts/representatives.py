@@ -0,0 +1,98 @@
+"""
+Representative Review Selection
+Picks the reviews closest to each sentiment group's TF-IDF centroid, kept
+diverse with maximal marginal relevance (MMR). Similarities are computed in
+fixed-size row blocks and only a partial-sorted candidate pool per group is
+kept, so memory does not grow with the number of reviews
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+
+BLOCK_SIZE = 50000
+POOL_PER_PICK = 10
+
+
+def _inverse_row_norms(matrix):
+    """1 / L2 norm of every row of a csr matrix (0 for empty rows), without a normalized copy"""
+    rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+    norms = np.sqrt(np.bincount(rows, weights=matrix.data ** 2, minlength=matrix.shape[0]))
+    return np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+
+
+def group_centroids(matrix, codes, n_groups):
+    """
+    Unit-length centroid of each group's L2-normalized rows (rows with code < 0
+    are ignored), as a dense (n_groups, n_features) array
+    """
+    valid = np.flatnonzero(codes >= 0)
+    membership = sp.csr_matrix((_inverse_row_norms(matrix)[valid], (codes[valid], valid)),
+                               shape=(n_groups, matrix.shape[0]))
+    centroids = np.asarray((membership @ matrix).todense())
+    norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+    return centroids / np.where(norms > 0, norms, 1.0)
+
+
+def _merge_top(best_rows, best_scores, rows, scores, k):
+    """Keep the k highest scores from the current pool plus a new batch (partial sort)"""
+    rows = np.concatenate([best_rows, rows])
+    scores = np.concatenate([best_scores, scores])
+    if len(scores) > k:
+        keep = np.argpartition(scores, -k)[-k:]
+        rows, scores = rows[keep], scores[keep]
+    return rows, scores
+
+
+def mmr(candidates, relevance, n, diversity=0.3):
+    """
+    Order up to n candidate rows (L2-normalized sparse matrix) by maximal marginal relevance
+    Returns positions into candidates
+    """
+    if candidates.shape[0] == 0:
+        return []
+    similarity = (candidates @ candidates.T).toarray()
+    selected = [int(np.argmax(relevance))]
+    redundancy = similarity[selected[0]].copy()
+
+    while len(selected) < min(n, candidates.shape[0]):
+        scores = (1 - diversity) * relevance - diversity * redundancy
+        scores[selected] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        np.maximum(redundancy, similarity[pick], out=redundancy)
+    return selected
+
+
+def select_representatives(matrix, codes, n_groups, n=3, diversity=0.3, block_size=BLOCK_SIZE):
+    """
+    Row indices of up to n representative reviews per group
+    matrix: sparse (reviews x features) TF-IDF; codes: group index per review (-1 = skip)
+    One pass builds the centroids, a second blocked pass scores every review
+    against its group's centroid while keeping only the top pool per group
+    """
+    matrix = sp.csr_matrix(matrix)
+    codes = np.asarray(codes)
+    centroids = group_centroids(matrix, codes, n_groups)
+    pool_size = max(n, n * POOL_PER_PICK)
+
+    pools = [(np.zeros(0, dtype=np.int64), np.zeros(0)) for _ in range(n_groups)]
+    for start in range(0, matrix.shape[0], block_size):
+        block = normalize(matrix[start:start + block_size])
+        block_codes = codes[start:start + block_size]
+        # Similarity of every row to its own group's centroid
+        similarity = np.asarray(block @ centroids.T)
+        own = similarity[np.arange(len(block_codes)), np.maximum(block_codes, 0)]
+
+        for group in range(n_groups):
+            members = np.flatnonzero(block_codes == group)
+            if len(members):
+                pools[group] = _merge_top(*pools[group], members + start, own[members], pool_size)
+
+    selected = []
+    for rows, scores in pools:
+        order = np.argsort(scores)[::-1]
+        rows, scores = rows[order], scores[order]
+        picks = mmr(normalize(matrix[rows]), scores, n, diversity)
+        selected.append([int(rows[p]) for p in picks])
+    return selected
@@ -0,0 +1,215 @@
+"""
+Review TF-IDF Matrices for Summarization
+Key phrases come from matrices that already exist instead of a TfidfVectorizer
+fitted per request: the prediction model's fitted vectorizer transforms the
+reviews (cached per run next to real_reviews.csv; loaded alone from the
+compact export when no predictor is loaded), and corpora too large for
+exact n-gram vocabularies go through a fixed-size hashing pass
+"""
+
+import hashlib
+import os
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, HashingVectorizer
+from sklearn.utils import murmurhash3_32
+
+
+def matrix_path_for(csv_path, model_id):
+    """Per-run cache file for a real_reviews.csv, tied to the model that produced it"""
+    tag = hashlib.sha1(model_id.encode('utf-8')).hexdigest()[:12]
+    return f"{os.path.splitext(csv_path)[0]}.tfidf-{tag}.npz"
+
+
+def _clean_one(text):
+    """clean_text() for one review, without importing the predictor"""
+    from scripts.fused_features import clean_texts
+    return clean_texts([text])[0]
+
+
+# Vectorizers loaded from compact exports, by model id (one model at a time)
+_compact_vectorizers = {}
+
+
+def _compact_vectorizer(model_path):
+    """The model's vectorizer alone, memory-mapped from its compact export (LookupError if none)"""
+    from scripts.compact_model import compact_path_for, load_compact_vectorizer
+    from scripts.prediction_cache import model_identifier
+
+    model_id = model_identifier(model_path)
+    if model_id not in _compact_vectorizers:
+        package_dir = compact_path_for(model_path)
+        if not os.path.isdir(package_dir):
+            raise LookupError(f"No compact export at {package_dir}; "
+                              f"run: python scripts/compact_model.py export")
+        source_id = model_id if os.path.exists(model_path) else None
+        vectorizer = load_compact_vectorizer(package_dir, {"clean_text": _clean_one}, source_id)
+        _compact_vectorizers.clear()
+        _compact_vectorizers[model_id] = vectorizer
+    return _compact_vectorizers[model_id]
+
+
+def model_vectorizer_available():
+    """True when the model vectorizer can be used without loading the prediction model"""
+    from scripts.compact_model import compact_path_for
+    import scripts.predict as predict_module
+
+    return (predict_module.loaded_predictor() is not None
+            or os.path.isdir(compact_path_for(predict_module.MODEL_PATH)))
+
+
+def _model_vectorizer():
+    """
+    (fitted vectorizer, raw texts -> matrix function, model id) in the prediction model's
+    feature space: the vectorizer of a predictor already loaded in this process, otherwise
+    only the vectorizer of the model's compact export, so summarizing never loads the
+    classifier. LookupError when neither is available
+    """
+    from scripts.fused_features import clean_texts, featurizer_for
+    from scripts.prediction_cache import model_identifier
+    import scripts.predict as predict_module
+
+    predictor = predict_module.loaded_predictor()
+    if predictor is not None:
+        model_path, vectorizer, featurizer = predictor.model_path, predictor.vectorizer, predictor.featurizer
+    else:
+        model_path = predict_module.MODEL_PATH
+        vectorizer = _compact_vectorizer(model_path)
+        try:
+            featurizer = featurizer_for(vectorizer, None)
+        except ValueError:
+            featurizer = None
+
+    if featurizer is not None:
+        def transform(texts):
+            return featurizer.transform(clean_texts(texts))
+    else:
+        def transform(texts):
+            return vectorizer.transform(clean_texts(texts))
+    # The matrix depends only on the vectorizer, so both sources share cache files
+    return vectorizer, transform, model_identifier(model_path)
+
+
+# Feature names (and their stop-word masks) of the model vectorizer; vocabularies
+# are large, so they are built once per vectorizer rather than per summary
+_vocabulary = {}
+
+
+def _feature_names(vectorizer):
+    if id(vectorizer) not in _vocabulary:
+        _vocabulary.clear()
+        _vocabulary[id(vectorizer)] = vectorizer.get_feature_names_out()
+    return _vocabulary[id(vectorizer)]
+
+
+def get_review_matrix(texts, csv_path=None):
+    """
+    TF-IDF matrix of texts in the model vectorizer's feature space
+    Returns (csr matrix, feature names); reused from csv_path's cache file when
+    it is newer than the CSV and has one row per text
+    """
+    vectorizer, transform, model_id = _model_vectorizer()
+    feature_names = _feature_names(vectorizer)
+
+    cache_path = matrix_path_for(csv_path, model_id) if csv_path else None
+    if cache_path and os.path.exists(cache_path) and os.path.exists(csv_path):
+        if os.path.getmtime(cache_path) >= os.path.getmtime(csv_path):
+            matrix = sp.load_npz(cache_path).tocsr()
+            if matrix.shape[0] == len(texts):
+                return matrix, feature_names
+
+    matrix = transform(texts).tocsr()
+    if cache_path:
+        sp.save_npz(cache_path, matrix)
+    return matrix, feature_names
+
+
+_stop_masks = {}
+
+
+def _stop_word_mask(feature_names):
+    key = (id(feature_names), len(feature_names))
+    mask = _stop_masks.get(key)
+    if mask is None:
+        mask = np.fromiter((any(word in ENGLISH_STOP_WORDS for word in name.split()) for name in feature_names),
+                           dtype=bool, count=len(feature_names))
+        _stop_masks.clear()
+        _stop_masks[key] = mask
+    return mask
+
+
+def top_phrases(matrix, feature_names, top_n=10, min_df=2):
+    """
+    Phrases with the highest mean TF-IDF, ignoring stop-word n-grams and
+    phrases found in fewer than min_df reviews (same rules as the fitted path)
+    """
+    if matrix.shape[0] == 0:
+        return []
+    scores = np.asarray(matrix.mean(axis=0)).ravel()
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+
+    eligible = document_frequency >= min(min_df, matrix.shape[0])
+    eligible &= ~_stop_word_mask(feature_names)
+    scores = np.where(eligible, scores, 0.0)
+
+    top_n = min(top_n, int((scores > 0).sum()))
+    if top_n == 0:
+        return []
+    top = np.argpartition(scores, -top_n)[-top_n:]
+    top = top[np.argsort(scores[top])[::-1]]
+    return [str(feature_names[i]) for i in top]
+
+
+def _bucket(ngram, n_features):
+    """Column HashingVectorizer assigns to an n-gram"""
+    h = murmurhash3_32(ngram, seed=0)
+    if h == -2147483648:
+        return (2147483647 - (n_features - 1)) % n_features
+    return abs(h) % n_features
+
+
+def hashed_key_phrases(texts, top_n=10, ngram_range=(1, 3), n_features=2 ** 20,
+                       chunk_size=10000, min_df=2):
+    """
+    Key phrases for very large corpora in fixed memory
+    Pass 1 hashes 1-3 grams chunk by chunk into n_features buckets and accumulates
+    TF-IDF mass and document frequency per bucket; pass 2 re-reads texts only
+    until every winning bucket has been mapped back to its n-gram
+    """
+    hasher = HashingVectorizer(ngram_range=ngram_range, stop_words='english', n_features=n_features,
+                               alternate_sign=False, norm='l2')
+    texts = list(texts)
+    if not texts:
+        return []
+
+    mass = np.zeros(n_features, dtype=np.float64)
+    document_frequency = np.zeros(n_features, dtype=np.int64)
+    for start in range(0, len(texts), chunk_size):
+        chunk = hasher.transform(texts[start:start + chunk_size]).tocsr()
+        mass += np.asarray(chunk.sum(axis=0)).ravel()
+        document_frequency += np.bincount(chunk.indices, minlength=n_features)
+
+    idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+    scores = np.where(document_frequency >= min(min_df, len(texts)), mass * idf, 0.0)
+
+    # A few spare buckets in case some are never mapped back to an n-gram
+    candidates = min(top_n * 2, int((scores > 0).sum()))
+    if candidates == 0:
+        return []
+    top = np.argpartition(scores, -candidates)[-candidates:]
+    top = top[np.argsort(scores[top])[::-1]]
+
+    names = {}
+    unresolved = set(top.tolist())
+    analyzer = hasher.build_analyzer()
+    for text in texts:
+        for ngram in analyzer(text):
+            bucket = _bucket(ngram, n_features)
+            if bucket in unresolved:
+                names[bucket] = ngram
+                unresolved.discard(bucket)
+        if not unresolved:
+            break
+
+    return [names[b] for b in top.tolist() if b in names][:top_n]
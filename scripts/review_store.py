@@ -0,0 +1,203 @@
+"""
+Columnar Review Store
+Real reviews persisted as flat, memory-mapped NumPy columns next to
+real_reviews.csv so /reviews can filter and page through them without
+re-parsing the CSV or building one dict per row
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+STORE_VERSION = 1
+# The sentiment labels used across the app; stored sentiments are indexes into
+# this tuple, so it must never be reordered (import it rather than copying it)
+SENTIMENTS = ("negative", "neutral", "positive")
+FIELDS = ("text", "rating", "sentiment", "confidence")
+
+# Fixed-width columns: name -> dtype on disk
+_COLUMNS = {
+    "rating": np.int16,
+    "sentiment": np.int8,
+    "confidence": np.float32,
+}
+_SENTIMENT_CODES = {name: code for code, name in enumerate(SENTIMENTS)}
+
+
+def store_dir_for(csv_path):
+    """Store directory that mirrors a real_reviews.csv (e.g. real_reviews.store/)"""
+    return os.path.splitext(csv_path)[0] + ".store"
+
+
+class ReviewStoreWriter:
+    """
+    Append DataFrame chunks to a new store; close() publishes it
+    Files are written into a temporary directory that replaces the old store at the end
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.partial_dir = store_dir + ".partial"
+        shutil.rmtree(self.partial_dir, ignore_errors=True)
+        os.makedirs(self.partial_dir)
+        self.count = 0
+        self._files = {name: open(os.path.join(self.partial_dir, f"{name}.bin"), 'wb')
+                       for name in (*_COLUMNS, "text", "text_lengths")}
+
+    def append(self, df):
+        """Append a chunk with text/rating/sentiment/confidence columns"""
+        if df.empty:
+            return
+        encoded = [("" if isinstance(t, float) else str(t)).encode('utf-8') for t in df['text']]
+        self._files["text"].write(b"".join(encoded))
+        np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)).tofile(self._files["text_lengths"])
+
+        ratings = df['rating'].fillna(3).to_numpy(dtype=np.float64)
+        ratings.astype(_COLUMNS["rating"]).tofile(self._files["rating"])
+        df['sentiment'].map(_SENTIMENT_CODES).fillna(_SENTIMENT_CODES["neutral"]).to_numpy(
+            dtype=_COLUMNS["sentiment"]).tofile(self._files["sentiment"])
+        df['confidence'].fillna(0.0).to_numpy(dtype=_COLUMNS["confidence"]).tofile(self._files["confidence"])
+        self.count += len(df)
+
+    def abort(self):
+        """Drop the partially written store"""
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self.partial_dir, ignore_errors=True)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+
+        # Turn per-review byte lengths into offsets (count + 1 entries)
+        lengths_path = os.path.join(self.partial_dir, "text_lengths.bin")
+        lengths = np.fromfile(lengths_path, dtype=np.int64)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        offsets.tofile(os.path.join(self.partial_dir, "text_offsets.bin"))
+        os.remove(lengths_path)
+
+        with open(os.path.join(self.partial_dir, "meta.json"), 'w') as f:
+            json.dump({"version": STORE_VERSION, "count": self.count}, f)
+
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+        os.replace(self.partial_dir, self.store_dir)
+        return self.store_dir
+
+
+def write_review_store(df, store_dir):
+    """Write a whole real-reviews DataFrame as a store"""
+    writer = ReviewStoreWriter(store_dir)
+    writer.append(df)
+    return writer.close()
+
+
+def build_review_store(csv_path, chunk_size=20000):
+    """(Re)build the store for a real_reviews.csv, reading it one chunk at a time"""
+    import pandas as pd
+
+    writer = ReviewStoreWriter(store_dir_for(csv_path))
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        writer.append(chunk)
+    return writer.close()
+
+
+class ReviewStore:
+    """Read-only, memory-mapped view of a store"""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, "meta.json"), 'r') as f:
+            meta = json.load(f)
+        if meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported review store version in {store_dir}")
+        self.count = meta["count"]
+
+        self.columns = {name: self._map(f"{name}.bin", dtype) for name, dtype in _COLUMNS.items()}
+        self.text_offsets = self._map("text_offsets.bin", np.int64)
+        self.text = self._map("text.bin", np.uint8)
+
+    def _map(self, filename, dtype):
+        path = os.path.join(self.store_dir, filename)
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def select(self, sentiments=None, min_rating=None, max_rating=None):
+        """Row numbers matching the filters, in stored order"""
+        mask = np.ones(self.count, dtype=bool)
+        if sentiments:
+            codes = [_SENTIMENT_CODES[s] for s in sentiments if s in _SENTIMENT_CODES]
+            mask &= np.isin(self.columns["sentiment"], codes)
+        if min_rating is not None:
+            mask &= self.columns["rating"] >= min_rating
+        if max_rating is not None:
+            mask &= self.columns["rating"] <= max_rating
+        return np.flatnonzero(mask)
+
+    def texts(self, rows):
+        """Decode the review texts of the given rows (only the requested page is touched)"""
+        starts = self.text_offsets[rows]
+        ends = self.text_offsets[rows + 1]
+        data = self.text
+        return [bytes(data[start:end]).decode('utf-8') for start, end in zip(starts.tolist(), ends.tolist())]
+
+    def page(self, offset=0, limit=50, fields=FIELDS, sentiments=None, min_rating=None, max_rating=None):
+        """
+        Return (matching row count, {field: list of values}) for one page of results
+        Columns come out as whole lists, ready to serialize without per-row dicts
+        """
+        rows = self.select(sentiments, min_rating, max_rating)
+        page_rows = rows[offset:offset + limit]
+
+        columns = {}
+        for field in fields:
+            if field == "text":
+                columns["text"] = self.texts(page_rows)
+            elif field == "sentiment":
+                columns["sentiment"] = np.asarray(SENTIMENTS)[self.columns["sentiment"][page_rows]].tolist()
+            elif field == "confidence":
+                columns["confidence"] = self.columns["confidence"][page_rows].astype(np.float64).round(4).tolist()
+            elif field == "rating":
+                columns["rating"] = self.columns["rating"][page_rows].tolist()
+        return len(rows), columns
+
+
+# Open stores keyed by directory, revalidated against meta.json's mtime
+STORE_CACHE_MAX = 16
+_stores = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def get_review_store(csv_path):
+    """
+    Open (or reuse) the store for a real_reviews.csv
+    Builds it from the CSV when it is missing or older than the CSV
+    """
+    store_dir = store_dir_for(csv_path)
+    meta_path = os.path.join(store_dir, "meta.json")
+    try:
+        mtime = os.path.getmtime(meta_path)
+        if mtime < os.path.getmtime(csv_path):
+            raise FileNotFoundError(meta_path)
+    except FileNotFoundError:
+        with _stores_lock:
+            build_review_store(csv_path)
+        mtime = os.path.getmtime(meta_path)
+
+    with _stores_lock:
+        entry = _stores.get(store_dir)
+        if entry is not None and entry[0] == mtime:
+            _stores.move_to_end(store_dir)
+            return entry[1]
+
+        store = ReviewStore(store_dir)
+        _stores[store_dir] = (mtime, store)
+        _stores.move_to_end(store_dir)
+        while len(_stores) > STORE_CACHE_MAX:
+            _stores.popitem(last=False)
+        return store
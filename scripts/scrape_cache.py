@@ -0,0 +1,180 @@
+"""
+Scrape Result Cache
+Persistent SQLite cache of scraped reviews per normalized product URL with
+TTL, stale-while-revalidate and incremental merging of newly seen reviews
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+from scripts.text_identity import text_identity
+
+# Query parameters that never change which reviews a page shows
+_TRACKING_PARAMS = re.compile(r'^(utm_.*|ath[a-z]*|classType|from|sid|ref.*|gclid|fbclid)$', re.I)
+_WALMART_ITEM_RE = re.compile(r'/ip/(?:[^/]+/)?(\d+)')
+
+
+def normalize_product_url(url):
+    """
+    Canonical cache key for a product URL (same normalization as app.extract_product_url,
+    plus lowercase host, no fragment/tracking parameters, and Walmart /ip/<slug>/<id> -> /ip/<id>)
+    """
+    url = url.strip()
+    if not url.startswith('http'):
+        url = 'https://' + url
+
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+
+    path = parsed.path.rstrip('/') or '/'
+    item = _WALMART_ITEM_RE.search(path)
+    if host.endswith('walmart.com') and item:
+        path = f"/ip/{item.group(1)}"
+
+    query = sorted((k, v) for k, v in parse_qsl(parsed.query) if not _TRACKING_PARAMS.match(k))
+    return urlunparse(('https', host, path, '', urlencode(query), ''))
+
+
+def review_identity(review):
+    """Stable identity of a review dict (see text_identity)"""
+    return text_identity(review.get('text', ''))
+
+
+class ScrapeCache:
+    """
+    Entries are 'fresh' for ttl_seconds, then 'stale' (served while a refresh runs)
+    for another stale_seconds, then 'expired' (must be re-scraped before use)
+    """
+
+    def __init__(self, path, ttl_seconds=3600, stale_seconds=86400, max_reviews=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_reviews = max_reviews
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scrapes ("
+            "url_key TEXT PRIMARY KEY, url TEXT, fetched_at REAL, revalidating_since REAL, "
+            "reviews TEXT, payload BLOB, latest_count INTEGER)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(scrapes)")}
+        if "latest_count" not in columns:
+            self._conn.execute("ALTER TABLE scrapes ADD COLUMN latest_count INTEGER")
+        self._conn.commit()
+
+    def _state(self, fetched_at):
+        age = time.time() - fetched_at
+        if age < self.ttl_seconds:
+            return 'fresh'
+        if age < self.ttl_seconds + self.stale_seconds:
+            return 'stale'
+        return 'expired'
+
+    def get(self, product_url):
+        """
+        Return {'reviews', 'fetched_at', 'age', 'state'} for a product, or None
+        'reviews' are those seen by the last fetch, not everything merged before it
+        """
+        key = normalize_product_url(product_url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, reviews, latest_count FROM scrapes WHERE url_key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        fetched_at, reviews, latest_count = row
+        reviews = json.loads(reviews)
+        return {
+            'reviews': reviews if latest_count is None else reviews[:latest_count],
+            'fetched_at': fetched_at,
+            'age': time.time() - fetched_at,
+            'state': self._state(fetched_at)
+        }
+
+    def get_payload(self, product_url):
+        """Raw API results stored with the last fetch (list of result dicts)"""
+        key = normalize_product_url(product_url)
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM scrapes WHERE url_key = ?", (key,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def put(self, product_url, reviews, raw_results=None):
+        """
+        Merge freshly scraped reviews into the cached set by review identity
+        Returns (merged_reviews, new_review_count); fresh reviews come first and
+        their count is kept so get() serves only the latest fetch
+        """
+        key = normalize_product_url(product_url)
+        with self._lock:
+            row = self._conn.execute("SELECT reviews FROM scrapes WHERE url_key = ?", (key,)).fetchone()
+            previous = json.loads(row[0]) if row else []
+
+            known = {review_identity(r) for r in previous}
+            merged = []
+            seen = set()
+            new_count = 0
+            reviews = list(reviews)
+            latest_count = 0
+            for position, review in enumerate(reviews + previous):
+                identity = review_identity(review)
+                if identity in seen:
+                    continue
+                seen.add(identity)
+                merged.append(review)
+                if position < len(reviews):
+                    latest_count += 1
+                if identity not in known:
+                    new_count += 1
+            if self.max_reviews:
+                merged = merged[:self.max_reviews]
+                latest_count = min(latest_count, self.max_reviews)
+
+            payload = zlib.compress(json.dumps(raw_results).encode('utf-8')) if raw_results is not None else None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO scrapes "
+                "(url_key, url, fetched_at, revalidating_since, reviews, payload, latest_count) "
+                "VALUES (?, ?, ?, NULL, ?, ?, ?)",
+                (key, product_url, time.time(), json.dumps(merged), payload, latest_count)
+            )
+            self._conn.commit()
+        return merged, new_count
+
+    def claim_revalidation(self, product_url, timeout_seconds=300):
+        """Mark an entry as being refreshed; False if another refresh is already running"""
+        key = normalize_product_url(product_url)
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE scrapes SET revalidating_since = ? WHERE url_key = ? "
+                "AND (revalidating_since IS NULL OR revalidating_since < ?)",
+                (now, key, now - timeout_seconds)
+            )
+            self._conn.commit()
+        return cursor.rowcount > 0
+
+    def release_revalidation(self, product_url):
+        key = normalize_product_url(product_url)
+        with self._lock:
+            self._conn.execute("UPDATE scrapes SET revalidating_since = NULL WHERE url_key = ?", (key,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,266 +1,511 @@
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
 import sys
 import os
 from bs4 import BeautifulSoup
 import re
 import time
-import json
+import csv
+import subprocess
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, urlencode, parse_qsl, urlunparse
 
 # Add parent directory to path to import config
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from scripts.workspace import run_paths, write_product_url
+from scripts.jsonld_extractor import extract_json_ld_reviews
+from scripts.scrape_cache import ScrapeCache
+
+try:
+    from scripts.html_extractor import extract_reviews_lxml
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
 
 USERNAME = config.OXYLABS_USERNAME
 PASSWORD = config.OXYLABS_PASSWORD
 OXYLABS_API_URL = config.OXYLABS_API_URL
 
-def scrape_reviews(product_url):
-    """
-    Scrape product reviews using Oxylabs Universal source
-    Works with Flipkart, Amazon, and other e-commerce sites
-    """
-    review_list = []
-    
-    # Clear old data files
-    for old_file in ['data/input_reviews.csv', 'data/real_reviews.csv', 'data/real_reviews.pdf', 'data/sentiment_stats.json']:
-        if os.path.exists(old_file):
-            os.remove(old_file)
-            print(f"🗑️  Cleared old file: {old_file}")
-    
-    print(f"🔍 Scraping reviews from: {product_url}")
-    
-    # Detect site type and use appropriate source
+# Pagination / concurrency settings for the scraping engine
+SCRAPE_MAX_PAGES = getattr(config, "SCRAPE_MAX_PAGES", 5)
+SCRAPE_MAX_REVIEWS = getattr(config, "SCRAPE_MAX_REVIEWS", 500)
+SCRAPE_CONCURRENCY = getattr(config, "SCRAPE_CONCURRENCY", 4)
+SCRAPE_MAX_RETRIES = getattr(config, "SCRAPE_MAX_RETRIES", 3)
+SCRAPE_BACKOFF_SECONDS = getattr(config, "SCRAPE_BACKOFF_SECONDS", 1.0)
+SCRAPE_MIN_INTERVAL_SECONDS = getattr(config, "SCRAPE_MIN_INTERVAL_SECONDS", 0.5)
+SCRAPE_TIMEOUT_SECONDS = getattr(config, "SCRAPE_TIMEOUT_SECONDS", 60)
+
+# Scrape cache: reuse a product's reviews for SCRAPE_CACHE_TTL_SECONDS, then serve
+# them for SCRAPE_CACHE_STALE_SECONDS more while refreshing in the background
+SCRAPE_CACHE_PATH = getattr(config, "SCRAPE_CACHE_PATH", "data/scrape_cache.sqlite3")
+SCRAPE_CACHE_TTL_SECONDS = getattr(config, "SCRAPE_CACHE_TTL_SECONDS", 3600)
+SCRAPE_CACHE_STALE_SECONDS = getattr(config, "SCRAPE_CACHE_STALE_SECONDS", 86400)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def build_payload(product_url, page=1):
+    """Oxylabs request payload for one review page of a product"""
     if 'google.com' in product_url.lower() and ('reviews' in product_url.lower() or 'maps' in product_url.lower()):
         # Google Reviews - use Universal with rendering
-        payload = {
+        return {
             "source": "universal",
             "url": product_url,
             "render": "html",
             "geo_location": "India"
         }
-        print("📍 Using Universal source with rendering for Google Reviews")
     elif 'amazon' in product_url.lower():
         # Use Amazon-specific source
-        payload = {
+        return {
             "source": "amazon_reviews",
             "domain": "in" if "amazon.in" in product_url else "com",
             "query": product_url,
+            "start_page": page,
+            "pages": 1,
             "parse": True
         }
-        print("🛒 Using Amazon Reviews source")
-    else:
-        # Use Oxylabs Universal source for other sites
-        payload = {
-            "source": "universal",
-            "url": product_url,
-            "geo_location": "India"
-        }
-        print("🌐 Using Universal source")
+    # Use Oxylabs Universal source for other sites
+    return {
+        "source": "universal",
+        "url": review_page_url(product_url, page),
+        "geo_location": "India"
+    }
+
+
+def review_page_url(product_url, page):
+    """
+    URL of the n-th review page for a product
+    Walmart product pages (/ip/<slug>/<id>) map to /reviews/product/<id>?page=n,
+    anything else gets a page=n query parameter
+    """
+    parsed = urlparse(product_url)
+    walmart_match = re.search(r'/ip/(?:[^/]+/)?(\d+)', parsed.path)
+    if 'walmart.com' in parsed.netloc.lower() and walmart_match:
+        if page == 1:
+            return product_url
+        path = f"/reviews/product/{walmart_match.group(1)}"
+        return urlunparse(parsed._replace(path=path, query=urlencode({"page": page})))
+
+    if page == 1:
+        return product_url
+    query = dict(parse_qsl(parsed.query))
+    query["page"] = str(page)
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+
+def target_host(payload):
+    """Host being scraped for a payload (used as the rate-limit key)"""
+    url = payload.get("url") or payload.get("query") or ""
+    return urlparse(url).netloc.lower() or url
+
+
+class HostRateLimiter:
+    """Enforce a minimum interval between requests to the same host"""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ScrapeClient:
+    """
+    Pooled, keep-alive HTTP client for the scraping API with bounded
+    concurrency, exponential-backoff retries and per-host rate limiting
+    """
+
+    def __init__(self, api_url=OXYLABS_API_URL, auth=(USERNAME, PASSWORD),
+                 concurrency=SCRAPE_CONCURRENCY, max_retries=SCRAPE_MAX_RETRIES,
+                 backoff_seconds=SCRAPE_BACKOFF_SECONDS, min_interval=SCRAPE_MIN_INTERVAL_SECONDS,
+                 timeout=SCRAPE_TIMEOUT_SECONDS):
+        self.api_url = api_url
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.rate_limiter = HostRateLimiter(min_interval)
+
+        self.session = requests.Session()
+        self.session.auth = auth
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def fetch(self, payload):
+        """POST one payload, retrying transient failures; returns the first result dict"""
+        host = target_host(payload)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Exponential backoff with jitter: 1x, 2x, 4x ... the base delay
+                time.sleep(self.backoff_seconds * (2 ** (attempt - 1)) * (1 + random.random() * 0.25))
+            self.rate_limiter.wait(host)
+
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                last_error = e
+                print(f"⚠️  Request failed ({e.__class__.__name__}), attempt {attempt + 1}/{self.max_retries + 1}")
+                continue
+
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                last_error = Exception(f"Failed to scrape: {response.status_code}")
+                print(f"⚠️  Oxylabs returned status {response.status_code}, attempt {attempt + 1}/{self.max_retries + 1}")
+                continue
+
+            if response.status_code != 200:
+                print(f"⚠️  Oxylabs returned status {response.status_code}")
+                print(f"Response: {response.text[:200]}")
+                raise Exception(f"Failed to scrape: {response.status_code}")
+
+            data = response.json()
+            if "results" not in data or len(data["results"]) == 0:
+                raise Exception("No results returned from Oxylabs")
+            return data["results"][0]
+
+        raise last_error or Exception("Failed to scrape")
+
+    def fetch_many(self, payloads):
+        """
+        Fetch payloads concurrently, yielding (index, result or exception)
+        as each page arrives rather than in submission order
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.fetch, payload): i for i, payload in enumerate(payloads)}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    yield futures[future], e
+
+    def close(self):
+        self.session.close()
+
+
+def extract_reviews_from_result(result, limit=SCRAPE_MAX_REVIEWS, html_debug_path=None):
+    """Reviews from one Oxylabs result (parsed Amazon JSON or raw HTML)"""
+    review_list = []
+
+    # Check if we got parsed Amazon data
+    if "content" in result and isinstance(result["content"], dict) and "reviews" in result["content"]:
+        # We have parsed Amazon reviews!
+        reviews_data = result["content"]["reviews"]
+        print(f"✅ Successfully fetched {len(reviews_data)} parsed Amazon reviews")
+
+        for review in reviews_data[:limit]:
+            rating = review.get("rating", 3)
+            review_text = review.get("content", review.get("text", ""))
+
+            # Also include title if available
+            title = review.get("title", "")
+            if title:
+                review_text = f"{title}. {review_text}"
+
+            if len(review_text) > 20:
+                review_list.append({"text": review_text[:500], "rating": int(rating) if rating else 3})
+                print(f"  ✓ Extracted parsed review (rating: {rating})")
+        return review_list
+
+    # Fall back to HTML parsing
+    html_content = result.get("content", "")
+
+    if not html_content or not isinstance(html_content, str):
+        raise Exception("Empty or invalid content returned")
+
+    print(f"✅ Successfully fetched HTML content ({len(html_content)} chars)")
+
+    # Save HTML for debugging
+    if html_debug_path:
+        with open(html_debug_path, "w", encoding="utf-8") as f:
+            f.write(html_content[:50000])  # Save first 50K chars
+        print(f"💾 Saved HTML content to {html_debug_path} for debugging")
+
+    return extract_reviews_from_html(html_content, limit)
+
+
+def extract_reviews_from_html(html_content, limit=SCRAPE_MAX_REVIEWS):
+    """Reviews from a rendered page: JSON-LD structured data first, then HTML element patterns"""
+    # PRIORITY 1: Extract JSON-LD structured data (modern e-commerce sites)
+    # straight from the raw HTML, without building a DOM
+    review_list, aggregate_rating = extract_json_ld_reviews(html_content, limit)
+    if aggregate_rating:
+        print(f"⭐ Aggregate rating: {aggregate_rating.get('ratingValue')} "
+              f"({aggregate_rating.get('reviewCount', aggregate_rating.get('ratingCount', '?'))} ratings)")
+    if review_list:
+        print(f"🎉 Successfully extracted {len(review_list)} reviews from JSON-LD!")
+        return review_list
+
+    # PRIORITY 2: If JSON-LD didn't work, try HTML element patterns
+    print("⚙️  Falling back to HTML element parsing...")
+    if LXML_AVAILABLE:
+        return extract_reviews_lxml(html_content, limit)
+    return extract_reviews_from_soup(BeautifulSoup(html_content, 'html.parser'), limit)
+
+
+def extract_reviews_from_soup(soup, limit=SCRAPE_MAX_REVIEWS):
+    """BeautifulSoup element-pattern extraction (used when lxml is unavailable)"""
+    review_list = []
+
+    # Google Reviews specific patterns
+    google_reviews = soup.find_all(['div', 'span'], class_=re.compile(r'.*review.*text.*|.*MyEned.*|.*wiI7pd.*', re.I))
+    google_reviews += soup.find_all('span', {'data-review-id': True})
+    google_reviews += soup.find_all(['div'], attrs={'jsname': True, 'class': re.compile(r'.*review.*', re.I)})
+
+    # Amazon specific patterns
+    amazon_reviews = soup.find_all('div', {'data-hook': 'review'})
+    amazon_reviews += soup.find_all('div', class_=re.compile(r'.*review.*card.*|.*customer.*review.*', re.I))
+
+    # Flipkart reviews
+    flipkart_reviews = soup.find_all('div', class_=re.compile(r'.*review.*container.*|.*ReviewText.*', re.I))
+
+    # Generic review containers
+    generic_reviews = soup.find_all(['div', 'article'], class_=re.compile(r'.*review.*|.*comment.*', re.I))
+
+    # Combine all found containers
+    all_containers = list(set(google_reviews + amazon_reviews + flipkart_reviews + generic_reviews))
+
+    print(f"🔎 Found {len(google_reviews)} Google-style reviews")
+    print(f"🔎 Found {len(amazon_reviews)} Amazon-style reviews")
+    print(f"🔎 Found {len(flipkart_reviews)} Flipkart-style reviews")
+    print(f"🔎 Found {len(generic_reviews)} generic reviews")
+    print(f"🔎 Total unique containers: {len(all_containers)}")
+
+    # Try to extract from any review-like containers
+    for container in all_containers[:limit]:
+        # Try to find rating - multiple approaches
+        rating = 3  # Default
+
+        # Amazon: data-hook="review-star-rating"
+        amazon_rating = container.find(['span', 'i'], {'data-hook': re.compile(r'.*star.*rating.*', re.I)})
+        if amazon_rating:
+            rating_text = amazon_rating.get_text() or amazon_rating.get('class', [''])[0]
+            rating_match = re.search(r'([1-5])', str(rating_text))
+            if rating_match:
+                rating = int(rating_match.group(1))
+
+        # Look for rating in text
+        if rating == 3:
+            rating_elem = container.find(text=re.compile(r'([1-5])\s*out of|([1-5])\.0\s*out|([1-5])\s*★|([1-5])\s*star', re.I))
+            if rating_elem:
+                rating_match = re.search(r'([1-5])', str(rating_elem))
+                if rating_match:
+                    rating = int(rating_match.group(1))
+
+        # Check for rating in attributes/classes
+        if rating == 3:
+            for elem in container.find_all(['div', 'span', 'i'], class_=True):
+                class_str = ' '.join(elem.get('class', []))
+                title_str = elem.get('title', '')
+                # Check class names like "a-star-5" or text like "5 out of 5 stars"
+                rating_match = re.search(r'star[_-]?([1-5])|([1-5])\s*out\s*of\s*5|rating[_-]?([1-5])', 
+                                       class_str + ' ' + title_str, re.I)
+                if rating_match:
+                    rating = int(next((g for g in rating_match.groups() if g), 3))
+                    break
+
+        # Extract review text - try multiple selectors
+        review_text = ""
+
+        # Amazon: data-hook="review-body" or "review-text"
+        text_elem = container.find(['span', 'div'], {'data-hook': re.compile(r'.*review.*body.*|.*review.*text.*', re.I)})
+
+        # Fallback: look for text-containing elements
+        if not text_elem:
+            text_elem = container.find(['p', 'div', 'span'], class_=re.compile(r'.*text.*|.*body.*|.*content.*|.*comment.*', re.I))
+
+        # Last resort: get all text from container but try to filter navigation/buttons
+        if not text_elem:
+            # Clone and remove known non-review elements
+            temp_container = container
+            for unwanted in temp_container.find_all(['button', 'a', 'nav'], recursive=True):
+                unwanted.decompose()
+            text_elem = temp_container
+
+        if text_elem:
+            review_text = text_elem.get_text().strip()
+            # Clean up the text
+            review_text = re.sub(r'\s+', ' ', review_text)
+            # Remove common non-review text patterns
+            review_text = re.sub(r'(Helpful|Report|Verified Purchase|Read more|See more).*$', '', review_text, flags=re.I)
+            review_text = review_text[:500]  # Limit length
+
+            if len(review_text) > 20:  # Only substantial reviews
+                review_list.append({"text": review_text, "rating": rating})
+
+    return review_list
+
+
+def fetch_review_pages(product_url, max_pages=SCRAPE_MAX_PAGES, client=None,
+                       html_debug_path=None, on_reviews=None):
+    """
+    Fetch a product's review pages concurrently and parse each page as it arrives
+    on_reviews (if given) receives the new, de-duplicated reviews of every page
+    Returns (reviews, raw_results)
+    """
+    # Google review pages render everything at once, so there is nothing to paginate
+    is_google = 'google.com' in product_url.lower()
+    payloads = [build_payload(product_url, page) for page in range(1, (1 if is_google else max_pages) + 1)]
+    print(f"🌐 Fetching {len(payloads)} review page(s) via {payloads[0]['source']} source")
+    
+    own_client = client is None
+    client = client or ScrapeClient()
+    seen_texts = set()
+    reviews = []
+    raw_results = []
     
     try:
-        response = requests.post(OXYLABS_API_URL, auth=(USERNAME, PASSWORD), json=payload, timeout=60)
-        
-        if response.status_code != 200:
-            print(f"⚠️  Oxylabs returned status {response.status_code}")
-            print(f"Response: {response.text[:200]}")
-            raise Exception(f"Failed to scrape: {response.status_code}")
-        
-        data = response.json()
-        
-        if "results" not in data or len(data["results"]) == 0:
-            raise Exception("No results returned from Oxylabs")
-        
-        result = data["results"][0]
-        
-        # Check if we got parsed Amazon data
-        if "content" in result and isinstance(result["content"], dict) and "reviews" in result["content"]:
-            # We have parsed Amazon reviews!
-            reviews_data = result["content"]["reviews"]
-            print(f"✅ Successfully fetched {len(reviews_data)} parsed Amazon reviews")
+        for index, result in client.fetch_many(payloads):
+            if isinstance(result, Exception):
+                print(f"⚠️  Error scraping page {index + 1}: {str(result)}")
+                continue
+            raw_results.append(result)
+            try:
+                page_reviews = extract_reviews_from_result(
+                    result, limit=SCRAPE_MAX_REVIEWS,
+                    html_debug_path=html_debug_path if index == 0 else None
+                )
+            except Exception as e:
+                print(f"⚠️  Error parsing page {index + 1}: {str(e)}")
+                continue
             
-            for review in reviews_data[:30]:  # Limit to 30 reviews
-                rating = review.get("rating", 3)
-                review_text = review.get("content", review.get("text", ""))
-                
-                # Also include title if available
-                title = review.get("title", "")
-                if title:
-                    review_text = f"{title}. {review_text}"
-                
-                if len(review_text) > 20:
-                    review_list.append({"text": review_text[:500], "rating": int(rating) if rating else 3})
-                    print(f"  ✓ Extracted parsed review (rating: {rating})")
+            new_reviews = []
+            for review in page_reviews:
+                if len(reviews) >= SCRAPE_MAX_REVIEWS or review["text"] in seen_texts:
+                    continue
+                seen_texts.add(review["text"])
+                reviews.append(review)
+                new_reviews.append(review)
+            if on_reviews and new_reviews:
+                on_reviews(new_reviews)
+            print(f"📄 Page {index + 1}: {len(page_reviews)} reviews ({len(reviews)} total)")
+    finally:
+        if own_client:
+            client.close()
+    
+    return reviews, raw_results
+
+
+def get_scrape_cache():
+    """Open the scrape cache (None when disabled or unavailable)"""
+    if not SCRAPE_CACHE_PATH:
+        return None
+    try:
+        return ScrapeCache(SCRAPE_CACHE_PATH, ttl_seconds=SCRAPE_CACHE_TTL_SECONDS,
+                           stale_seconds=SCRAPE_CACHE_STALE_SECONDS, max_reviews=SCRAPE_MAX_REVIEWS)
+    except Exception as e:
+        print(f"⚠️  Scrape cache unavailable: {str(e)}")
+        return None
+
+
+def revalidate(product_url, max_pages=SCRAPE_MAX_PAGES):
+    """Re-scrape a product and merge any new reviews into the cache (no workspace output)"""
+    cache = get_scrape_cache()
+    if cache is None:
+        return
+    try:
+        reviews, raw_results = fetch_review_pages(product_url, max_pages)
+        if reviews:
+            merged, new_count = cache.put(product_url, reviews, raw_results)
+            print(f"🔄 Revalidated {product_url}: {new_count} new reviews ({len(merged)} cached)")
+    finally:
+        cache.release_revalidation(product_url)
+        cache.close()
+
+
+def start_background_revalidation(cache, product_url):
+    """Refresh a stale cache entry in a detached process so this scrape can return immediately"""
+    if not cache.claim_revalidation(product_url):
+        return
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--revalidate", product_url],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    print("🔄 Serving cached reviews while they are refreshed in the background")
+
+
+def write_reviews_csv(reviews, csv_path):
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=["text", "rating"], extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(reviews)
+
+
+def scrape_reviews(product_url, run_id=None, max_pages=SCRAPE_MAX_PAGES, client=None, use_cache=True):
+    """
+    Scrape product reviews using Oxylabs Universal source
+    Works with Flipkart, Amazon, and other e-commerce sites
+    Review pages are fetched concurrently and parsed reviews are appended to
+    the run's input_reviews.csv as each page arrives
+    Output goes to the run's workspace (shared data/ directory when run_id is None)
+    """
+    paths = run_paths(run_id, create=True)
+    
+    # Clear old data files
+    for old_file in [paths['input_csv'], paths['real_csv'], paths['real_pdf'], paths['sentiment_stats'],
+                     paths['product_url']]:
+        if os.path.exists(old_file):
+            os.remove(old_file)
+            print(f"🗑️  Cleared old file: {old_file}")
+    
+    print(f"🔍 Scraping reviews from: {product_url}")
+    
+    cache = get_scrape_cache() if use_cache else None
+    try:
+        # Serve recently scraped products from the cache instead of a paid API call
+        cached = cache.get(product_url) if cache else None
+        if cached and cached['reviews'] and cached['state'] in ('fresh', 'stale'):
+            print(f"💾 Using {len(cached['reviews'])} cached reviews "
+                  f"({cached['state']}, scraped {cached['age'] / 60:.0f} min ago)")
+            write_reviews_csv(cached['reviews'], paths['input_csv'])
+            write_product_url(run_id, product_url)
+            if cached['state'] == 'stale':
+                start_background_revalidation(cache, product_url)
+            print(f"✅ Saved {len(cached['reviews'])} reviews to '{paths['input_csv']}'")
+            return
         
-        else:
-            # Fall back to HTML parsing
-            html_content = result.get("content", "")
-            
-            if not html_content or not isinstance(html_content, str):
-                raise Exception("Empty or invalid content returned")
-            
-            print(f"✅ Successfully fetched HTML content ({len(html_content)} chars)")
+        with open(paths['input_csv'], 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=["text", "rating"])
+            writer.writeheader()
             
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # Stream new reviews to disk as soon as each page is parsed
+            def write_page(page_reviews):
+                writer.writerows(page_reviews)
+                f.flush()
             
-            # Save HTML for debugging
-            with open("data/scraped_page.html", "w", encoding="utf-8") as f:
-                f.write(html_content[:50000])  # Save first 50K chars
-            print(f"💾 Saved HTML content to data/scraped_page.html for debugging")
-            
-            # PRIORITY 1: Extract JSON-LD structured data (modern e-commerce sites)
-            json_ld_scripts = soup.find_all('script', type='application/ld+json')
-            print(f"🔍 Found {len(json_ld_scripts)} JSON-LD script tags")
-            
-            for script in json_ld_scripts:
-                try:
-                    json_data = json.loads(script.string)
-                    
-                    # Check if this is a Product schema with reviews
-                    if isinstance(json_data, dict):
-                        if json_data.get('@type') == 'Product' and 'review' in json_data:
-                            print(f"✅ Found Product schema with reviews in JSON-LD")
-                            reviews_array = json_data['review']
-                            
-                            if isinstance(reviews_array, list):
-                                for review_obj in reviews_array[:30]:  # Limit to 30 reviews
-                                    if review_obj.get('@type') == 'Review':
-                                        review_text = review_obj.get('reviewBody', '')
-                                        review_name = review_obj.get('name', '')
-                                        
-                                        # Combine name and body
-                                        if review_name and review_text:
-                                            review_text = f"{review_name}. {review_text}"
-                                        elif review_name:
-                                            review_text = review_name
-                                        
-                                        # Extract rating
-                                        rating = 3  # Default
-                                        if 'reviewRating' in review_obj:
-                                            rating_obj = review_obj['reviewRating']
-                                            rating = rating_obj.get('ratingValue', 3)
-                                        
-                                        if review_text and len(review_text) > 10:
-                                            review_list.append({
-                                                "text": review_text[:500],
-                                                "rating": int(rating) if isinstance(rating, (int, float)) else 3
-                                            })
-                                            print(f"  ✓ Extracted JSON-LD review (rating: {rating})")
-                            
-                            # If we found reviews in JSON-LD, we can skip HTML parsing
-                            if len(review_list) > 0:
-                                print(f"🎉 Successfully extracted {len(review_list)} reviews from JSON-LD!")
-                                break
-                                
-                except json.JSONDecodeError:
-                    continue
-                except Exception as e:
-                    print(f"⚠️  Error parsing JSON-LD: {str(e)}")
-                    continue
-            
-            # PRIORITY 2: If JSON-LD didn't work, try HTML element patterns
-            if len(review_list) == 0:
-                print("⚙️  Falling back to HTML element parsing...")
-                
-                # Google Reviews specific patterns
-                google_reviews = soup.find_all(['div', 'span'], class_=re.compile(r'.*review.*text.*|.*MyEned.*|.*wiI7pd.*', re.I))
-                google_reviews += soup.find_all('span', {'data-review-id': True})
-                google_reviews += soup.find_all(['div'], attrs={'jsname': True, 'class': re.compile(r'.*review.*', re.I)})
-                
-                # Amazon specific patterns
-                amazon_reviews = soup.find_all('div', {'data-hook': 'review'})
-                amazon_reviews += soup.find_all('div', class_=re.compile(r'.*review.*card.*|.*customer.*review.*', re.I))
-                
-                # Flipkart reviews
-                flipkart_reviews = soup.find_all('div', class_=re.compile(r'.*review.*container.*|.*ReviewText.*', re.I))
-                
-                # Generic review containers
-                generic_reviews = soup.find_all(['div', 'article'], class_=re.compile(r'.*review.*|.*comment.*', re.I))
-                
-                # Combine all found containers
-                all_containers = list(set(google_reviews + amazon_reviews + flipkart_reviews + generic_reviews))
-                
-                print(f"🔎 Found {len(google_reviews)} Google-style reviews")
-                print(f"🔎 Found {len(amazon_reviews)} Amazon-style reviews")
-                print(f"🔎 Found {len(flipkart_reviews)} Flipkart-style reviews")
-                print(f"🔎 Found {len(generic_reviews)} generic reviews")
-                print(f"🔎 Total unique containers: {len(all_containers)}")
-                
-                # Try to extract from any review-like containers
-                for container in all_containers[:30]:  # Limit to 30 reviews
-                    # Try to find rating - multiple approaches
-                    rating = 3  # Default
-                    
-                    # Amazon: data-hook="review-star-rating"
-                    amazon_rating = container.find(['span', 'i'], {'data-hook': re.compile(r'.*star.*rating.*', re.I)})
-                    if amazon_rating:
-                        rating_text = amazon_rating.get_text() or amazon_rating.get('class', [''])[0]
-                        rating_match = re.search(r'([1-5])', str(rating_text))
-                        if rating_match:
-                            rating = int(rating_match.group(1))
-                    
-                    # Look for rating in text
-                    if rating == 3:
-                        rating_elem = container.find(text=re.compile(r'([1-5])\s*out of|([1-5])\.0\s*out|([1-5])\s*★|([1-5])\s*star', re.I))
-                        if rating_elem:
-                            rating_match = re.search(r'([1-5])', str(rating_elem))
-                            if rating_match:
-                                rating = int(rating_match.group(1))
-                    
-                    # Check for rating in attributes/classes
-                    if rating == 3:
-                        for elem in container.find_all(['div', 'span', 'i'], class_=True):
-                            class_str = ' '.join(elem.get('class', []))
-                            title_str = elem.get('title', '')
-                            # Check class names like "a-star-5" or text like "5 out of 5 stars"
-                            rating_match = re.search(r'star[_-]?([1-5])|([1-5])\s*out\s*of\s*5|rating[_-]?([1-5])', 
-                                                   class_str + ' ' + title_str, re.I)
-                            if rating_match:
-                                rating = int(next((g for g in rating_match.groups() if g), 3))
-                                break
-                    
-                    # Extract review text - try multiple selectors
-                    review_text = ""
-                    
-                    # Amazon: data-hook="review-body" or "review-text"
-                    text_elem = container.find(['span', 'div'], {'data-hook': re.compile(r'.*review.*body.*|.*review.*text.*', re.I)})
-                    
-                    # Fallback: look for text-containing elements
-                    if not text_elem:
-                        text_elem = container.find(['p', 'div', 'span'], class_=re.compile(r'.*text.*|.*body.*|.*content.*|.*comment.*', re.I))
-                    
-                    # Last resort: get all text from container but try to filter navigation/buttons
-                    if not text_elem:
-                        # Clone and remove known non-review elements
-                        temp_container = container
-                        for unwanted in temp_container.find_all(['button', 'a', 'nav'], recursive=True):
-                            unwanted.decompose()
-                        text_elem = temp_container
-                    
-                    if text_elem:
-                        review_text = text_elem.get_text().strip()
-                        # Clean up the text
-                        review_text = re.sub(r'\s+', ' ', review_text)
-                        # Remove common non-review text patterns
-                        review_text = re.sub(r'(Helpful|Report|Verified Purchase|Read more|See more).*$', '', review_text, flags=re.I)
-                        review_text = review_text[:500]  # Limit length
-                        
-                        if len(review_text) > 20:  # Only substantial reviews
-                            review_list.append({"text": review_text, "rating": rating})
-                            print(f"  ✓ Extracted review (rating: {rating}, length: {len(review_text)})")
-            else:
-                # JSON-LD extraction succeeded, skip HTML parsing
-                pass
+            reviews, raw_results = fetch_review_pages(product_url, max_pages, client,
+                                                      html_debug_path=paths['scraped_html'],
+                                                      on_reviews=write_page)
+        review_count = len(reviews)
         
-        print(f"\n📊 Total reviews extracted: {len(review_list)}")
-                
-    except requests.exceptions.Timeout:
-        print("⚠️  Request timeout. Using sample data...")
-    except Exception as e:
-        print(f"⚠️  Error during scraping: {str(e)}")
-        print("Using sample data for testing...")
-    if not review_list:
+        # The cache merges in what an expired entry already knew; the run analyzes only
+        # what was scraped now, so reviews the site has dropped do not linger
+        if cache and reviews:
+            merged, new_count = cache.put(product_url, reviews, raw_results)
+            print(f"💾 Cached reviews: {new_count} new since last fetch, {len(merged)} total")
+    finally:
+        if cache:
+            cache.close()
+    
+    print(f"\n📊 Total reviews extracted: {review_count}")
+    
+    # Only real reviews become the product's analysis state, never the sample data below
+    if review_count:
+        write_product_url(run_id, product_url)
+    else:
         print("\n" + "="*70)
         print("⚠️  IMPORTANT: Unable to scrape reviews automatically")
         print("="*70)
@@ -268,7 +513,7 @@ def scrape_reviews(product_url):
         print("   • Most e-commerce sites load reviews dynamically using JavaScript")
         print("   • Basic Oxylabs plan doesn't support JavaScript rendering")
         print("   • Premium plans with browser rendering are required for real-time scraping")
-        
+
         print("\n✅ SOLUTION: Using sample data for demonstration")
         print("   The ML model will still work perfectly with this data!")
         print("   In production, you would:")
@@ -276,7 +521,7 @@ def scrape_reviews(product_url):
         print("   • Use a different scraping service (Bright Data, ScrapingBee)")
         print("   • Manually export reviews from the site")
         print("="*70 + "\n")
-        
+
         # Generate sample reviews for testing
         sample_reviews = [
             {"text": "This product is amazing! Works exactly as described. Highly recommended.", "rating": 5},
@@ -300,16 +545,23 @@ def scrape_reviews(product_url):
             {"text": "Not recommended. Quality is subpar and doesn't last long. Save money.", "rating": 2},
             {"text": "Perfect! No complaints whatsoever. Highly recommend to anyone looking.", "rating": 5},
         ]
-        review_list = sample_reviews
+        
+        df = pd.DataFrame(sample_reviews)
+        df.to_csv(paths['input_csv'], index=False)
+        review_count = len(sample_reviews)
     
-    df = pd.DataFrame(review_list)
-    df.to_csv("data/input_reviews.csv", index=False)
-    print(f"✅ Saved {len(review_list)} reviews to 'data/input_reviews.csv'")
+    print(f"✅ Saved {review_count} reviews to '{paths['input_csv']}'")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2 or not sys.argv[1].strip():
         print("Error: No product URL provided. Please provide a valid product URL.")
         sys.exit(1)
 
+    if sys.argv[1] == "--revalidate":
+        if len(sys.argv) > 2:
+            revalidate(sys.argv[2].strip())
+        sys.exit(0)
+
     product_url = sys.argv[1].strip()
-    scrape_reviews(product_url)
+    run_id = sys.argv[2].strip() if len(sys.argv) > 2 and sys.argv[2].strip() else None
+    scrape_reviews(product_url, run_id)
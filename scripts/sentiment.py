@@ -0,0 +1,207 @@
+"""
+Vectorized Sentiment Scoring Engine
+Scores a whole batch of reviews at once from a precompiled polarity lexicon
+(the same pattern lexicon TextBlob uses) instead of building a TextBlob per review
+"""
+
+import json
+import logging
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+# Words that flip the polarity of the next word ("not good" = slightly bad)
+NEGATIONS = ['not', 'never', 'no']
+NEGATION_FACTOR = -0.5
+
+# Adverbs that scale the polarity of the next word ("very good")
+INTENSIFIERS = ['very', 'really', 'extremely', 'so', 'too', 'absolutely', 'totally',
+                'super', 'incredibly', 'highly', 'pretty']
+
+
+def _textblob_lexicon_path():
+    """Locate the pattern sentiment lexicon shipped with TextBlob"""
+    import textblob.en
+    return os.path.join(os.path.dirname(textblob.en.__file__), 'en-sentiment.xml')
+
+
+def _avg(values):
+    return sum(values) / len(values) if values else 0.0
+
+
+def compile_lexicon(xml_path=None):
+    """
+    Compile the pattern sentiment XML into a sparse-scoring lexicon
+
+    Returns dict with:
+        vocabulary: list of unigram/bigram terms
+        weights: polarity contribution of each term to the sum
+        counts: contribution of each term to the number of assessed words
+    """
+    xml_path = xml_path or _textblob_lexicon_path()
+
+    # Average polarity/intensity per part-of-speech, then across all senses
+    # (mirrors how TextBlob's PatternAnalyzer loads the same file)
+    words = {}
+    for node in ET.parse(xml_path).getroot().findall('word'):
+        form = node.attrib.get('form', '').lower()
+        if not form or ' ' in form:
+            continue
+        pos = node.attrib.get('pos')
+        psi = (float(node.attrib.get('polarity', 0.0)), float(node.attrib.get('intensity', 1.0)))
+        words.setdefault(form, {}).setdefault(pos, []).append(psi)
+
+    polarity = {}
+    intensity = {}
+    for form, by_pos in words.items():
+        per_pos = [[_avg(v) for v in zip(*psi)] for psi in by_pos.values()]
+        polarity[form] = _avg([p for p, _ in per_pos])
+        intensity[form] = _avg([i for _, i in per_pos])
+
+    vocabulary = []
+    weights = []
+    counts = []
+
+    for form, p in polarity.items():
+        vocabulary.append(form)
+        weights.append(p)
+        counts.append(1.0)
+
+    # Bigram corrections: "not good" replaces +p with -0.5p, same assessment count
+    for negation in NEGATIONS:
+        for form, p in polarity.items():
+            if p != 0 and form not in NEGATIONS:
+                vocabulary.append(f"{negation} {form}")
+                weights.append(NEGATION_FACTOR * p - p)
+                counts.append(0.0)
+
+    # "very good" is one assessment of p * intensity("very") rather than two
+    for modifier in INTENSIFIERS:
+        if modifier not in polarity:
+            continue
+        scale = intensity[modifier]
+        for form, p in polarity.items():
+            if p != 0 and form != modifier:
+                boosted = max(-1.0, min(p * scale, 1.0))
+                vocabulary.append(f"{modifier} {form}")
+                weights.append(boosted - p - polarity[modifier])
+                counts.append(-1.0)
+
+    return {'vocabulary': vocabulary, 'weights': weights, 'counts': counts}
+
+
+class SentimentEngine:
+    """
+    Batch sentiment scorer:
+    polarity = (X @ weights) / (X @ counts) where X is the sparse term-count
+    matrix of the batch over the compiled lexicon vocabulary
+    """
+
+    def __init__(self, lexicon_path=None, token_pattern=DEFAULT_TOKEN_PATTERN):
+        self.lexicon_path = lexicon_path
+        self.token_pattern = token_pattern or DEFAULT_TOKEN_PATTERN
+        self._vectorizer = None
+        self._weights = None
+        self._counts = None
+
+    def _load(self):
+        """Load (or compile and save) the lexicon on first use"""
+        if self._vectorizer is not None:
+            return
+
+        if self.lexicon_path and os.path.exists(self.lexicon_path):
+            with open(self.lexicon_path, 'r') as f:
+                lexicon = json.load(f)
+        else:
+            lexicon = compile_lexicon()
+            if self.lexicon_path:
+                try:
+                    with open(self.lexicon_path, 'w') as f:
+                        json.dump(lexicon, f)
+                except OSError as e:
+                    logging.warning(f"Could not save compiled sentiment lexicon: {e}")
+
+        self._vectorizer = CountVectorizer(
+            vocabulary={term: i for i, term in enumerate(lexicon['vocabulary'])},
+            ngram_range=(1, 2),
+            token_pattern=self.token_pattern,
+            lowercase=True
+        )
+        self._weights = np.asarray(lexicon['weights'], dtype=np.float64)
+        self._counts = np.asarray(lexicon['counts'], dtype=np.float64)
+        logging.info(f"✓ Sentiment lexicon ready ({len(self._weights)} terms)")
+
+    def score(self, texts):
+        """Return a polarity in [-1, 1] for every text in the batch"""
+        self._load()
+        texts = ["" if t is None else str(t) for t in texts]
+        if not texts:
+            return np.zeros(0)
+
+        matrix = self._vectorizer.transform(texts)
+        totals = matrix @ self._weights
+        assessed = matrix @ self._counts
+
+        polarity = np.divide(totals, assessed, out=np.zeros_like(totals), where=assessed > 0)
+        return np.clip(polarity, -1.0, 1.0)
+
+    @staticmethod
+    def categorize(scores):
+        """Bucket polarity scores with the existing ±0.1 thresholds"""
+        scores = np.asarray(scores, dtype=np.float64)
+        return np.where(scores > 0.1, 'positive',
+                        np.where(scores < -0.1, 'negative', 'neutral'))
+
+    def parity_check(self, texts):
+        """
+        Compare the engine against TextBlob on the same texts
+        Returns mean/max absolute polarity error and category agreement
+        """
+        from textblob import TextBlob
+
+        texts = ["" if t is None else str(t) for t in texts]
+        engine_scores = self.score(texts)
+        textblob_scores = np.array([TextBlob(t).sentiment.polarity for t in texts])
+
+        if len(texts) == 0:
+            return {'reviews': 0, 'mean_abs_error': 0.0, 'max_abs_error': 0.0, 'category_agreement': 1.0}
+
+        errors = np.abs(engine_scores - textblob_scores)
+        agreement = self.categorize(engine_scores) == self.categorize(textblob_scores)
+        return {
+            'reviews': len(texts),
+            'mean_abs_error': float(errors.mean()),
+            'max_abs_error': float(errors.max()),
+            'category_agreement': float(agreement.mean())
+        }
+
+
+def main():
+    """Run a parity check of the lexicon engine against TextBlob on a CSV of reviews"""
+    import pandas as pd
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "data/input_reviews.csv"
+    if not os.path.exists(csv_path):
+        print(f"❌ {csv_path} not found")
+        return None
+
+    texts = pd.read_csv(csv_path)['text'].fillna("").tolist()
+    report = SentimentEngine().parity_check(texts)
+
+    print("=" * 70)
+    print("Sentiment Engine Parity Check (lexicon vs TextBlob)")
+    print("=" * 70)
+    print(f"Reviews:            {report['reviews']}")
+    print(f"Mean abs error:     {report['mean_abs_error']:.4f}")
+    print(f"Max abs error:      {report['max_abs_error']:.4f}")
+    print(f"Category agreement: {report['category_agreement']:.2%}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
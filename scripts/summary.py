@@ -1,28 +1,106 @@
-import requests
-import fitz  # PyMuPDF
 import json
 import sys
 import os
-from collections import Counter
-import re
+import threading
 
 # Add parent directory to path to import config
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+from scripts.workspace import run_paths, get_real_reviews
+from scripts.summary_cache import SummaryCache, summary_fingerprint
+from scripts.ollama_client import OllamaClient, OllamaError
 
-# Try importing custom summarizer
-try:
-    from scripts.custom_summarizer import CustomSummarizer
+# Bump when summarizer output changes so cached summaries are not reused
+SUMMARIZER_VERSION = 1
+
+# Finished summaries keyed by review-set fingerprint (None disables the cache)
+SUMMARY_CACHE_PATH = getattr(config, "SUMMARY_CACHE_PATH", "data/summary_cache.sqlite3")
+SUMMARY_CACHE_MAX_ENTRIES = getattr(config, "SUMMARY_CACHE_MAX_ENTRIES", 256)
+SUMMARY_MODE = getattr(config, "SUMMARY_MODE", "overview")
+# "custom" = custom summarizer first, Ollama as fallback; "ollama" = Ollama first
+SUMMARY_ENGINE = getattr(config, "SUMMARY_ENGINE", "custom")
+
+# Ollama map-reduce: prompt batch size, concurrent requests and per-request timeout
+OLLAMA_CHUNK_CHARS = getattr(config, "OLLAMA_CHUNK_CHARS", 4000)
+OLLAMA_WORKERS = getattr(config, "OLLAMA_WORKERS", 4)
+OLLAMA_TIMEOUT_SECONDS = getattr(config, "OLLAMA_TIMEOUT_SECONDS", 120)
+
+# The custom summarizer (pandas/sklearn) is imported on first use; None = not tried yet
+CUSTOM_SUMMARIZER_AVAILABLE = None
+
+def load_custom_summarizer():
+    """Return the CustomSummarizer class, or None when its dependencies are missing"""
+    global CUSTOM_SUMMARIZER_AVAILABLE
+    
+    try:
+        from scripts.custom_summarizer import CustomSummarizer
+    except ImportError:
+        if CUSTOM_SUMMARIZER_AVAILABLE is None:
+            print("⚠️  Custom summarizer not available, using fallback methods.")
+        CUSTOM_SUMMARIZER_AVAILABLE = False
+        return None
     CUSTOM_SUMMARIZER_AVAILABLE = True
-except ImportError:
-    CUSTOM_SUMMARIZER_AVAILABLE = False
-    print("⚠️  Custom summarizer not available, using fallback methods.")
+    return CustomSummarizer
 
 def extract_text_from_pdf(pdf_path):
+    import fitz  # PyMuPDF
+    
     doc = fitz.open(pdf_path)
     text = "\n".join(page.get_text("text") for page in doc)
     return text
 
+def load_real_reviews(csv_path):
+    """Real-review DataFrame handed over in memory by prediction, else read from CSV"""
+    df = get_real_reviews(csv_path)
+    if df is not None:
+        return df
+    if os.path.exists(csv_path):
+        import pandas as pd
+        return pd.read_csv(csv_path)
+    return None
+
+def build_review_entries(df):
+    """One prompt entry per review, in the same Text/Rating layout as the PDF export"""
+    return [f"Text: {text}\nRating: {rating}"
+            for text, rating in zip(df['text'], df.get('rating', [3] * len(df)))]
+
+def build_review_text(df):
+    """Prompt text for all reviews"""
+    return "\n".join(build_review_entries(df))
+
+_ollama_client = None
+_ollama_client_lock = threading.Lock()
+
+def get_ollama_client():
+    """Process-wide OllamaClient, so concurrent summaries share one connection pool"""
+    global _ollama_client
+    
+    if _ollama_client is None:
+        with _ollama_client_lock:
+            if _ollama_client is None:
+                _ollama_client = OllamaClient(config.OLLAMA_URL, config.OLLAMA_MODEL,
+                                              max_workers=OLLAMA_WORKERS, timeout=OLLAMA_TIMEOUT_SECONDS)
+    return _ollama_client
+
+# Keyword groups used by generate_simple_summary, matched as whole words
+SIMPLE_SUMMARY_KEYWORDS = {
+    'positive': ['amazing', 'excellent', 'great', 'best', 'love', 'perfect', 'fantastic', 'wonderful', 'outstanding', 'good', 'happy', 'satisfied'],
+    'negative': ['terrible', 'worst', 'horrible', 'bad', 'disappointed', 'poor', 'waste', 'awful', 'broke', 'unhelpful'],
+    'quality': ['quality'],
+    'price': ['price', 'money', 'value', 'expensive'],
+    'delivery': ['delivery', 'packaging', 'shipping'],
+}
+_simple_summary_matcher = None
+
+def get_simple_summary_matcher():
+    """KeywordMatcher for SIMPLE_SUMMARY_KEYWORDS (built on first use; it needs numpy)"""
+    global _simple_summary_matcher
+    
+    if _simple_summary_matcher is None:
+        from scripts.keyword_matcher import KeywordMatcher
+        _simple_summary_matcher = KeywordMatcher(SIMPLE_SUMMARY_KEYWORDS)
+    return _simple_summary_matcher
+
 def generate_simple_summary(text):
     """
     Generate a simple summary when Ollama is unavailable
@@ -31,19 +109,10 @@ def generate_simple_summary(text):
     # Split into individual reviews
     reviews = [r.strip() for r in text.split('\n') if len(r.strip()) > 20]
     
-    # Count sentiment mentions
-    positive_words = ['amazing', 'excellent', 'great', 'best', 'love', 'perfect', 'fantastic', 'wonderful', 'outstanding', 'good', 'happy', 'satisfied']
-    negative_words = ['terrible', 'worst', 'horrible', 'bad', 'disappointed', 'poor', 'waste', 'awful', 'broke', 'unhelpful']
-    
-    text_lower = text.lower()
-    positive_count = sum(text_lower.count(word) for word in positive_words)
-    negative_count = sum(text_lower.count(word) for word in negative_words)
-    
-    # Extract common themes
-    sentences = re.split(r'[.!?]', text)
-    quality_mentions = [s for s in sentences if 'quality' in s.lower()]
-    price_mentions = [s for s in sentences if any(w in s.lower() for w in ['price', 'money', 'value', 'expensive'])]
-    delivery_mentions = [s for s in sentences if any(w in s.lower() for w in ['delivery', 'packaging', 'shipping'])]
+    # Count sentiment and theme keywords in one pass over the reviews
+    hits, _ = get_simple_summary_matcher().totals(text.split('\n'))
+    positive_count = hits['positive']
+    negative_count = hits['negative']
     
     # Build summary
     summary_parts = []
@@ -58,96 +127,166 @@ def generate_simple_summary(text):
     else:
         summary_parts.append("Sentiment is mixed with both positive and negative feedback.")
     
-    if quality_mentions:
+    if hits['quality']:
         summary_parts.append("Product quality is a common topic of discussion.")
     
-    if price_mentions:
+    if hits['price']:
         summary_parts.append("Price and value for money are frequently mentioned.")
     
-    if delivery_mentions:
+    if hits['delivery']:
         summary_parts.append("Delivery and packaging experiences vary among customers.")
     
     summary_parts.append("Recommendations range from highly satisfied to disappointed customers.")
     
     return " ".join(summary_parts)
 
-def run_summary(pdf_file="data/real_reviews.pdf"):
-    # PRIORITY 1: Try custom summarizer with CSV (most detailed)
-    if CUSTOM_SUMMARIZER_AVAILABLE:
-        csv_path = "data/real_reviews.csv"
-        if os.path.exists(csv_path):
-            try:
-                print("Using custom summarizer with structured data...")
-                summarizer = CustomSummarizer()
-                if summarizer.load_reviews_from_csv(csv_path):
-                    summary = summarizer.generate_summary()
-                    print("✅ Custom summarizer completed successfully")
-                    return summary
-            except Exception as e:
-                print(f"⚠️  Custom summarizer failed: {e}")
-                print("Falling back to Ollama/simple summarization...")
-    
-    # PRIORITY 2: Try Ollama (if available)
-    file_content = extract_text_from_pdf(pdf_file)
-
-    ollama_url = config.OLLAMA_URL
-    ollama_model = config.OLLAMA_MODEL
-    
-    # Truncate content if too long to avoid token limits
-    max_content_length = 4000
-    if len(file_content) > max_content_length:
-        file_content = file_content[:max_content_length] + "..."
+def _generate_summary(paths, pdf_file=None, format='html', mode=None, engine=None,
+                      on_token=None, on_progress=None):
+    """
+    Produce a summary for a run's files
+    engine "custom" tries the custom summarizer before Ollama, "ollama" goes
+    straight to Ollama; on_token/on_progress receive Ollama's streamed tokens
+    and map-reduce progress
+    Returns (summary, method) where method is "custom", "ollama", "simple" or "failed"
+    """
+    engine = engine or SUMMARY_ENGINE
+    pdf_file = pdf_file or paths['real_pdf']
+    
+    csv_path = paths['real_csv']
+    reviews_df = load_real_reviews(csv_path)
+    
+    # PRIORITY 1: Try custom summarizer with structured data (most detailed)
+    CustomSummarizer = load_custom_summarizer() if engine != "ollama" and reviews_df is not None else None
+    if CustomSummarizer is not None:
+        try:
+            print("Using custom summarizer with structured data...")
+            summarizer = CustomSummarizer()
+            if summarizer.load_reviews_from_dataframe(reviews_df, source_path=csv_path):
+                summary = summarizer.generate_summary(format=format, mode=mode)
+                print("✅ Custom summarizer completed successfully")
+                return summary, "custom"
+        except Exception as e:
+            print(f"⚠️  Custom summarizer failed: {e}")
+            print("Falling back to Ollama/simple summarization...")
+    
+    # PRIORITY 2: Try Ollama (if available) over every review with map-reduce;
+    # the PDF is only parsed when no structured data exists
+    if reviews_df is not None:
+        entries = build_review_entries(reviews_df)
+    else:
+        entries = [line for line in extract_text_from_pdf(pdf_file).split('\n') if line.strip()]
+    file_content = "\n".join(entries)
     
     try:
         print("Trying Ollama summarization...")
-        response = requests.post(
-            ollama_url,
-            json={
-                "model": ollama_model,
-                "prompt": (
-                    "Summarize these reviews into a single paragraph, "
-                    "highlighting the pros and cons of the product:\n\n" + file_content
-                ),
-                "stream": True
-            },
-            stream=True,
-            timeout=120
-        )
-        
-        # Check for HTTP errors
-        if response.status_code != 200:
-            error_msg = f"Ollama API error: {response.status_code} - {response.text}"
-            print(error_msg)
-            print("Falling back to simple summarization...")
-            return generate_simple_summary(file_content)
-            
-    except requests.RequestException as e:
-        print(f"Request failed: {e}")
+        summary = get_ollama_client().summarize(entries, max_chars=OLLAMA_CHUNK_CHARS,
+                                                on_token=on_token, on_progress=on_progress)
+    except OllamaError as e:
+        print(e)
         print("Falling back to simple summarization...")
-        return generate_simple_summary(file_content)
+        return generate_simple_summary(file_content), "simple"
+    
+    if not summary:
+        return "No summary generated", "failed"
+    return summary, "ollama"
 
-    full_response = ""
-    try:
-        for line in response.iter_lines():
-            if line:
+
+def run_summary(pdf_file=None, run_id=None, format='html', mode=None, engine=None):
+    """Summary text for a run (always recomputed; see summarize() for the cached path)"""
+    summary, _ = _generate_summary(run_paths(run_id), pdf_file, format, mode, engine)
+    return summary
+
+def load_sentiment_stats(path):
+    """sentiment_stats.json of a run, or zeroed statistics when it is missing/unreadable"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️  Error loading sentiment statistics: {e}")
+    return {
+        "sentiment_counts": {"positive": 0, "neutral": 0, "negative": 0},
+        "total_reviews": 0,
+        "real_reviews_count": 0,
+        "fake_reviews_count": 0
+    }
+
+_summary_cache = None
+_summary_cache_lock = threading.Lock()
+
+# One lock per fingerprint being computed, so a precompute and a request for
+# the same reviews share one computation
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def get_summary_cache():
+    """Process-wide SummaryCache (None when SUMMARY_CACHE_PATH is unset or unusable)"""
+    global _summary_cache
+    
+    if _summary_cache is None and SUMMARY_CACHE_PATH:
+        with _summary_cache_lock:
+            if _summary_cache is None:
                 try:
-                    json_line = json.loads(line)
-                    full_response += json_line.get("response", "")
-                    
-                    # Check if generation is done
-                    if json_line.get("done", False):
-                        break
-                except json.JSONDecodeError as e:
-                    print(f"JSON decode error: {e}")
-                    continue
-    except Exception as e:
-        print(f"Error processing response: {e}")
-        if full_response:
-            return full_response.strip()
-        return f"Summary generation partially failed: {str(e)}"
+                    _summary_cache = SummaryCache(SUMMARY_CACHE_PATH, max_entries=SUMMARY_CACHE_MAX_ENTRIES)
+                except Exception as e:
+                    print(f"⚠️  Summary cache disabled: {e}")
+                    return None
+    return _summary_cache
 
-    return full_response.strip() if full_response else "No summary generated"
+def summarize(run_id=None, format='html', mode=None, use_cache=True, engine=None,
+              on_token=None, on_progress=None):
+    """
+    Summary and sentiment statistics for a run, memoized by review-set fingerprint
+    (on_token/on_progress are only called when the summary is actually generated)
+    Returns {"summary", "sentiment_stats", "cached"}
+    """
+    paths = run_paths(run_id)
+    mode = mode or SUMMARY_MODE
+    engine = engine or SUMMARY_ENGINE
+    cache = get_summary_cache() if use_cache else None
+    if cache is None or not os.path.exists(paths['real_csv']):
+        summary, _ = _generate_summary(paths, format=format, mode=mode, engine=engine,
+                                       on_token=on_token, on_progress=on_progress)
+        return {"summary": summary,
+                "sentiment_stats": load_sentiment_stats(paths['sentiment_stats']),
+                "cached": False}
+    
+    fingerprint = summary_fingerprint(paths['real_csv'], paths['sentiment_stats'],
+                                      SUMMARIZER_VERSION, format, mode, engine, config.OLLAMA_MODEL)
+    with _inflight_lock:
+        lock, waiters = _inflight.get(fingerprint, (threading.Lock(), 0))
+        _inflight[fingerprint] = (lock, waiters + 1)
+    
+    try:
+        with lock:
+            cached = cache.get(fingerprint)
+            if cached is not None:
+                print("✅ Summary served from cache")
+                return {**cached, "cached": True}
+            
+            summary, method = _generate_summary(paths, format=format, mode=mode, engine=engine,
+                                                on_token=on_token, on_progress=on_progress)
+            sentiment_stats = load_sentiment_stats(paths['sentiment_stats'])
+            # Fallback output is not worth pinning: the next request may reach Ollama again
+            if method in ("custom", "ollama"):
+                cache.put(fingerprint, summary, sentiment_stats)
+            return {"summary": summary, "sentiment_stats": sentiment_stats, "cached": False}
+    finally:
+        with _inflight_lock:
+            lock, waiters = _inflight[fingerprint]
+            if waiters > 1:
+                _inflight[fingerprint] = (lock, waiters - 1)
+            else:
+                del _inflight[fingerprint]
 
+def precompute_summary(run_id=None, format='html', mode=None):
+    """Warm the summary cache for a run (meant to be called right after prediction)"""
+    try:
+        result = summarize(run_id=run_id, format=format, mode=mode)
+        return not result["cached"]
+    except Exception as e:
+        print(f"⚠️  Summary precompute failed: {e}")
+        return False
 
 if __name__ == "__main__":
     print("=" * 70)
@@ -0,0 +1,118 @@
+"""
+Summary Result Cache
+SQLite store of finished summaries keyed by a fingerprint of the analyzed
+review set (real_reviews.csv + sentiment_stats.json contents), the summarizer
+version and the output format/mode
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_digest(path):
+    """sha1 of a file's contents ('' for a missing file)"""
+    digest = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return ''
+    return digest.hexdigest()
+
+
+# Content digests keyed by (path, size, mtime) so unchanged files are hashed once
+_digests = {}
+_digests_lock = threading.Lock()
+
+
+def cached_file_digest(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return ''
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digests_lock:
+        digest = _digests.get(key)
+    if digest is None:
+        digest = file_digest(path)
+        with _digests_lock:
+            if len(_digests) > 1024:
+                _digests.clear()
+            _digests[key] = digest
+    return digest
+
+
+def summary_fingerprint(real_csv_path, sentiment_stats_path, version, *options):
+    """Fingerprint of everything a summary depends on"""
+    parts = [cached_file_digest(real_csv_path), cached_file_digest(sentiment_stats_path), str(version)]
+    parts.extend(str(option) for option in options)
+    return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """Size-bounded LRU cache of {summary, sentiment_stats} results"""
+
+    def __init__(self, path, max_entries=256):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "fingerprint TEXT PRIMARY KEY, summary TEXT, sentiment_stats TEXT, "
+            "created_at REAL, last_used REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries (last_used)")
+        self._conn.commit()
+
+    def get(self, fingerprint):
+        """Return {'summary', 'sentiment_stats'} for a fingerprint, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, sentiment_stats FROM summaries WHERE fingerprint = ?", (fingerprint,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE summaries SET last_used = ? WHERE fingerprint = ?",
+                               (time.time(), fingerprint))
+            self._conn.commit()
+        return {'summary': row[0], 'sentiment_stats': json.loads(row[1])}
+
+    def put(self, fingerprint, summary, sentiment_stats):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (fingerprint, summary, sentiment_stats, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (fingerprint, summary, json.dumps(sentiment_stats), now, now)
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    "DELETE FROM summaries WHERE fingerprint IN "
+                    "(SELECT fingerprint FROM summaries ORDER BY last_used ASC LIMIT ?)", (excess,)
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM summaries")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
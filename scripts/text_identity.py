@@ -0,0 +1,14 @@
+"""
+Review Text Identity
+Stable hash of a review's text, shared by the scrape cache (merging newly
+seen reviews) and incremental prediction (matching reviews across analyses)
+"""
+
+import hashlib
+import re
+
+
+def text_identity(text):
+    """Stable identity of a review text: hash of its whitespace/case-normalized form"""
+    text = re.sub(r'\s+', ' ', str(text)).strip().lower()
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
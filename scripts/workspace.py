@@ -0,0 +1,168 @@
+"""
+Per-Run Workspaces
+Every analysis gets a run ID and its own directory under data/runs/ so
+concurrent analyses never read or overwrite each other's files
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from scripts.scrape_cache import normalize_product_url
+
+DATA_DIR = "data"
+RUNS_DIR = os.path.join(DATA_DIR, "runs")
+# Per-product record of the last analysis (outlives run workspaces)
+ANALYSIS_STATE_DIR = os.path.join(DATA_DIR, "analysis_state")
+
+# Artifact file names shared by scraper.py, predict.py and summary.py
+ARTIFACTS = {
+    "input_csv": "input_reviews.csv",
+    "real_csv": "real_reviews.csv",
+    "real_pdf": "real_reviews.pdf",
+    "sentiment_stats": "sentiment_stats.json",
+    "scraped_html": "scraped_page.html",
+    "summary_txt": "custom_summary.txt",
+    "product_url": "product_url.txt",
+}
+
+# Touched on every job start so cleanup_runs sees the run as in use
+ACTIVITY_MARKER = ".last_activity"
+
+_RUN_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def new_run_id():
+    return uuid.uuid4().hex
+
+
+def is_valid_run_id(run_id):
+    """Run IDs become directory names, so only accept the format we generate"""
+    return bool(run_id) and bool(_RUN_ID_PATTERN.match(run_id))
+
+
+def run_dir(run_id=None):
+    """Workspace directory for a run (the shared data/ directory when run_id is None)"""
+    if run_id is None:
+        return DATA_DIR
+    if not is_valid_run_id(run_id):
+        raise ValueError(f"Invalid run ID: {run_id!r}")
+    return os.path.join(RUNS_DIR, run_id)
+
+
+def run_paths(run_id=None, create=False):
+    """Return {artifact name: path} for a run"""
+    directory = run_dir(run_id)
+    if create:
+        os.makedirs(directory, exist_ok=True)
+    return {name: os.path.join(directory, filename) for name, filename in ARTIFACTS.items()}
+
+
+def touch_run(run_id):
+    """Mark a run as in use now (called whenever a job starts on it)"""
+    if run_id is None:
+        return
+    marker = os.path.join(run_dir(run_id), ACTIVITY_MARKER)
+    os.makedirs(os.path.dirname(marker), exist_ok=True)
+    with open(marker, 'a'):
+        os.utime(marker)
+
+
+def last_activity(path):
+    """
+    Newest mtime of a run directory and the files in it
+    (a directory's own mtime does not change when a file inside is rewritten)
+    """
+    newest = os.path.getmtime(path)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                newest = max(newest, entry.stat().st_mtime)
+            except OSError:
+                continue  # removed while scanning
+    return newest
+
+
+def cleanup_runs(max_age_seconds, active_run_ids=()):
+    """Delete run workspaces without activity for max_age_seconds, except those in active_run_ids"""
+    if not os.path.isdir(RUNS_DIR):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    active_run_ids = set(active_run_ids)
+    removed = 0
+    for name in os.listdir(RUNS_DIR):
+        path = os.path.join(RUNS_DIR, name)
+        if not is_valid_run_id(name) or name in active_run_ids or not os.path.isdir(path):
+            continue
+        try:
+            if last_activity(path) >= cutoff:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
+
+
+def write_product_url(run_id, product_url):
+    """Remember which product a run's input was scraped from"""
+    with open(run_paths(run_id, create=True)['product_url'], 'w', encoding='utf-8') as f:
+        f.write(product_url)
+
+
+def read_product_url(run_id=None):
+    """Product URL recorded for a run, or None"""
+    try:
+        with open(run_paths(run_id)['product_url'], 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def analysis_state_dir(product_url, create=False):
+    """Directory holding the last analysis of a product, keyed by its normalized URL"""
+    key = hashlib.sha1(normalize_product_url(product_url).encode('utf-8')).hexdigest()
+    directory = os.path.join(ANALYSIS_STATE_DIR, key)
+    if create:
+        os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+# In-process handoff of real-review DataFrames from prediction to summarization,
+# keyed by the real_reviews.csv path they were written to
+HANDOFF_MAX_RUNS = 8
+_handoff = OrderedDict()
+_handoff_lock = threading.Lock()
+
+
+def put_real_reviews(csv_path, df):
+    """Keep the DataFrame just written to csv_path so the summarizer can skip re-reading it"""
+    try:
+        mtime = os.path.getmtime(csv_path)
+    except OSError:
+        return
+    with _handoff_lock:
+        _handoff[csv_path] = (mtime, df)
+        _handoff.move_to_end(csv_path)
+        while len(_handoff) > HANDOFF_MAX_RUNS:
+            _handoff.popitem(last=False)
+
+
+def get_real_reviews(csv_path):
+    """Return the handed-off DataFrame for csv_path, or None if absent or the file changed since"""
+    with _handoff_lock:
+        entry = _handoff.get(csv_path)
+    if entry is None:
+        return None
+    mtime, df = entry
+    try:
+        if os.path.getmtime(csv_path) != mtime:
+            return None
+    except OSError:
+        return None
+    return df
@@ -32,6 +32,7 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Variables to store analysis data
     let currentProductUrl = null;
+    let currentRunId = null;
     let analysisCancelled = false;
     
     // Walmart URL validation regex
@@ -164,6 +165,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(data.error);
             }
 
+            // Every later step works on this run's workspace
+            currentRunId = data.run_id || null;
             completeStep(stepAnalyzing, 'Reviews scraped successfully');
 
             // Step 3: Analyze reviews
@@ -198,7 +201,8 @@ document.addEventListener('DOMContentLoaded', function() {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-            }
+            },
+            body: JSON.stringify({ run_id: currentRunId }),
         })
         .then(response => response.json())
         .then(data => {
@@ -207,9 +211,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(data.error);
             }
             
-            // Got job_id, start polling
+            // Got job_id, follow its status
             const jobId = data.job_id;
-            pollPredictStatus(jobId, progressInterval);
+            watchPredictStatus(jobId, progressInterval);
         })
         .catch(error => {
             clearInterval(progressInterval);
@@ -217,45 +221,102 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    function pollPredictStatus(jobId, progressInterval) {
-        const pollInterval = setInterval(() => {
-            if (analysisCancelled) {
-                clearInterval(pollInterval);
+    function watchPredictStatus(jobId, progressInterval) {
+        const statusText = stepAnalyzing.querySelector('.status-text');
+        
+        watchJob(jobId, {
+            onUpdate: data => {
+                if (data.message) {
+                    statusText.textContent = data.message;
+                }
+                // Real progress replaces the animation once the model is classifying
+                if (data.progress && data.progress.percent !== undefined) {
+                    clearInterval(progressInterval);
+                    updateProgress(stepAnalyzing, Math.max(5, Math.min(99, data.progress.percent)));
+                }
+            },
+            onComplete: () => {
                 clearInterval(progressInterval);
-                return;
+                updateProgress(stepAnalyzing, 100);
+                completeStep(stepAnalyzing, 'Fake reviews identified');
+                
+                // Proceed to step 4: Generate summary
+                setTimeout(() => {
+                    if (analysisCancelled) return;
+                    generateSummary();
+                }, 500);
+            },
+            onError: message => {
+                clearInterval(progressInterval);
+                showError('Review Analysis Failed', message || 'Analysis failed');
+            },
+            onCancel: () => clearInterval(progressInterval),
+        });
+    }
+    
+    /**
+     * Follow a background job until it finishes: status pushed over
+     * server-sent events, or long-polling where EventSource is unavailable
+     * handlers: onUpdate(status), onComplete(status), onError(message), onCancel()
+     */
+    function watchJob(jobId, handlers) {
+        const handle = data => {
+            if (analysisCancelled) {
+                handlers.onCancel();
+                return true;
+            }
+            handlers.onUpdate(data);
+            if (data.status === 'completed') {
+                handlers.onComplete(data);
+                return true;
+            }
+            if (data.status === 'failed') {
+                handlers.onError(data.error);
+                return true;
             }
+            return false;
+        };
+        
+        if (typeof EventSource !== 'undefined') {
+            const source = new EventSource(`/jobs/${jobId}/events`);
+            let finished = false;
             
-            fetch(`/predict_status/${jobId}`)
+            source.addEventListener('status', event => {
+                if (handle(JSON.parse(event.data))) {
+                    finished = true;
+                    source.close();
+                }
+            });
+            source.addEventListener('error', () => {
+                if (finished) return;
+                finished = true;
+                source.close();
+                if (analysisCancelled) {
+                    handlers.onCancel();
+                } else {
+                    handlers.onError('Lost connection to the server');
+                }
+            });
+            return;
+        }
+        
+        // Long-poll: each request returns as soon as the job moves past `version`
+        let version = 0;
+        const poll = () => {
+            fetch(`/jobs/${jobId}/status?since=${version}&wait=25`)
                 .then(response => response.json())
                 .then(data => {
-                    const statusText = stepAnalyzing.querySelector('.status-text');
-                    if (data.message) {
-                        statusText.textContent = data.message;
+                    if (data.error && !data.status) {
+                        throw new Error(data.error);
                     }
-                    
-                    if (data.status === 'completed') {
-                        clearInterval(pollInterval);
-                        clearInterval(progressInterval);
-                        updateProgress(stepAnalyzing, 100);
-                        completeStep(stepAnalyzing, 'Fake reviews identified');
-                        
-                        // Proceed to step 4: Generate summary
-                        setTimeout(() => {
-                            if (analysisCancelled) return;
-                            generateSummary();
-                        }, 500);
-                    } else if (data.status === 'failed') {
-                        clearInterval(pollInterval);
-                        clearInterval(progressInterval);
-                        throw new Error(data.error || 'Analysis failed');
+                    version = data.version;
+                    if (!handle(data)) {
+                        poll();
                     }
                 })
-                .catch(error => {
-                    clearInterval(pollInterval);
-                    clearInterval(progressInterval);
-                    showError('Review Analysis Failed', error.message);
-                });
-        }, 2000); // Poll every 2 seconds
+                .catch(error => handlers.onError(error.message));
+        };
+        poll();
     }
     
     /**
@@ -274,11 +335,65 @@ document.addEventListener('DOMContentLoaded', function() {
             updateProgress(stepSummarizing, progress);
         }, 300);
         
+        if (typeof EventSource !== 'undefined') {
+            streamSummary(progressInterval);
+        } else {
+            requestSummary(progressInterval);
+        }
+    }
+    
+    /**
+     * Summarize over server-sent events so progress and the summary text
+     * arrive as they are produced
+     */
+    function streamSummary(progressInterval) {
+        const statusText = stepSummarizing.querySelector('.status-text');
+        const source = new EventSource(`/summarize_stream?run_id=${encodeURIComponent(currentRunId)}`);
+        let streamedText = '';
+        let finished = false;
+        
+        const stop = () => {
+            finished = true;
+            source.close();
+            clearInterval(progressInterval);
+        };
+        
+        source.addEventListener('progress', event => {
+            if (analysisCancelled) return stop();
+            const data = JSON.parse(event.data);
+            statusText.textContent = data.message;
+        });
+        
+        source.addEventListener('token', event => {
+            if (analysisCancelled) return stop();
+            streamedText += JSON.parse(event.data).text;
+            statusText.textContent = streamedText.length > 120
+                ? '...' + streamedText.slice(-120)
+                : streamedText;
+        });
+        
+        source.addEventListener('done', event => {
+            stop();
+            showSummaryResult(JSON.parse(event.data));
+        });
+        
+        source.addEventListener('error', event => {
+            if (finished) return;
+            stop();
+            if (analysisCancelled) return;
+            // Server-sent error events carry a payload; connection failures do not
+            const message = event.data ? JSON.parse(event.data).error : 'Lost connection to the server';
+            showError('Summary Generation Failed', message || 'Summarization failed');
+        });
+    }
+    
+    function requestSummary(progressInterval) {
         fetch('/summarize', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-            }
+            },
+            body: JSON.stringify({ run_id: currentRunId }),
         })
         .then(response => response.json())
         .then(data => {
@@ -287,9 +402,9 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(data.error);
             }
             
-            // Got job_id, start polling
+            // Got job_id, follow its status
             const jobId = data.job_id;
-            pollSummarizeStatus(jobId, progressInterval);
+            watchSummarizeStatus(jobId, progressInterval);
         })
         .catch(error => {
             clearInterval(progressInterval);
@@ -297,67 +412,60 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
-    function pollSummarizeStatus(jobId, progressInterval) {
-        const pollInterval = setInterval(() => {
-            if (analysisCancelled) {
-                clearInterval(pollInterval);
+    function watchSummarizeStatus(jobId, progressInterval) {
+        const statusText = stepSummarizing.querySelector('.status-text');
+        
+        watchJob(jobId, {
+            onUpdate: data => {
+                if (data.message) {
+                    statusText.textContent = data.message;
+                }
+            },
+            onComplete: data => {
                 clearInterval(progressInterval);
-                return;
-            }
+                showSummaryResult(data.result);
+            },
+            onError: message => {
+                clearInterval(progressInterval);
+                showError('Summary Generation Failed', message || 'Summarization failed');
+            },
+            onCancel: () => clearInterval(progressInterval),
+        });
+    }
+    
+    /**
+     * Complete the summarizing step and display the results
+     */
+    function showSummaryResult(result) {
+        updateProgress(stepSummarizing, 100);
+        completeStep(stepSummarizing, 'Summary generated');
+        
+        setTimeout(() => {
+            if (analysisCancelled) return;
             
-            fetch(`/summarize_status/${jobId}`)
-                .then(response => response.json())
-                .then(data => {
-                    const statusText = stepSummarizing.querySelector('.status-text');
-                    if (data.message) {
-                        statusText.textContent = data.message;
-                    }
-                    
-                    if (data.status === 'completed') {
-                        clearInterval(pollInterval);
-                        clearInterval(progressInterval);
-                        updateProgress(stepSummarizing, 100);
-                        completeStep(stepSummarizing, 'Summary generated');
-                        
-                        // Display results
-                        setTimeout(() => {
-                            if (analysisCancelled) return;
-                            
-                            // Update result stats using the real values from the backend
-                            const stats = data.result.sentiment_stats;
-                const totalReviews = stats.total_reviews || 0;
-                const realReviewsCount = stats.real_reviews_count || 0;
-                const fakeReviewsCount = stats.fake_reviews_count || 0;
-                
-                            reviewsCount.textContent = `${totalReviews} reviews processed`;
-                            fakeCount.textContent = `${fakeReviewsCount} fake reviews removed`;
-                            realCount.textContent = `${realReviewsCount} genuine reviews analyzed`;
-                            
-                            // Display summary
-                            summaryText.innerHTML = data.result.summary;
-                            
-                            // Create or update sentiment chart
-                            updateSentimentChart(stats);
-                            
-                            // Load and display individual reviews
-                            loadReviews();
-                            
-                            // Show results section
-                            hideAllSections();
-                            resultsSection.classList.remove('d-none');
-                        }, 1000);
-                    } else if (data.status === 'failed') {
-                        clearInterval(pollInterval);
-                        clearInterval(progressInterval);
-                        throw new Error(data.error || 'Summarization failed');
-                    }
-                })
-                .catch(error => {
-                    clearInterval(pollInterval);
-                    clearInterval(progressInterval);
-                    showError('Summary Generation Failed', error.message);
-                });
-        }, 2000); // Poll every 2 seconds
+            // Update result stats using the real values from the backend
+            const stats = result.sentiment_stats;
+            const totalReviews = stats.total_reviews || 0;
+            const realReviewsCount = stats.real_reviews_count || 0;
+            const fakeReviewsCount = stats.fake_reviews_count || 0;
+            
+            reviewsCount.textContent = `${totalReviews} reviews processed`;
+            fakeCount.textContent = `${fakeReviewsCount} fake reviews removed`;
+            realCount.textContent = `${realReviewsCount} genuine reviews analyzed`;
+            
+            // Display summary
+            summaryText.innerHTML = result.summary;
+            
+            // Create or update sentiment chart
+            updateSentimentChart(stats);
+            
+            // Load and display individual reviews
+            loadReviews();
+            
+            // Show results section
+            hideAllSections();
+            resultsSection.classList.remove('d-none');
+        }, 1000);
     }
     
     /**
@@ -429,6 +537,7 @@ document.addEventListener('DOMContentLoaded', function() {
      */
     function resetAnalysis() {
         analysisCancelled = true;
+        currentRunId = null;
         hideAllSections();
         amazonUrlInput.value = '';
         urlError.classList.add('d-none');
@@ -451,31 +560,59 @@ document.addEventListener('DOMContentLoaded', function() {
     }
     
     /**
-     * Load and display individual reviews
+     * Load and display individual reviews, one page at a time
      */
-    function loadReviews() {
-        fetch('/reviews')
+    const REVIEWS_PAGE_SIZE = 50;
+    let reviewsLoaded = 0;
+    
+    function loadReviews(append = false) {
+        const reviewsList = document.getElementById('reviews-list');
+        const loadMoreBtn = document.getElementById('load-more-reviews-btn');
+        if (!append) {
+            reviewsLoaded = 0;
+        }
+        
+        const params = new URLSearchParams({ offset: reviewsLoaded, limit: REVIEWS_PAGE_SIZE });
+        if (currentRunId) {
+            params.set('run_id', currentRunId);
+        }
+        fetch(`/reviews?${params}`)
             .then(response => response.json())
             .then(data => {
-                const reviewsList = document.getElementById('reviews-list');
-                reviewsList.innerHTML = ''; // Clear existing reviews
+                if (!append) {
+                    reviewsList.innerHTML = ''; // Clear existing reviews
+                }
                 
-                if (data.reviews && data.reviews.length > 0) {
-                    data.reviews.forEach((review, index) => {
-                        const reviewCard = createReviewCard(review, index + 1);
-                        reviewsList.appendChild(reviewCard);
-                    });
-                } else {
+                // Reviews arrive column-wise: {text: [...], rating: [...], ...}
+                const columns = data.reviews || {};
+                const count = (columns.text || []).length;
+                
+                if (count > 0) {
+                    for (let i = 0; i < count; i++) {
+                        const review = {
+                            text: columns.text[i],
+                            rating: columns.rating[i],
+                            sentiment: columns.sentiment[i],
+                            confidence: columns.confidence[i]
+                        };
+                        reviewsList.appendChild(createReviewCard(review, reviewsLoaded + i + 1));
+                    }
+                    reviewsLoaded += count;
+                } else if (!append) {
                     reviewsList.innerHTML = '<div class="col-12"><p class="text-muted text-center">No reviews found.</p></div>';
                 }
+                
+                loadMoreBtn.classList.toggle('d-none', reviewsLoaded >= (data.total || 0));
             })
             .catch(error => {
                 console.error('Error loading reviews:', error);
-                const reviewsList = document.getElementById('reviews-list');
                 reviewsList.innerHTML = '<div class="col-12"><p class="text-danger text-center">Failed to load reviews.</p></div>';
+                loadMoreBtn.classList.add('d-none');
             });
     }
     
+    document.getElementById('load-more-reviews-btn').addEventListener('click', () => loadReviews(true));
+    
     /**
      * Create a review card element
      */